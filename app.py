@@ -4,8 +4,11 @@ from __future__ import annotations
 from flask import Flask, redirect, url_for
 
 from config import load_config
-from src.routes import autor, editorial, genero, grupo_lectura, historial, idioma, libro, libroedit, miembro, prestamo, principal, ubicacion, usuario
+from src.models import db, snapshot
+from src.routes import api, autor, editorial, genero, grupo_lectura, historial, idioma, libro, libroedit, miembro, ops, prestamo, principal, ubicacion, usuario
 from src.routes.auth import bp as auth_bp, login_manager
+from src.services import memprof, pool_control, profiler, search_index, sql_stats, suggest, timing
+from src.services.warmup import warm_up
 from src.utils.filters import date10, shortdate, shorttime
 
 
@@ -13,10 +16,16 @@ def create_app() -> Flask:
     app = Flask(__name__, template_folder="src/templates", static_folder="src/static")
     load_config(app)
 
+    db.init_app(app)
+    sql_stats.install(app)
+    timing.init_app(app)
+    profiler.init_app(app)
     login_manager.init_app(app)
     app.jinja_env.filters["shortdate"] = shortdate
     app.jinja_env.filters["shorttime"] = shorttime
     app.jinja_env.filters["date10"] = date10
+    app.cli.add_command(snapshot.cli)
+    app.cli.add_command(memprof.cli)
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(principal.bp)
@@ -32,11 +41,19 @@ def create_app() -> Flask:
     app.register_blueprint(libroedit.bp)
     app.register_blueprint(miembro.bp)
     app.register_blueprint(ubicacion.bp)
+    app.register_blueprint(ops.bp)
+    app.register_blueprint(api.bp)
 
     @app.route("/")
     def root_redirect():
         return redirect(url_for("principal.index"))
 
+    if app.config.get("DB_EAGER_INIT"):
+        warm_up()
+    pool_control.start()
+    search_index.install(app)
+    suggest.install(app)
+
     return app
 
 
@@ -29,7 +29,41 @@ class Config:
     ORACLE_DSN: str | None = _get_env("ORACLE_DSN")
     ORACLE_POOL_MIN: int = int(_get_env("ORACLE_POOL_MIN", "1") or 1)
     ORACLE_POOL_MAX: int = int(_get_env("ORACLE_POOL_MAX", "5") or 5)
+    ORACLE_POOL_TIMEOUT_MS: int = int(_get_env("ORACLE_POOL_TIMEOUT_MS", "5000") or 5000)
+    ORACLE_POOL_MAX_WAITERS: int = int(_get_env("ORACLE_POOL_MAX_WAITERS", "20") or 0)
+    CATALOG_WORKERS: int = int(_get_env("CATALOG_WORKERS", "0") or 0)
+    COUNT_CACHE_TTL: float = float(_get_env("COUNT_CACHE_TTL", "30") or 0)
+    REF_CACHE_TTL: float = float(_get_env("REF_CACHE_TTL", "300") or 0)
+    REF_CACHE_MAX: int = int(_get_env("REF_CACHE_MAX", "64") or 0)
+    DB_EAGER_INIT: bool = (_get_env("DB_EAGER_INIT", "1") or "1").lower() in {"1", "true", "yes", "on"}
+    DB_REQUEST_SCOPED: bool = (_get_env("DB_REQUEST_SCOPED", "0") or "0").lower() in {"1", "true", "yes", "on"}
+    POOL_AUTOSIZE: bool = (_get_env("POOL_AUTOSIZE", "0") or "0").lower() in {"1", "true", "yes", "on"}
+    POOL_AUTOSIZE_FLOOR: int = int(_get_env("POOL_AUTOSIZE_FLOOR", "0") or 0)
+    POOL_AUTOSIZE_CEILING: int = int(_get_env("POOL_AUTOSIZE_CEILING", "20") or 20)
+    POOL_AUTOSIZE_INTERVAL: float = float(_get_env("POOL_AUTOSIZE_INTERVAL", "15") or 15)
+    POOL_GROW_WAIT_MS: float = float(_get_env("POOL_GROW_WAIT_MS", "50") or 50)
+    SQL_STATS: bool = (_get_env("SQL_STATS", "1") or "1").lower() in {"1", "true", "yes", "on"}
+    SLOW_QUERY_MS: float = float(_get_env("SLOW_QUERY_MS", "200") or 0)
+    N_PLUS_ONE_THRESHOLD: int = int(_get_env("N_PLUS_ONE_THRESHOLD", "10") or 0)
+    SEARCH_INDEX: bool = (_get_env("SEARCH_INDEX", "1") or "1").lower() in {"1", "true", "yes", "on"}
+    SEARCH_MAX_AGE: float = float(_get_env("SEARCH_MAX_AGE", "0") or 0)
+    SEARCH_POLL_SECONDS: float = float(_get_env("SEARCH_POLL_SECONDS", "30") or 0)
+    SUGGEST_MAX_AGE: float = float(_get_env("SUGGEST_MAX_AGE", "600") or 0)
+    SERVER_TIMING: bool = (_get_env("SERVER_TIMING", "1") or "1").lower() in {"1", "true", "yes", "on"}
+    SERVER_TIMING_LOG: bool = (_get_env("SERVER_TIMING_LOG", "0") or "0").lower() in {"1", "true", "yes", "on"}
+    PROFILE_SAMPLE_EVERY: int = int(_get_env("PROFILE_SAMPLE_EVERY", "0") or 0)
+    PROFILE_INTERVAL_MS: float = float(_get_env("PROFILE_INTERVAL_MS", "5") or 5)
+    PROFILE_BUFFER: int = int(_get_env("PROFILE_BUFFER", "100") or 100)
+    RETRY_AFTER_SECONDS: int = int(_get_env("RETRY_AFTER_SECONDS", "2") or 2)
     SECRET_KEY: str = _get_env("SECRET_KEY", "change-me") or "change-me"
+    ADMIN_USERS: tuple = tuple(u.strip() for u in (_get_env("ADMIN_USERS", "") or "").split(",") if u.strip())
+    ADMIN_TOKEN: str | None = _get_env("ADMIN_TOKEN")
+    ID_BLOCK_SIZE: int = int(_get_env("ID_BLOCK_SIZE", "50") or 50)
+    ID_ALLOW_MAX_FALLBACK: bool = (_get_env("ID_ALLOW_MAX_FALLBACK", "0") or "0").lower() in {"1", "true", "yes", "on"}
+    FETCH_ARRAYSIZE: int = int(_get_env("FETCH_ARRAYSIZE", "500") or 500)
+    DML_BATCH_SIZE: int = int(_get_env("DML_BATCH_SIZE", "1000") or 1000)
+    ROW_FACTORY: str = (_get_env("ROW_FACTORY", "record") or "record").lower()
+    SCHEMA_SNAPSHOT: str | None = _get_env("SCHEMA_SNAPSHOT", str(_BASE_DIR / "instance" / "schema_snapshot.json"))
 
     def as_dict(self) -> Dict[str, Any]:
         return {
@@ -38,7 +72,41 @@ class Config:
             "ORACLE_DSN": self.ORACLE_DSN,
             "ORACLE_POOL_MIN": self.ORACLE_POOL_MIN,
             "ORACLE_POOL_MAX": self.ORACLE_POOL_MAX,
+            "CATALOG_WORKERS": self.CATALOG_WORKERS,
+            "COUNT_CACHE_TTL": self.COUNT_CACHE_TTL,
+            "REF_CACHE_TTL": self.REF_CACHE_TTL,
+            "REF_CACHE_MAX": self.REF_CACHE_MAX,
+            "DB_EAGER_INIT": self.DB_EAGER_INIT,
+            "DB_REQUEST_SCOPED": self.DB_REQUEST_SCOPED,
+            "ORACLE_POOL_TIMEOUT_MS": self.ORACLE_POOL_TIMEOUT_MS,
+            "ORACLE_POOL_MAX_WAITERS": self.ORACLE_POOL_MAX_WAITERS,
+            "POOL_AUTOSIZE": self.POOL_AUTOSIZE,
+            "POOL_AUTOSIZE_FLOOR": self.POOL_AUTOSIZE_FLOOR,
+            "POOL_AUTOSIZE_CEILING": self.POOL_AUTOSIZE_CEILING,
+            "POOL_AUTOSIZE_INTERVAL": self.POOL_AUTOSIZE_INTERVAL,
+            "POOL_GROW_WAIT_MS": self.POOL_GROW_WAIT_MS,
+            "SQL_STATS": self.SQL_STATS,
+            "SLOW_QUERY_MS": self.SLOW_QUERY_MS,
+            "N_PLUS_ONE_THRESHOLD": self.N_PLUS_ONE_THRESHOLD,
+            "SEARCH_INDEX": self.SEARCH_INDEX,
+            "SEARCH_MAX_AGE": self.SEARCH_MAX_AGE,
+            "SEARCH_POLL_SECONDS": self.SEARCH_POLL_SECONDS,
+            "SUGGEST_MAX_AGE": self.SUGGEST_MAX_AGE,
+            "SERVER_TIMING": self.SERVER_TIMING,
+            "SERVER_TIMING_LOG": self.SERVER_TIMING_LOG,
+            "PROFILE_SAMPLE_EVERY": self.PROFILE_SAMPLE_EVERY,
+            "PROFILE_INTERVAL_MS": self.PROFILE_INTERVAL_MS,
+            "PROFILE_BUFFER": self.PROFILE_BUFFER,
+            "RETRY_AFTER_SECONDS": self.RETRY_AFTER_SECONDS,
             "SECRET_KEY": self.SECRET_KEY,
+            "ADMIN_USERS": self.ADMIN_USERS,
+            "ADMIN_TOKEN": self.ADMIN_TOKEN,
+            "ID_BLOCK_SIZE": self.ID_BLOCK_SIZE,
+            "ID_ALLOW_MAX_FALLBACK": self.ID_ALLOW_MAX_FALLBACK,
+            "FETCH_ARRAYSIZE": self.FETCH_ARRAYSIZE,
+            "DML_BATCH_SIZE": self.DML_BATCH_SIZE,
+            "ROW_FACTORY": self.ROW_FACTORY,
+            "SCHEMA_SNAPSHOT": self.SCHEMA_SNAPSHOT,
         }
 
 
@@ -0,0 +1,130 @@
+"""Benchmark the catalog search index over a synthetic corpus.
+
+    python scripts/bench_search.py --docs 1000000 --queries 2000
+
+Builds the index with :func:`src.services.search_index.build` from generated
+Spanish-looking titles (no database needed) and reports build time, peak RSS
+and query latency percentiles for whole-word, multi-word, partial-word and
+ISBN-part queries.  Words follow a Zipf distribution over ``--vocabulary``
+words, so a few are very common and most are rare, as in a real catalog;
+query cost grows with the number of matching books, and ``--vocabulary 90``
+shows the worst case where every word matches a large share of the corpus.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.search_index import build, tokenize  # noqa: E402
+
+WORDS = (
+    "amor guerra noche sombra ciudad río mar montaña camino viaje historia secreto memoria tiempo "
+    "silencio fuego agua tierra cielo luna sol estrella sueño jardín casa puerta ventana libro "
+    "carta canción corazón alma voz palabra nombre reino imperio batalla héroe dragón bosque "
+    "isla desierto invierno verano otoño primavera cuento leyenda misterio crónica diario vida "
+    "muerte familia hermano madre padre hijo niña caballero reina rey capitán ingenioso hidalgo "
+    "quijote mancha soledad laberinto ciencia física química matemática economía filosofía arte"
+).split()
+SYLLABLES = "ba be bi bo bu ca ce ci co cu da de di do du fa fe fi fo ga ge go la le li lo lu ma me mi mo mu na ne ni no nu pa pe pi po ra re ri ro ru sa se si so ta te ti to tu va ve vi za zo cha che chi llo rra tra tre bra cla gra".split()
+EDITORIALES = ["Planeta", "Alfaguara", "Anagrama", "Tusquets", "Salamandra", "Debolsillo", "Cátedra", "Siruela"]
+GENEROS = ["Novela", "Poesía", "Ensayo", "Historia", "Ciencia ficción", "Infantil", "Biografía", "Teatro"]
+
+
+def vocabulary(size: int, rng: random.Random):
+    words = list(dict.fromkeys(WORDS))[:size]
+    seen = set(words)
+    while len(words) < size:
+        word = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+        if word not in seen and tokenize(word) == [word]:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def corpus(count: int, words, rng: random.Random):
+    cumulative = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+
+    def pick(low: int, high: int) -> str:
+        return " ".join(rng.choices(words, cum_weights=cumulative, k=rng.randint(low, high)))
+
+    for doc_id in range(1, count + 1):
+        yield {
+            "ID_LIBRO": doc_id,
+            "TITULO": pick(2, 6),
+            "SUBTITULO": pick(0, 4),
+            "DESCRIPCION": pick(5, 15),
+            "ISBN": f"978-84-{rng.randint(0, 9999):04d}-{rng.randint(0, 999):03d}-{doc_id % 10}",
+            "EDITORIAL": rng.choice(EDITORIALES),
+            "GENERO": rng.choice(GENEROS),
+        }
+
+
+def queries(count: int, words, rng: random.Random):
+    # people search for reasonably distinctive words, not the most common ones
+    words = [tokenize(word)[0] for word in words[: max(len(WORDS), len(words) // 10)]]
+    kinds = []
+    for _ in range(count):
+        kind = rng.choice(("word", "two words", "partial", "isbn"))
+        if kind == "word":
+            text = rng.choice(words)
+        elif kind == "two words":
+            text = " ".join(rng.sample(words, 2))
+        elif kind == "partial":
+            word = rng.choice([word for word in words if len(word) >= 5])
+            start = rng.randint(0, len(word) - 4)
+            text = word[start : start + rng.randint(3, 4)]
+        else:
+            text = f"978-84-{rng.randint(0, 9999):04d}"
+        kinds.append((kind, text))
+    return kinds
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--vocabulary", type=int, default=60_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    words = vocabulary(args.vocabulary, rng)
+
+    started = time.perf_counter()
+    index = build(corpus(args.docs, words, rng))
+    elapsed = time.perf_counter() - started
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    stats = index.stats()
+    print(f"build: {args.docs} docs in {elapsed:.1f}s ({args.docs / elapsed:,.0f} docs/s), peak RSS {rss_mb:,.0f} MB")
+    print(f"index: {stats['terms']} terms, {stats['postings']:,} postings, {stats['grams']} trigrams")
+
+    by_kind = {}
+    for kind, text in queries(args.queries, words, rng):
+        started = time.perf_counter()
+        total, _ = index.search(text, args.limit)
+        by_kind.setdefault(kind, []).append(((time.perf_counter() - started) * 1000, total))
+    print(f"{'query':<10} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'avg hits':>10}")
+    for kind, samples in by_kind.items():
+        times = [elapsed for elapsed, _ in samples]
+        hits = statistics.mean(total for _, total in samples)
+        print(
+            f"{kind:<10} {len(samples):>5} {percentile(times, 0.5):>8.2f} {percentile(times, 0.95):>8.2f} "
+            f"{max(times):>8.2f} {hits:>10,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+-- Hi/lo key table used by src/models/ids.py for tables without a sequence.
+-- Each reservation bumps NEXT_HI and owns IDs [hi * ID_BLOCK_SIZE, (hi + 1) * ID_BLOCK_SIZE).
+-- Keep ID_BLOCK_SIZE identical on every worker once rows exist here.
+CREATE TABLE ID_BLOCK (
+  TABLE_NAME VARCHAR2(128) NOT NULL,
+  NEXT_HI    NUMBER        NOT NULL,
+  CONSTRAINT ID_BLOCK_PK PRIMARY KEY (TABLE_NAME)
+);
@@ -0,0 +1,20 @@
+-- Indexes behind the list pages.  Column names are the common physical names;
+-- adjust them to the ones src/models/mapping.py resolved for your schema.
+
+-- HISTORIAL keyset pagination (src/models/historial_dao.py listar_pagina):
+-- pages seek on (FECHA, ID_HISTORIAL) newest first, optionally filtered by
+-- usuario or libro, so each filter gets the key as its trailing columns and
+-- Oracle reads one index range per page instead of sorting the table.
+-- The seek predicate skips rows whose FECHA is NULL; keep the column NOT NULL.
+CREATE INDEX HISTORIAL_FECHA_IX ON HISTORIAL (FECHA, ID_HISTORIAL);
+CREATE INDEX HISTORIAL_USUARIO_FECHA_IX ON HISTORIAL (USUARIO_ID_USUARIO, FECHA, ID_HISTORIAL);
+CREATE INDEX HISTORIAL_LIBRO_FECHA_IX ON HISTORIAL (LIBRO_ID_LIBRO, FECHA, ID_HISTORIAL);
+
+-- LIBRO title search (src/models/libro_dao.py search_filter): function-based
+-- indexes on the exact expressions the DAO emits (src/utils/text.py sql_fold),
+-- so "Empieza por" searches are index range scans per column.  "Contiene" can
+-- only fast-full-scan these indexes, which is still far smaller than the table.
+-- Recreate them if ACCENTED/PLAIN in src/utils/text.py ever change.
+CREATE INDEX LIBRO_TITULO_FOLD_IX ON LIBRO (TRANSLATE(LOWER(TITULO), 'áàäâãéèëêíìïîóòöôõúùüûñçý', 'aaaaaeeeeiiiiooooouuuuncy'));
+CREATE INDEX LIBRO_SUBTITULO_FOLD_IX ON LIBRO (TRANSLATE(LOWER(SUBTITULO), 'áàäâãéèëêíìïîóòöôõúùüûñçý', 'aaaaaeeeeiiiiooooouuuuncy'));
+CREATE INDEX LIBRO_ISBN_NORM_IX ON LIBRO (REPLACE(REPLACE(ISBN, '-', ''), ' ', ''));
@@ -3,25 +3,29 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional
 
-from .db import execute, query_all, query_one
+from src.utils.pagination import PER_PAGE, Page
 
-
-def _next_id() -> int:
-    row = query_one("SELECT NVL(MAX(ID_AUTOR), 0) + 1 AS ID FROM AUTOR")
-    return int(row["ID"]) if row else 1
+from .db import execute, query_all, query_one, query_page
+from .ids import next_id
 
 
 def listar() -> List[Dict[str, object]]:
     return query_all("SELECT * FROM AUTOR ORDER BY ID_AUTOR DESC")
 
 
+def listar_pagina(page: int, per_page: int = PER_PAGE, search: Optional[str] = None) -> Page:
+    where = "INSTR(LOWER(NVL(NOMBRE, '') || ' ' || NVL(APELLIDO, '')), :q) > 0" if search else ""
+    return query_page("AUTOR", "*", "ID_AUTOR DESC", page, per_page, where, {"q": search.lower()} if search else None)
+
+
 def obtener(id_autor: int) -> Optional[Dict[str, object]]:
     return query_one("SELECT * FROM AUTOR WHERE ID_AUTOR = :id", {"id": id_autor})
 
 
 def crear(data: Dict[str, object]) -> int:
     data = {**data}
-    data.setdefault("ID_AUTOR", _next_id())
+    if data.get("ID_AUTOR") is None:
+        data["ID_AUTOR"] = next_id("AUTOR", "ID_AUTOR")
     sql = (
         "INSERT INTO AUTOR (ID_AUTOR, NOMBRE, APELLIDO, FECH_NACIMIENT, NACIONALIDAD, BIOGRAFIA) "
         "VALUES (:ID_AUTOR, :NOMBRE, :APELLIDO, :FECH_NACIMIENT, :NACIONALIDAD, :BIOGRAFIA)"
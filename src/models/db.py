@@ -1,67 +1,716 @@
 """Database connection utilities for Oracle."""
 from __future__ import annotations
 
-from contextlib import contextmanager
-from typing import Dict, Iterable, List, Optional
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
 
 import oracledb
+from flask import Response, g, has_request_context, request
 
 from config import Config
+from src.utils import metrics
+from src.utils.pagination import KeysetPage, Page, clamp_page, encode_cursor
 
 
+logger = logging.getLogger(__name__)
+
 _pool: Optional[oracledb.ConnectionPool] = None
+# Connection pinned by the innermost open transaction() in this context
+_tx_conn: ContextVar[Optional[oracledb.Connection]] = ContextVar("db_tx_conn", default=None)
+_tx_callbacks: ContextVar[Optional[List[Callable[[], None]]]] = ContextVar("db_tx_callbacks", default=None)
+# Set by init_app() when DB_REQUEST_SCOPED is enabled
+_request_scoped = False
+_pool_lock = threading.Lock()
+# Outcome of the last pool creation, warm-up or health ping, reported by pool_status()
+_pool_state: Dict[str, object] = {"ready": False, "error": None, "warmed": 0}
+_waiters_lock = threading.Lock()
+_waiters = 0
+# Driver codes for "timed out waiting for a pooled connection" (thin / thick)
+_POOL_TIMEOUT_CODES = {"DPY-4005", "ORA-24457"}
+
+
+class PoolExhausted(RuntimeError):
+    """No pooled connection became available in time; the request is shed."""
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(f"Oracle pool exhausted ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _pool_attr(name: str) -> float:
+    return float(getattr(_pool, name, 0) or 0) if _pool is not None else 0.0
+
+
+POOL_ACQUIRE_SECONDS = metrics.histogram(
+    "db_pool_acquire_seconds", "Time spent waiting for pool.acquire().", labels=("blueprint",)
+)
+POOL_HOLD_SECONDS = metrics.histogram(
+    "db_pool_hold_seconds",
+    "Time a connection stayed checked out of the pool.",
+    labels=("blueprint",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+POOL_ACQUIRE_ERRORS = metrics.counter(
+    "db_pool_acquire_errors_total", "pool.acquire() calls that raised.", labels=("blueprint", "error")
+)
+POOL_IN_USE = metrics.gauge(
+    "db_pool_in_use", "Connections checked out by this process.", labels=("blueprint",)
+)
+POOL_CREATED = metrics.counter("db_pool_created_total", "Connection pools created.")
+POOL_SHED = metrics.counter(
+    "db_pool_shed_total", "Acquires rejected by the timeout or waiter limit.", labels=("blueprint", "reason")
+)
+POOL_RESIZES = metrics.counter("db_pool_resizes_total", "Runtime pool reconfigurations.", labels=("source",))
+metrics.gauge("db_pool_waiters", "Threads currently waiting in pool.acquire().", fn=lambda: _waiters)
+metrics.gauge("db_pool_busy", "Connections busy according to the driver.", fn=lambda: _pool_attr("busy"))
+metrics.gauge("db_pool_opened", "Connections opened by the pool.", fn=lambda: _pool_attr("opened"))
+metrics.gauge("db_pool_max", "Configured pool maximum.", fn=lambda: _pool_attr("max"))
 
 
 def _get_pool() -> oracledb.ConnectionPool:
     global _pool
-    if _pool is None:
-        config = Config()
-        if not all([config.ORACLE_USER, config.ORACLE_PASSWORD, config.ORACLE_DSN]):
-            raise RuntimeError("Oracle connection details are not fully configured")
-        _pool = oracledb.create_pool(
-            user=config.ORACLE_USER,
-            password=config.ORACLE_PASSWORD,
-            dsn=config.ORACLE_DSN,
-            min=config.ORACLE_POOL_MIN,
-            max=config.ORACLE_POOL_MAX,
-            increment=1,
-        )
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        # Two first requests may race here; only one of them builds the pool.
+        if _pool is None:
+            config = Config()
+            if not all([config.ORACLE_USER, config.ORACLE_PASSWORD, config.ORACLE_DSN]):
+                raise RuntimeError("Oracle connection details are not fully configured")
+            try:
+                _pool = oracledb.create_pool(
+                    user=config.ORACLE_USER,
+                    password=config.ORACLE_PASSWORD,
+                    dsn=config.ORACLE_DSN,
+                    min=config.ORACLE_POOL_MIN,
+                    max=config.ORACLE_POOL_MAX,
+                    increment=1,
+                    getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                    wait_timeout=config.ORACLE_POOL_TIMEOUT_MS,
+                )
+            except Exception as exc:
+                _pool_state.update(ready=False, error=str(exc))
+                raise
+            _pool_state.update(ready=True, error=None)
+            POOL_CREATED.inc()
     return _pool
 
 
-@contextmanager
-def get_conn():
-    """Context manager yielding a pooled connection."""
+def init_pool() -> bool:
+    """Create the pool now and open ``ORACLE_POOL_MIN`` pinged connections.
+
+    Failures are logged and recorded for :func:`pool_status` instead of
+    raised, so the app still starts when the database is unreachable.
+    """
+
+    try:
+        pool = _get_pool()
+        # Hold min connections at once so the pool really opens that many.
+        warm = [pool.acquire() for _ in range(max(1, pool.min))]
+        try:
+            for conn in warm:
+                conn.ping()
+        finally:
+            for conn in warm:
+                conn.close()
+    except Exception as exc:  # noqa: BLE001 - reported through pool_status()
+        logger.warning("Oracle pool warm-up failed: %s", exc)
+        _pool_state.update(ready=False, error=str(exc), warmed=0)
+        return False
+    _pool_state.update(ready=True, error=None, warmed=len(warm))
+    return True
+
+
+def resize_pool(min_size: Optional[int] = None, max_size: Optional[int] = None, source: str = "admin") -> Dict[str, int]:
+    """Change the live pool bounds with ``pool.reconfigure()``."""
+
+    pool = _get_pool()
+    new_max = pool.max if max_size is None else int(max_size)
+    new_min = min(pool.min, new_max) if min_size is None else int(min_size)
+    if new_max < 1 or new_min < 0 or new_min > new_max:
+        raise ValueError("Tamaño de pool inválido: se requiere 0 <= min <= max y max >= 1.")
+    with _pool_lock:
+        pool.reconfigure(min=new_min, max=new_max)
+    POOL_RESIZES.inc(source=source)
+    logger.info("Oracle pool resized to min=%s max=%s (%s)", new_min, new_max, source)
+    return {"min": new_min, "max": new_max}
 
+
+def _ping_pool() -> None:
+    try:
+        with get_conn(shared=False) as conn:
+            conn.ping()
+    except Exception as exc:  # noqa: BLE001 - reported through pool_status()
+        _pool_state.update(ready=False, error=str(exc))
+    else:
+        _pool_state.update(ready=True, error=None)
+
+
+def pool_ready() -> bool:
+    """Whether the pool exists and its last creation, warm-up or ping worked."""
+
+    return bool(_pool_state["ready"]) and _pool is not None
+
+
+def pool_status(ping: bool = False) -> Dict[str, object]:
+    """Readiness summary for health checks.
+
+    ``ping`` adds a round trip (creating the pool if needed) and records its
+    outcome, so a worker whose warm-up failed or was skipped
+    (``DB_EAGER_INIT=0``) turns ready as soon as the database answers.
+    """
+
+    if ping:
+        _ping_pool()
+    status: Dict[str, object] = {
+        "ready": pool_ready(),
+        "error": _pool_state["error"],
+        "warmed": _pool_state["warmed"],
+        "opened": int(_pool_attr("opened")),
+        "busy": int(_pool_attr("busy")),
+        "min": int(_pool_attr("min")),
+        "max": int(_pool_attr("max")),
+    }
+    return status
+
+
+def _blueprint() -> str:
+    if has_request_context():
+        return request.blueprint or "app"
+    return "-"
+
+
+def _is_pool_timeout(exc: Exception) -> bool:
+    error = exc.args[0] if isinstance(exc, oracledb.Error) and exc.args else None
+    return getattr(error, "full_code", None) in _POOL_TIMEOUT_CODES
+
+
+def _acquire() -> Tuple[oracledb.Connection, float, str]:
+    """Acquire a pooled connection, recording wait time and in-use count."""
+
+    global _waiters
+    label = _blueprint()
     pool = _get_pool()
-    conn = pool.acquire()
+    config = Config()
+    with _waiters_lock:
+        # Only callers that will have to queue count towards ORACLE_POOL_MAX_WAITERS
+        queued = pool.busy >= pool.max
+        if queued:
+            if config.ORACLE_POOL_MAX_WAITERS and _waiters >= config.ORACLE_POOL_MAX_WAITERS:
+                POOL_SHED.inc(blueprint=label, reason="waiters")
+                raise PoolExhausted("waiters", config.RETRY_AFTER_SECONDS)
+            _waiters += 1
+    started = time.perf_counter()
     try:
-        yield conn
+        conn = pool.acquire()
+    except Exception as exc:
+        POOL_ACQUIRE_ERRORS.inc(blueprint=label, error=type(exc).__name__)
+        if _is_pool_timeout(exc):
+            POOL_SHED.inc(blueprint=label, reason="timeout")
+            raise PoolExhausted("timeout", config.RETRY_AFTER_SECONDS) from exc
+        raise
     finally:
+        if queued:
+            with _waiters_lock:
+                _waiters -= 1
+    acquired = time.perf_counter()
+    POOL_ACQUIRE_SECONDS.observe(acquired - started, blueprint=label)
+    POOL_IN_USE.inc(blueprint=label)
+    return conn, acquired, label
+
+
+def _release(conn: oracledb.Connection, acquired: float, label: str) -> None:
+    try:
         conn.close()
+    finally:
+        POOL_IN_USE.dec(blueprint=label)
+        POOL_HOLD_SECONDS.observe(time.perf_counter() - acquired, blueprint=label)
+
+
+def _request_conn() -> Optional[oracledb.Connection]:
+    """Connection bound to the current Flask request, acquired on first use."""
+
+    if not _request_scoped or not has_request_context():
+        return None
+    conn = g.get("_db_conn")
+    if conn is None:
+        conn, acquired, label = _acquire()
+        g._db_conn = conn
+        g._db_conn_checkout = (acquired, label)
+    return conn
+
+
+def _release_request_conn(exc: Optional[BaseException] = None) -> None:
+    conn = g.pop("_db_conn", None)
+    if conn is not None:
+        # Releasing to the pool rolls back anything left uncommitted.
+        _release(conn, *g.pop("_db_conn_checkout"))
+
+
+def _pool_exhausted(exc: PoolExhausted):
+    response = Response("Servicio saturado, intente de nuevo en unos segundos.", status=503, mimetype="text/plain")
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response
+
+
+def init_app(app) -> None:
+    """Answer :class:`PoolExhausted` with 503 + Retry-After, and enable one
+    pooled connection per request when ``DB_REQUEST_SCOPED`` is set."""
+
+    global _request_scoped
+    app.register_error_handler(PoolExhausted, _pool_exhausted)
+    if app.config.get("DB_REQUEST_SCOPED"):
+        _request_scoped = True
+        app.teardown_request(_release_request_conn)
+
+
+@contextmanager
+def get_conn(shared: bool = True):
+    """Context manager yielding a pooled connection.
+
+    Inside :func:`transaction` the pinned connection is yielded instead, and
+    with ``DB_REQUEST_SCOPED`` the request's connection is reused.  Pass
+    ``shared=False`` for work that must commit on its own.
+    """
+
+    pinned = (_tx_conn.get() or _request_conn()) if shared else None
+    if pinned is not None:
+        yield pinned
+        return
+    conn, acquired, label = _acquire()
+    try:
+        yield conn
+    finally:
+        _release(conn, acquired, label)
+
+
+def in_transaction() -> bool:
+    return _tx_conn.get() is not None
+
+
+@contextmanager
+def transaction():
+    """Run the enclosed DAO calls on one connection and commit once at the end.
+
+    Any exception rolls everything back.  Nested blocks join the outer
+    transaction.  Callbacks registered with :func:`after_commit` run once the
+    commit succeeds and the connection is released; a rollback drops them.
+    """
+
+    if _tx_conn.get() is not None:
+        yield _tx_conn.get()
+        return
+    callbacks: List[Callable[[], None]] = []
+    with get_conn() as conn:
+        token = _tx_conn.set(conn)
+        callbacks_token = _tx_callbacks.set(callbacks)
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            _tx_callbacks.reset(callbacks_token)
+            _tx_conn.reset(token)
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception:  # noqa: BLE001 - the transaction is already committed
+            logger.exception("after_commit callback %r failed", callback)
+
+
+def after_commit(callback: Callable[[], None]) -> None:
+    """Run ``callback`` after the current :func:`transaction` commits, or now if none is open."""
+
+    callbacks = _tx_callbacks.get()
+    if callbacks is None:
+        callback()
+    else:
+        callbacks.append(callback)
+
+
+@dataclass(frozen=True)
+class StatementEvent:
+    """One executed statement, as passed to statement hooks."""
+
+    sql: str
+    fingerprint: str
+    elapsed: float
+    rows: int
+    error: Optional[str] = None
+
+
+_statement_hooks: List[Callable[[StatementEvent], None]] = []
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_BINDS = re.compile(r":\w+")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """Normalise ``sql`` so statements differing only in literals/binds match."""
+
+    text = _LITERALS.sub("?", sql)
+    text = _BINDS.sub(":?", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def add_statement_hook(hook: Callable[[StatementEvent], None]) -> None:
+    """Call ``hook`` after every statement run through this module."""
+
+    if hook not in _statement_hooks:
+        _statement_hooks.append(hook)
+
+
+def remove_statement_hook(hook: Callable[[StatementEvent], None]) -> None:
+    if hook in _statement_hooks:
+        _statement_hooks.remove(hook)
+
+
+class _Rows:
+    __slots__ = ("rows", "elapsed")
+
+    def __init__(self) -> None:
+        self.rows = 0
+        # Set by callers that time only their own DB calls (see query_iter)
+        self.elapsed: Optional[float] = None
+
+
+@contextmanager
+def _statement(sql: str):
+    """Time the enclosed statement and report it to the hooks."""
+
+    tracker = _Rows()
+    if not _statement_hooks:
+        yield tracker
+        return
+    error: Optional[str] = None
+    started = time.perf_counter()
+    try:
+        yield tracker
+    except BaseException as exc:
+        if not isinstance(exc, GeneratorExit):  # a closed query_iter is not a failure
+            error = type(exc).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - started if tracker.elapsed is None else tracker.elapsed
+        event = StatementEvent(sql, fingerprint(sql), elapsed, tracker.rows, error)
+        for hook in list(_statement_hooks):
+            try:
+                hook(event)
+            except Exception:  # noqa: BLE001 - instrumentation must not break queries
+                logger.exception("Statement hook %r failed", hook)
+
+
+_count_cache: Dict[Tuple[str, str, Tuple], Tuple[float, int]] = {}
+_count_lock = threading.Lock()
+_COUNT_CACHE_MAX = 1024
+_DML_TABLE = re.compile(r"^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|DELETE|MERGE\s+INTO)\s+(\w+)", re.IGNORECASE)
+
+
+def invalidate_counts(table: Optional[str] = None) -> None:
+    """Forget cached :func:`count_rows` results for ``table`` (default: all)."""
+
+    with _count_lock:
+        if table is None:
+            _count_cache.clear()
+            return
+        table = table.upper()
+        for key in [key for key in _count_cache if key[0] == table]:
+            del _count_cache[key]
+
+
+def _note_write(sql: str) -> None:
+    match = _DML_TABLE.match(sql)
+    if match and _count_cache:
+        invalidate_counts(match.group(1))
+
+
+def count_rows(table: str, where: str = "", binds: Optional[Dict[str, object]] = None, ttl: Optional[float] = None) -> int:
+    """``COUNT(*)`` of ``table`` filtered by ``where``, cached for ``COUNT_CACHE_TTL`` seconds.
+
+    Writes through this module drop the cached counts of the table they touch.
+    """
+
+    binds = binds or {}
+    ttl = Config().COUNT_CACHE_TTL if ttl is None else ttl
+    key = (table.upper(), where, tuple(sorted(binds.items())))
+    now = time.monotonic()
+    cached = _count_cache.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    row = query_one(f"SELECT COUNT(*) AS N FROM {table}{where}", binds)
+    total = int(row["N"]) if row else 0
+    if ttl > 0:
+        with _count_lock:
+            if len(_count_cache) >= _COUNT_CACHE_MAX:
+                _count_cache.clear()
+            _count_cache[key] = (now + ttl, total)
+    return total
+
+
+def query_page(
+    table: str,
+    columns: str,
+    order_by: str,
+    page: int,
+    per_page: int,
+    where: str = "",
+    binds: Optional[Dict[str, object]] = None,
+) -> Page:
+    """One page of ``SELECT columns FROM table [WHERE where] ORDER BY order_by``.
+
+    Only ``per_page`` rows are fetched (``OFFSET/FETCH``) and the total comes
+    from :func:`count_rows`, so page 1 costs the same whatever the table size.
+    ``order_by`` should be unique (end with the key) for stable pages.
+    """
+
+    binds = binds or {}
+    where_sql = f" WHERE {where}" if where else ""
+    total = count_rows(table, where_sql, binds)
+    page = clamp_page(page, total, per_page)
+    sql = (
+        f"SELECT {columns} FROM {table}{where_sql} ORDER BY {order_by} "
+        "OFFSET :page_offset ROWS FETCH NEXT :page_size ROWS ONLY"
+    )
+    rows = query_all(sql, {**binds, "page_offset": (page - 1) * per_page, "page_size": per_page})
+    return Page(items=rows, page=page, per_page=per_page, total=total)
+
+
+def query_keyset(
+    table: str,
+    columns: str,
+    keys: Sequence[Tuple[str, str]],
+    limit: int,
+    where: str = "",
+    binds: Optional[Dict[str, object]] = None,
+    after: Optional[Sequence[object]] = None,
+    before: Optional[Sequence[object]] = None,
+) -> KeysetPage:
+    """Seek pagination, newest first, over ``keys`` (``(column, alias)`` pairs).
+
+    ``after`` continues past the last row of a page and ``before`` goes back
+    past the first one; either way Oracle reads ``limit + 1`` rows from an
+    index on the key columns instead of skipping an OFFSET, so deep pages
+    cost the same as the first.  The last key must be unique and the key
+    columns NOT NULL.
+    """
+
+    binds = dict(binds or {})
+    conditions = [where] if where else []
+    seek = after if after is not None else before
+    if seek is not None:
+        op = "<" if after is not None else ">"
+        terms = []
+        for depth, (column, _) in enumerate(keys):
+            equal = [f"{keys[i][0]} = :seek_{i}" for i in range(depth)]
+            terms.append("(" + " AND ".join(equal + [f"{column} {op} :seek_{depth}"]) + ")")
+            binds[f"seek_{depth}"] = seek[depth]
+        conditions.append("(" + " OR ".join(terms) + ")")
+    direction = "ASC" if before is not None else "DESC"
+    order = ", ".join(f"{column} {direction}" for column, _ in keys)
+    where_sql = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"SELECT {columns} FROM {table}{where_sql} ORDER BY {order} FETCH FIRST :seek_limit ROWS ONLY"
+    rows = query_all(sql, {**binds, "seek_limit": limit + 1})
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if before is not None:
+        rows.reverse()
+
+    def cursor_for(row) -> str:
+        return encode_cursor([row[alias] for _, alias in keys])
+
+    if not rows:
+        return KeysetPage(items=rows)
+    has_next = more if before is None else True
+    has_prev = more if before is not None else after is not None
+    return KeysetPage(
+        items=rows,
+        next_cursor=cursor_for(rows[-1]) if has_next else None,
+        prev_cursor=cursor_for(rows[0]) if has_prev else None,
+    )
+
+
+def _execute_autocommit(conn, cursor, sql: str, binds: Dict[str, object]) -> None:
+    with _statement(sql) as stmt:
+        if _tx_conn.get() is conn:
+            # Part of a transaction(): the commit happens when the block ends.
+            cursor.execute(sql, binds)
+        else:
+            # Piggyback the commit on the execute call instead of a separate round trip.
+            conn.autocommit = True
+            try:
+                cursor.execute(sql, binds)
+            finally:
+                conn.autocommit = False
+        stmt.rows = cursor.rowcount or 0
+    _note_write(sql)
 
 
 def execute(sql: str, binds: Optional[Dict[str, object]] = None) -> None:
-    """Execute a DDL/DML statement and commit the transaction."""
+    """Execute a DDL/DML statement and commit it (or defer to the open transaction)."""
 
     binds = binds or {}
     with get_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute(sql, binds)
-        conn.commit()
+            _execute_autocommit(conn, cursor, sql, binds)
+
+
+def execute_returning(
+    sql: str,
+    binds: Optional[Dict[str, object]] = None,
+    out: str = "NEW_ID",
+    out_type: type = int,
+) -> Optional[object]:
+    """Execute DML ending in ``RETURNING ... INTO :<out>`` and return that value.
+
+    The statement, the out-bind and the commit travel in a single round trip.
+    """
+
+    binds = dict(binds or {})
+    with get_conn() as conn:
+        with conn.cursor() as cursor:
+            var = cursor.var(out_type)
+            binds[out] = var
+            _execute_autocommit(conn, cursor, sql, binds)
+    values = var.getvalue()
+    return values[0] if values else None
+
+
+class Row(tuple):
+    """Read-only row that also answers ``row["COL"]``/``row.get("COL")``.
+
+    Values are stored as a plain tuple; the column names live once on a
+    subclass shared by every row with the same column shape.  ``dict(row)``
+    and ``**row`` work, but JSON encoders will see a list (use ``_asdict``).
+    """
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _index: Dict[str, int] = {}
+
+    def __getitem__(self, key):  # type: ignore[override]
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, key: object) -> bool:  # type: ignore[override]
+        return key in self._index
+
+    def get(self, key: str, default: object = None) -> object:
+        pos = self._index.get(key)
+        return default if pos is None else tuple.__getitem__(self, pos)
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def values(self) -> Tuple[object, ...]:
+        return tuple(self)
+
+    def items(self) -> Iterator[Tuple[str, object]]:
+        return zip(self._fields, self)
+
+    def _asdict(self) -> Dict[str, object]:
+        return dict(zip(self._fields, self))
+
+    def __repr__(self) -> str:
+        return f"Row({self._asdict()!r})"
+
+
+_row_classes: Dict[Tuple[str, ...], type] = {}
+
+
+def row_class(columns: Tuple[str, ...]) -> type:
+    """Return the :class:`Row` subclass shared by queries with ``columns``."""
+
+    cls = _row_classes.get(columns)
+    if cls is None:
+        index = {name: pos for pos, name in enumerate(columns)}
+        cls = type("Row", (Row,), {"__slots__": (), "_fields": columns, "_index": index})
+        cls = _row_classes.setdefault(columns, cls)
+    return cls
+
+
+def _row_maker(cursor):
+    columns = tuple(col[0] for col in cursor.description)
+    if Config().ROW_FACTORY == "dict":
+        return lambda row: dict(zip(columns, row))
+    return row_class(columns)
+
+
+@dataclass(frozen=True)
+class BatchError:
+    """A row rejected by :func:`execute_many`; ``offset`` indexes the input rows."""
+
+    offset: int
+    code: int
+    message: str
+
+
+def execute_many(
+    sql: str,
+    rows: Iterable[Union[Dict[str, object], Sequence[object]]],
+    batch_size: Optional[int] = None,
+    input_sizes: Optional[Union[Dict[str, object], Sequence[object]]] = None,
+) -> List[BatchError]:
+    """Run ``sql`` once per row using array DML, ``batch_size`` rows per round trip.
+
+    Rows that fail do not abort the batch; they are returned as
+    :class:`BatchError` entries and the remaining rows are committed (or left
+    to the open :func:`transaction`).  ``input_sizes`` is passed to
+    ``cursor.setinputsizes`` so the driver does not re-bind when a column is
+    ``None`` in the first rows.
+    """
+
+    rows = rows if isinstance(rows, list) else list(rows)
+    if not rows:
+        return []
+    size = batch_size or Config().DML_BATCH_SIZE
+    errors: List[BatchError] = []
+    with get_conn() as conn:
+        with conn.cursor() as cursor:
+            if isinstance(input_sizes, dict):
+                cursor.setinputsizes(**input_sizes)
+            elif input_sizes:
+                cursor.setinputsizes(*input_sizes)
+            for start in range(0, len(rows), size):
+                with _statement(sql) as stmt:
+                    cursor.executemany(sql, rows[start : start + size], batcherrors=True)
+                    stmt.rows = cursor.rowcount or 0
+                for error in cursor.getbatcherrors():
+                    errors.append(BatchError(start + error.offset, error.code, error.message))
+            if _tx_conn.get() is not conn:
+                conn.commit()
+    _note_write(sql)
+    if errors:
+        logger.warning("%d of %d rows rejected by batch DML", len(errors), len(rows))
+    return errors
 
 
 def _rows_to_dicts(cursor, rows: Iterable[Iterable[object]]) -> List[Dict[str, object]]:
-    columns = [col[0] for col in cursor.description]
-    return [dict(zip(columns, row)) for row in rows]
+    return list(map(_row_maker(cursor), rows))
 
 
 def query_all(sql: str, binds: Optional[Dict[str, object]] = None) -> List[Dict[str, object]]:
     binds = binds or {}
     with get_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute(sql, binds)
-            rows = cursor.fetchall()
+            with _statement(sql) as stmt:
+                cursor.execute(sql, binds)
+                rows = cursor.fetchall()
+                stmt.rows = len(rows)
             return _rows_to_dicts(cursor, rows)
 
 
@@ -69,21 +718,349 @@ def query_one(sql: str, binds: Optional[Dict[str, object]] = None) -> Optional[D
     binds = binds or {}
     with get_conn() as conn:
         with conn.cursor() as cursor:
-            cursor.execute(sql, binds)
-            row = cursor.fetchone()
+            with _statement(sql) as stmt:
+                cursor.execute(sql, binds)
+                row = cursor.fetchone()
+                stmt.rows = 0 if row is None else 1
             if row is None:
                 return None
-            return _rows_to_dicts(cursor, [row])[0]
+            return _row_maker(cursor)(row)
 
 
-def table_exists(table: str) -> bool:
-    sql = """
-      SELECT COUNT(*) C
-        FROM USER_TABLES
-       WHERE TABLE_NAME = :t
+def query_iter(
+    sql: str,
+    binds: Optional[Dict[str, object]] = None,
+    arraysize: Optional[int] = None,
+) -> Iterator[Dict[str, object]]:
+    """Yield rows, fetching ``arraysize`` rows per round trip.
+
+    The pooled connection is held only while the generator is alive and is
+    released as soon as it is exhausted or closed, so prefer
+    :func:`query_stream` when the consumer may stop early.
+    """
+
+    binds = binds or {}
+    size = arraysize or Config().FETCH_ARRAYSIZE
+    with get_conn() as conn:
+        with conn.cursor() as cursor:
+            cursor.arraysize = size
+            cursor.prefetchrows = size + 1
+            # Reported when the consumer finishes or closes the iterator, but
+            # only execute/fetch time counts: the consumer's own work (e.g.
+            # rendering a streamed template) between batches is excluded.
+            with _statement(sql) as stmt:
+                stmt.elapsed = 0.0
+                started = time.perf_counter()
+                cursor.execute(sql, binds)
+                make_row = _row_maker(cursor)
+                while True:
+                    rows = cursor.fetchmany()
+                    stmt.elapsed += time.perf_counter() - started
+                    if not rows:
+                        break
+                    stmt.rows += len(rows)
+                    yield from map(make_row, rows)
+                    started = time.perf_counter()
+
+
+@contextmanager
+def query_stream(
+    sql: str,
+    binds: Optional[Dict[str, object]] = None,
+    arraysize: Optional[int] = None,
+) -> Iterator[Iterator[Dict[str, object]]]:
+    """Context manager around :func:`query_iter` that always releases the connection."""
+
+    with closing(query_iter(sql, binds, arraysize)) as rows:
+        yield rows
+
+
+SNAPSHOT_FORMAT = 2
+
+
+def schema_checksum() -> str:
+    """Return a cheap fingerprint that changes whenever the schema's DDL does."""
+
+    row = query_one(
+        """
+      SELECT COUNT(*) AS N,
+             TO_CHAR(MAX(LAST_DDL_TIME), 'YYYYMMDDHH24MISS') AS T
+        FROM USER_OBJECTS
+       WHERE OBJECT_TYPE IN ('TABLE', 'VIEW', 'SEQUENCE')
+    """
+    ) or {}
+    raw = f"{row.get('N')}|{row.get('T')}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def catalog_digest(catalog: Dict[str, object]) -> str:
+    """Integrity checksum of exported catalog data."""
+
+    canonical = json.dumps(catalog, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SchemaCatalog:
+    """In-process index of the schema's tables, columns, identities and FKs.
+
+    The dictionary views are read in a handful of bulk queries the first time
+    any lookup is made; every later lookup is answered from memory until
+    :meth:`invalidate` or :meth:`refresh` is called (e.g. after running DDL).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._version = 0
+        self._tables: Dict[str, Dict[str, str]] = {}
+        self._views: Set[str] = set()
+        self._identity: Set[Tuple[str, str]] = set()
+        self._fks: Dict[str, List[Tuple[str, str]]] = {}
+        self._sequences: List[str] = []
+        self._derived: Dict[Tuple[str, ...], object] = {}
+        self._pending: Optional[Dict[str, object]] = None
+
+    def load(self) -> None:
+        """Read the schema metadata with one query per dictionary view."""
+
+        tables: Dict[str, Dict[str, str]] = {
+            row["TABLE_NAME"]: {} for row in query_all("SELECT TABLE_NAME FROM USER_TABLES")
+        }
+        columns = query_all(
+            """
+          SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE
+            FROM USER_TAB_COLUMNS
+           ORDER BY TABLE_NAME, COLUMN_ID
+        """
+        )
+        views: Set[str] = set()
+        for row in columns:
+            # USER_TAB_COLUMNS also lists view columns; keep them addressable
+            # but out of has_table(), which only reports real tables.
+            if row["TABLE_NAME"] not in tables:
+                views.add(row["TABLE_NAME"])
+            tables.setdefault(row["TABLE_NAME"], {})[row["COLUMN_NAME"]] = row["DATA_TYPE"]
+
+        identity = {
+            (row["TABLE_NAME"], row["COLUMN_NAME"])
+            for row in query_all("SELECT TABLE_NAME, COLUMN_NAME FROM USER_TAB_IDENTITY_COLS")
+        }
+
+        fks: Dict[str, List[Tuple[str, str]]] = {}
+        for row in query_all(
+            """
+          SELECT a.TABLE_NAME, a.COLUMN_NAME, r.TABLE_NAME AS R_TABLE_NAME
+            FROM USER_CONS_COLUMNS a
+            JOIN USER_CONSTRAINTS c ON a.CONSTRAINT_NAME = c.CONSTRAINT_NAME
+            JOIN USER_CONSTRAINTS r ON c.R_CONSTRAINT_NAME = r.CONSTRAINT_NAME
+           WHERE c.CONSTRAINT_TYPE = 'R'
+           ORDER BY a.TABLE_NAME, a.CONSTRAINT_NAME, a.POSITION
+        """
+        ):
+            fks.setdefault(row["TABLE_NAME"], []).append((row["COLUMN_NAME"], row["R_TABLE_NAME"]))
+
+        sequences = [
+            row["SEQUENCE_NAME"]
+            for row in query_all("SELECT SEQUENCE_NAME FROM USER_SEQUENCES ORDER BY SEQUENCE_NAME")
+        ]
+        self._install(tables, identity, fks, sequences, views)
+
+    def _install(
+        self,
+        tables: Dict[str, Dict[str, str]],
+        identity: Set[Tuple[str, str]],
+        fks: Dict[str, List[Tuple[str, str]]],
+        sequences: List[str],
+        views: Set[str],
+    ) -> None:
+        with self._lock:
+            self._tables = tables
+            self._views = views
+            self._identity = identity
+            self._fks = fks
+            self._sequences = sequences
+            self._derived = {}
+            self._version += 1
+            self._loaded = True
+
+    def export(self) -> Dict[str, object]:
+        """Return the catalog as plain JSON-serialisable data."""
+
+        self._ensure_loaded()
+        return {
+            "tables": {table: list(columns.items()) for table, columns in self._tables.items()},
+            "identity": sorted(list(item) for item in self._identity),
+            "fks": {table: [list(fk) for fk in fks] for table, fks in self._fks.items()},
+            "sequences": list(self._sequences),
+            "views": sorted(self._views),
+        }
+
+    def restore(self, data: Dict[str, object]) -> None:
+        """Install catalog data previously produced by :meth:`export`."""
+
+        tables = {table: dict(columns) for table, columns in data["tables"].items()}  # type: ignore[union-attr]
+        identity = {(table, column) for table, column in data["identity"]}  # type: ignore[union-attr]
+        fks = {table: [(c, r) for c, r in items] for table, items in data["fks"].items()}  # type: ignore[union-attr]
+        views = set(data.get("views", ()))  # type: ignore[arg-type]
+        self._install(tables, identity, fks, list(data["sequences"]), views)  # type: ignore[arg-type]
+
+    def preload(self, snapshot: Dict[str, object]) -> None:
+        """Queue a snapshot to be used instead of introspection if still valid.
+
+        The snapshot is only trusted once :func:`schema_checksum` confirms the
+        schema has not changed since it was written.
+        """
+
+        with self._lock:
+            self._pending = snapshot
+
+    def invalidate(self) -> None:
+        """Mark the metadata stale; the next lookup reloads it.
+
+        The current dictionaries stay in place so lookups already past
+        :meth:`_ensure_loaded` keep seeing a complete catalog.
+        """
+
+        with self._lock:
+            self._loaded = False
+            self._pending = None
+
+    def refresh(self) -> None:
+        """Reload the metadata now and swap it in once complete."""
+
+        with self._lock:
+            self._pending = None
+        self.load()
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            pending, self._pending = self._pending, None
+            if pending is not None and pending.get("schema_checksum") == schema_checksum():
+                self.restore(pending["catalog"])  # type: ignore[arg-type]
+                return
+            self.load()
+
+    @property
+    def version(self) -> int:
+        """Counter bumped on every load, used to expire derived caches."""
+
+        self._ensure_loaded()
+        return self._version
+
+    def has_table(self, table: str) -> bool:
+        """Whether ``table`` is a table of the schema (views excluded, as in USER_TABLES)."""
+
+        self._ensure_loaded()
+        name = table.upper()
+        return name in self._tables and name not in self._views
+
+    def columns(self, table: str) -> Dict[str, str]:
+        """Return ``{COLUMN_NAME: DATA_TYPE}`` for ``table`` in column order."""
+
+        self._ensure_loaded()
+        return self._tables.get(table.upper(), {})
+
+    def has_column(self, table: str, column: str) -> bool:
+        return column.upper() in self.columns(table)
+
+    def datatype(self, table: str, column: str) -> Optional[str]:
+        return self.columns(table).get(column.upper())
+
+    def is_identity(self, table: str, column: str) -> bool:
+        self._ensure_loaded()
+        return (table.upper(), column.upper()) in self._identity
+
+    def fk_to(self, table: str, ref_table: str) -> Optional[str]:
+        self._ensure_loaded()
+        ref = ref_table.upper()
+        for column, target in self._fks.get(table.upper(), []):
+            if target == ref:
+                return column
+        return None
+
+    def sequences(self) -> List[str]:
+        self._ensure_loaded()
+        return self._sequences
+
+    def derived(self, key: Tuple[str, ...], compute):
+        """Memoise ``compute()`` under ``key`` until the catalog is reloaded."""
+
+        self._ensure_loaded()
+        derived = self._derived
+        if key not in derived:
+            derived[key] = compute()
+        return derived[key]
+
+
+_catalog = SchemaCatalog()
+
+
+def load_schema_snapshot(path: Optional[str]) -> bool:
+    """Queue the snapshot at ``path`` for the catalog if it is readable and intact.
+
+    Nothing is queried here; the snapshot is validated against
+    :func:`schema_checksum` on first use and ignored if the schema changed.
     """
-    row = query_one(sql, {"t": table.upper()})
-    return (row or {}).get("C", 0) > 0
+
+    if not path or not os.path.exists(path):
+        return False
+    try:
+        with open(path, encoding="utf-8") as handle:
+            snapshot = json.load(handle)
+    except (OSError, ValueError):
+        logger.warning("Ignoring unreadable schema snapshot %s", path)
+        return False
+    if snapshot.get("format") != SNAPSHOT_FORMAT or snapshot.get("digest") != catalog_digest(snapshot.get("catalog")):
+        logger.warning("Ignoring outdated or corrupt schema snapshot %s", path)
+        return False
+    _catalog.preload(snapshot)
+    return True
+
+
+def schema_catalog() -> SchemaCatalog:
+    """Return the process-wide :class:`SchemaCatalog`."""
+
+    return _catalog
+
+
+_schema_hooks: List[Callable[[], None]] = []
+
+
+def add_schema_hook(hook: Callable[[], None]) -> None:
+    """Call ``hook`` whenever the schema catalog is refreshed or invalidated."""
+
+    if hook not in _schema_hooks:
+        _schema_hooks.append(hook)
+
+
+def _schema_changed() -> None:
+    for hook in list(_schema_hooks):
+        try:
+            hook()
+        except Exception:  # noqa: BLE001 - one stale cache must not block the others
+            logger.exception("Schema hook %r failed", hook)
+
+
+def refresh_schema() -> None:
+    """Reload the schema catalog, e.g. after applying DDL."""
+
+    _catalog.refresh()
+    _schema_changed()
+
+
+def invalidate_schema() -> None:
+    """Forget the cached schema; it is reloaded lazily on next use."""
+
+    _catalog.invalidate()
+    _schema_changed()
+
+
+def table_exists(table: str) -> bool:
+    return _catalog.has_table(table)
 
 
 def first_existing_table(candidates: List[str]) -> str:
@@ -93,25 +1070,10 @@ def first_existing_table(candidates: List[str]) -> str:
     raise RuntimeError(f"Ninguna tabla de {candidates} existe")
 
 
-def next_id(table: str, pk: str) -> int:
-    """Compute the next numeric identifier for ``table.pk``."""
-
-    sql = f"SELECT NVL(MAX({pk}), 0) + 1 AS ID FROM {table}"
-    row = query_one(sql)
-    return int(row["ID"]) if row else 1
-
-
 def column_exists(table: str, column: str) -> bool:
     """Return ``True`` if ``table.column`` exists in the current schema."""
 
-    sql = """
-      SELECT COUNT(*) AS C
-        FROM USER_TAB_COLUMNS
-       WHERE TABLE_NAME = :T
-         AND COLUMN_NAME = :C
-    """
-    row = query_one(sql, {"T": table.upper(), "C": column.upper()})
-    return (row or {}).get("C", 0) > 0
+    return _catalog.has_column(table, column)
 
 
 def first_existing_column(table: str, candidates: List[str]) -> str:
@@ -127,65 +1089,53 @@ def first_existing_column(table: str, candidates: List[str]) -> str:
 
 
 def get_col_datatype(table: str, column: str) -> Optional[str]:
-    sql = """
-      SELECT DATA_TYPE
-        FROM USER_TAB_COLUMNS
-       WHERE TABLE_NAME = :t
-         AND COLUMN_NAME = :c
-    """
-    row = query_one(sql, {"t": table.upper(), "c": column.upper()})
-    return (row or {}).get("DATA_TYPE")
+    return _catalog.datatype(table, column)
 
 
 def find_fk_to(table: str, ref_table: str) -> Optional[str]:
-    sql = """
-      SELECT a.COLUMN_NAME
-        FROM USER_CONS_COLUMNS a
-        JOIN USER_CONSTRAINTS c ON a.CONSTRAINT_NAME = c.CONSTRAINT_NAME
-        JOIN USER_CONSTRAINTS r ON c.R_CONSTRAINT_NAME = r.CONSTRAINT_NAME
-        JOIN USER_CONS_COLUMNS rc ON r.CONSTRAINT_NAME = rc.CONSTRAINT_NAME
-       WHERE c.CONSTRAINT_TYPE = 'R'
-         AND a.TABLE_NAME = :t
-         AND r.TABLE_NAME = :rt
-       FETCH FIRST 1 ROWS ONLY
-    """
-    row = query_one(sql, {"t": table.upper(), "rt": ref_table.upper()})
-    return (row or {}).get("COLUMN_NAME")
+    return _catalog.fk_to(table, ref_table)
 
 
 def any_column_like(table: str, patterns: List[str]) -> Optional[str]:
+    columns = _catalog.columns(table)
     for pattern in patterns:
-        row = query_one(
-            """
-          SELECT COLUMN_NAME
-            FROM USER_TAB_COLUMNS
-           WHERE TABLE_NAME = :t
-             AND COLUMN_NAME LIKE :p
-           FETCH FIRST 1 ROWS ONLY
-        """,
-            {"t": table.upper(), "p": f"%{pattern.upper()}%"},
-        )
-        if row and row.get("COLUMN_NAME"):
-            return row["COLUMN_NAME"]
+        needle = pattern.upper()
+        for column in columns:
+            if needle in column:
+                return column
     return None
 
 
 def table_has_identity(table: str, column: str) -> bool:
     """Return ``True`` when ``table.column`` is an identity column."""
 
-    sql = """
-      SELECT COUNT(1) AS C
-        FROM USER_TAB_IDENTITY_COLS
-       WHERE TABLE_NAME = UPPER(:t)
-         AND COLUMN_NAME = UPPER(:c)
-    """
-    row = query_one(sql, {"t": table, "c": column})
-    return bool(row and row.get("C"))
+    return _catalog.is_identity(table, column)
+
+
+def find_sequence_like(prefix: str) -> Optional[str]:
+    """Return the first sequence named like ``<prefix>%SEQ``, if any."""
+
+    prefix = prefix.upper()
+
+    def compute() -> Optional[str]:
+        for name in _catalog.sequences():
+            if name.startswith(prefix) and name[len(prefix):].endswith("SEQ"):
+                return name
+        return None
+
+    return _catalog.derived(("sequence_like", prefix), compute)
 
 
 def find_sequence_for(table: str, column: str) -> Optional[str]:
-    """Heuristically discover a sequence that could populate ``table.column``."""
+    """Heuristically discover a sequence that could populate ``table.column``.
+
+    The answer is cached per table/column until the catalog is refreshed.
+    """
+
+    return _catalog.derived(("sequence_for", table.upper(), column.upper()), lambda: _guess_sequence(table, column))
+
 
+def _guess_sequence(table: str, column: str) -> Optional[str]:
     patterns = [
         f"{table}_SEQ",
         f"{table}_ID_SEQ",
@@ -202,38 +1152,31 @@ def find_sequence_for(table: str, column: str) -> Optional[str]:
         if upper not in seen:
             seen.append(upper)
 
+    sequences = _catalog.sequences()
     for candidate in seen:
-        row = query_one(
-            """
-          SELECT SEQUENCE_NAME
-            FROM USER_SEQUENCES
-           WHERE SEQUENCE_NAME = :name
-           FETCH FIRST 1 ROWS ONLY
-        """,
-            {"name": candidate},
-        )
-        if row and row.get("SEQUENCE_NAME"):
-            return row["SEQUENCE_NAME"]
+        if candidate in sequences:
+            return candidate
 
     for candidate in seen:
-        row = query_one(
-            """
-          SELECT SEQUENCE_NAME
-            FROM USER_SEQUENCES
-           WHERE SEQUENCE_NAME LIKE :pattern
-           FETCH FIRST 1 ROWS ONLY
-        """,
-            {"pattern": f"%{candidate}%"},
-        )
-        if row and row.get("SEQUENCE_NAME"):
-            return row["SEQUENCE_NAME"]
+        for name in sequences:
+            if candidate in name:
+                return name
 
     return None
 
 
+def next_id(table: str, pk: str) -> int:
+    """Next identifier for ``table.pk``; kept for callers of the old helper."""
+
+    from .ids import next_id as allocate  # ids imports this module
+
+    return allocate(table, pk)
+
+
 def next_pk_from_max(table: str, column: str) -> int:
-    """Compute ``MAX(column)+1`` for ``table`` as a numeric identifier."""
+    """Next identifier for ``table.column``; despite the name, no longer ``MAX+1``."""
+
+    return next_id(table, column)
+
 
-    sql = f"SELECT NVL(MAX({column}), 0) + 1 AS N FROM {table}"
-    row = query_one(sql)
-    return int(row["N"]) if row else 1
+load_schema_snapshot(Config().SCHEMA_SNAPSHOT)
@@ -3,30 +3,37 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional
 
-from .db import execute, query_all, query_one
+from src.utils.pagination import PER_PAGE, Page
 
-
-def _next_id() -> int:
-    row = query_one("SELECT NVL(MAX(ID_GENERO), 0) + 1 AS ID FROM GENERO")
-    return int(row["ID"]) if row else 1
+from .db import execute, query_all, query_one, query_page
+from .ids import next_id
+from .refcache import cached, invalidate
 
 
+@cached("GENERO")
 def listar() -> List[Dict[str, object]]:
     return query_all("SELECT * FROM GENERO ORDER BY ID_GENERO DESC")
 
 
+def listar_pagina(page: int, per_page: int = PER_PAGE, search: Optional[str] = None) -> Page:
+    where = "INSTR(LOWER(GENERO), :q) > 0" if search else ""
+    return query_page("GENERO", "*", "ID_GENERO DESC", page, per_page, where, {"q": search.lower()} if search else None)
+
+
 def obtener(id_genero: int) -> Optional[Dict[str, object]]:
     return query_one("SELECT * FROM GENERO WHERE ID_GENERO = :id", {"id": id_genero})
 
 
 def crear(data: Dict[str, object]) -> int:
     data = {**data}
-    data.setdefault("ID_GENERO", _next_id())
+    if data.get("ID_GENERO") is None:
+        data["ID_GENERO"] = next_id("GENERO", "ID_GENERO")
     sql = (
         "INSERT INTO GENERO (ID_GENERO, GENERO, LIBRO_ID_LIBRO) "
         "VALUES (:ID_GENERO, :GENERO, :LIBRO_ID_LIBRO)"
     )
     execute(sql, data)
+    invalidate("GENERO")
     return int(data["ID_GENERO"])
 
 
@@ -37,7 +44,9 @@ def actualizar(id_genero: int, data: Dict[str, object]) -> None:
     )
     payload = {**data, "ID_GENERO": id_genero}
     execute(sql, payload)
+    invalidate("GENERO")
 
 
 def eliminar(id_genero: int) -> None:
     execute("DELETE FROM GENERO WHERE ID_GENERO = :id", {"id": id_genero})
+    invalidate("GENERO")
@@ -4,12 +4,19 @@ from __future__ import annotations
 
 from typing import Dict, Iterable, List, Optional
 
-from .db import execute, next_id, query_all, query_one
+from src.utils.pagination import PER_PAGE, Page
 
+from .db import execute, execute_many, execute_returning, query_all, query_one, query_page, schema_catalog, transaction
+from .ids import next_id
 
-def _next_sequence(sequence: str) -> int:
-    row = query_one(f"SELECT {sequence}.NEXTVAL AS ID FROM dual")
-    return int(row["ID"]) if row else next_id("GRUPO_LECTURA", "ID_GRUPO")
+GRUPO_SEQUENCE = "GRUPO_LECT_SEQ"
+
+
+def _grupo_id_expr() -> str:
+    # La secuencia se usa dentro del INSERT para no pagar un SELECT NEXTVAL aparte
+    if GRUPO_SEQUENCE in schema_catalog().sequences():
+        return f"{GRUPO_SEQUENCE}.NEXTVAL"
+    return ":ID_GRUPO"
 
 
 def listar() -> List[Dict[str, object]]:
@@ -21,6 +28,12 @@ def listar() -> List[Dict[str, object]]:
     return query_all(sql)
 
 
+def listar_pagina(page: int, per_page: int = PER_PAGE) -> Page:
+    columns = "ID_GRUPO, NOMBRE, DESCRIPCION, FECHA_REUNION, HORA_REUNION, LUGAR, ID_LIBGRUP"
+    # ID_GRUPO breaks ties between groups meeting the same day
+    return query_page("GRUPO_LECTURA", columns, "FECHA_REUNION DESC, ID_GRUPO DESC", page, per_page)
+
+
 def obtener(id_grupo: int) -> Optional[Dict[str, object]]:
     sql = """
         SELECT ID_GRUPO, NOMBRE, DESCRIPCION, FECHA_REUNION, HORA_REUNION, LUGAR, ID_LIBGRUP
@@ -30,33 +43,41 @@ def obtener(id_grupo: int) -> Optional[Dict[str, object]]:
     return query_one(sql, {"ID": id_grupo})
 
 
-def _insert_libros(id_libgrup: int, lista_ids: Iterable[int]) -> None:
-    execute("DELETE FROM LIBRO_GRUPO WHERE ID_LIBGRUP = :ID", {"ID": id_libgrup})
-    for libro_id in lista_ids:
-        execute(
-            "INSERT INTO LIBRO_GRUPO (ID_LIBGRUP, ID_LIBRO) VALUES (:ID_LIBGRUP, :ID_LIBRO)",
-            {"ID_LIBGRUP": id_libgrup, "ID_LIBRO": int(libro_id)},
-        )
+def _insert_libros(id_libgrup: int, lista_ids: Iterable[int], replace: bool = True) -> None:
+    if replace:
+        execute("DELETE FROM LIBRO_GRUPO WHERE ID_LIBGRUP = :ID", {"ID": id_libgrup})
+    # dict.fromkeys: sin duplicados y conservando el orden
+    rows = [(id_libgrup, libro_id) for libro_id in dict.fromkeys(int(i) for i in lista_ids)]
+    errors = execute_many("INSERT INTO LIBRO_GRUPO (ID_LIBGRUP, ID_LIBRO) VALUES (:1, :2)", rows)
+    if errors:
+        rechazados = ", ".join(str(rows[e.offset][1]) for e in errors)
+        raise RuntimeError(f"No se pudieron asociar los libros: {rechazados} ({errors[0].message})")
 
 
 def crear(data: Dict[str, object], libros_ids: Iterable[int]) -> int:
     id_libgrup = next_id("LIBRO_GRUPO", "ID_LIBGRUP")
-    _insert_libros(id_libgrup, libros_ids)
-
-    grupo_id = _next_sequence("GRUPO_LECT_SEQ")
+    id_expr = _grupo_id_expr()
     payload = {
-        **data,
-        "ID_GRUPO": grupo_id,
+        "NOMBRE": data.get("NOMBRE"),
+        "DESCRIPCION": data.get("DESCRIPCION"),
+        "FECHA_REUNION": data.get("FECHA_REUNION"),
+        "HORA_REUNION": data.get("HORA_REUNION"),
+        "LUGAR": data.get("LUGAR"),
         "ID_LIBGRUP": id_libgrup,
     }
-    sql = """
+    if id_expr == ":ID_GRUPO":
+        payload["ID_GRUPO"] = next_id("GRUPO_LECTURA", "ID_GRUPO")
+    sql = f"""
         INSERT INTO GRUPO_LECTURA
           (ID_GRUPO, NOMBRE, DESCRIPCION, FECHA_REUNION, HORA_REUNION, LUGAR, ID_LIBGRUP)
         VALUES
-          (:ID_GRUPO, :NOMBRE, :DESCRIPCION, TO_DATE(:FECHA_REUNION,'YYYY-MM-DD'), :HORA_REUNION, :LUGAR, :ID_LIBGRUP)
+          ({id_expr}, :NOMBRE, :DESCRIPCION, TO_DATE(:FECHA_REUNION,'YYYY-MM-DD'), :HORA_REUNION, :LUGAR, :ID_LIBGRUP)
+        RETURNING ID_GRUPO INTO :NEW_ID
     """
-    execute(sql, payload)
-    return grupo_id
+    with transaction():
+        # ID_LIBGRUP es nuevo: no hay filas previas que borrar
+        _insert_libros(id_libgrup, libros_ids, replace=False)
+        return int(execute_returning(sql, payload))  # type: ignore[arg-type]
 
 
 def actualizar(id_grupo: int, data: Dict[str, object], libros_ids: Iterable[int]) -> None:
@@ -73,18 +94,20 @@ def actualizar(id_grupo: int, data: Dict[str, object], libros_ids: Iterable[int]
                LUGAR = :LUGAR
          WHERE ID_GRUPO = :ID_GRUPO
     """
-    execute(sql, payload)
+    with transaction():
+        execute(sql, payload)
 
-    grupo = obtener(id_grupo)
-    if grupo and grupo.get("ID_LIBGRUP") is not None:
-        _insert_libros(int(grupo["ID_LIBGRUP"]), libros_ids)
+        grupo = obtener(id_grupo)
+        if grupo and grupo.get("ID_LIBGRUP") is not None:
+            _insert_libros(int(grupo["ID_LIBGRUP"]), libros_ids)
 
 
 def eliminar(id_grupo: int) -> None:
-    grupo = obtener(id_grupo)
-    if grupo and grupo.get("ID_LIBGRUP") is not None:
-        execute("DELETE FROM LIBRO_GRUPO WHERE ID_LIBGRUP = :ID", {"ID": grupo["ID_LIBGRUP"]})
-    execute("DELETE FROM GRUPO_LECTURA WHERE ID_GRUPO = :ID", {"ID": id_grupo})
+    with transaction():
+        grupo = obtener(id_grupo)
+        if grupo and grupo.get("ID_LIBGRUP") is not None:
+            execute("DELETE FROM LIBRO_GRUPO WHERE ID_LIBGRUP = :ID", {"ID": grupo["ID_LIBGRUP"]})
+        execute("DELETE FROM GRUPO_LECTURA WHERE ID_GRUPO = :ID", {"ID": id_grupo})
 
 
 def listar_libros(id_grupo: int) -> List[Dict[str, object]]:
@@ -102,4 +125,5 @@ def listar_libros(id_grupo: int) -> List[Dict[str, object]]:
 
 
 def reemplazar_libros(id_libgrup: int, lista_ids: Iterable[int]) -> None:
-    _insert_libros(id_libgrup, lista_ids)
+    with transaction():
+        _insert_libros(id_libgrup, lista_ids)
@@ -1,68 +1,114 @@
 # src/models/historial_dao.py
-from .db import query_all, query_one, execute, first_existing_column
+from datetime import date, datetime, timedelta
+
+from src.utils.pagination import PER_PAGE, decode_cursor
+
+from .db import execute, query_all, query_keyset, query_one
+from .mapping import Field, TableMapping, compiled, register
 
 TABLE = "HISTORIAL"
 
-def _col(cands):
-    try:
-        return first_existing_column(TABLE, cands)
-    except Exception:
-        return None
+register(TableMapping(
+    table=TABLE,
+    pk=("ID_HISTORIAL", "ID"),
+    pk_alias="ID_HISTORIAL",
+    rowid_fallback=True,
+    sequence_like="HISTORIAL",  # PK con secuencia si existe
+    order_by="FECHA",
+    fields=(
+        Field(
+            "FECHA",
+            ("FECHA", "FECHA_MOVIMIENTO", "FEC_REGISTRO"),
+            by_type=(("DATE", "TO_DATE(:{name},'YYYY-MM-DD')"), ("TIMESTAMP(6)", "TO_DATE(:{name},'YYYY-MM-DD')")),
+        ),
+        Field("ACCION", ("ACCION", "MOVIMIENTO", "ACTIVIDAD")),
+        Field("ID_USUARIO", ("USUARIO_ID_USUARIO", "ID_USUARIO", "USUARIO_ID")),
+        Field("ID_LIBRO", ("LIBRO_ID_LIBRO", "ID_LIBRO", "LIBRO_ID")),
+    ),
+))
+
+
+def _values(data: dict) -> dict:
+    fecha = data.get("FECHA") or data.get("FECHA_EVENTO")
+    if isinstance(fecha, date):
+        fecha = fecha.strftime("%Y-%m-%d")  # the column template is TO_DATE(..., 'YYYY-MM-DD')
+    return {
+        "FECHA": fecha,
+        "ACCION": data.get("ACCION") or data.get("MOVIMIENTO"),
+        "ID_USUARIO": data.get("ID_USUARIO") or data.get("USUARIO_ID_USUARIO") or data.get("USUARIO_ID"),
+        "ID_LIBRO": data.get("ID_LIBRO") or data.get("LIBRO_ID_LIBRO") or data.get("LIBRO_ID"),
+    }
 
-def _pk():
-    try:
-        return first_existing_column(TABLE, ["ID_HISTORIAL", "ID"])
-    except Exception:
-        return "ROWID"
 
 def listar():
-    pk = _pk()
-    fec = _col(["FECHA", "FECHA_MOVIMIENTO", "FEC_REGISTRO"])
-    acc = _col(["ACCION", "MOVIMIENTO", "ACTIVIDAD"])
-    usr = _col(["USUARIO_ID_USUARIO", "ID_USUARIO", "USUARIO_ID"])
-    lib = _col(["LIBRO_ID_LIBRO", "ID_LIBRO", "LIBRO_ID"])
+    return query_all(compiled(TABLE).list_sql)
 
-    cols = [f"{pk} AS ID_HISTORIAL"]
-    if fec: cols.append(f"{fec} AS FECHA")
-    if acc: cols.append(f"{acc} AS ACCION")
-    if usr: cols.append(f"{usr} AS ID_USUARIO")
-    if lib: cols.append(f"{lib} AS ID_LIBRO")
 
-    sql = f"SELECT {', '.join(cols)} FROM {TABLE} ORDER BY {('FECHA' if fec else 'ID_HISTORIAL')} DESC"
-    return query_all(sql)
+def _keys(m):
+    # (FECHA, PK) newest first; the PK makes the key unique within a day
+    keys = [(m.pk, m.mapping.pk_alias)]
+    if m.has("FECHA"):
+        keys.insert(0, (m.column("FECHA"), "FECHA"))
+    return keys
 
-def crear(data: dict):
-    pk = _pk()
-    fec_col = _col(["FECHA", "FECHA_MOVIMIENTO", "FEC_REGISTRO"])
-    acc_col = _col(["ACCION", "MOVIMIENTO", "ACTIVIDAD"])
-    usr_col = _col(["USUARIO_ID_USUARIO", "ID_USUARIO", "USUARIO_ID"])
-    lib_col = _col(["LIBRO_ID_LIBRO", "ID_LIBRO", "LIBRO_ID"])
-
-    columns, values, binds = [], [], {}
-
-    # PK con secuencia si existe
-    seq = query_one(
-        "SELECT sequence_name FROM user_sequences "
-        "WHERE UPPER(sequence_name) LIKE 'HISTORIAL%SEQ' FETCH FIRST 1 ROWS ONLY"
+
+def _key_types(m, keys):
+    # What each key column fetches as; DATE comes back as datetime
+    pk_type = str if m.pk == "ROWID" else int
+    return tuple(date if alias == "FECHA" else pk_type for _, alias in keys)
+
+
+def listar_pagina(after=None, before=None, per_page=PER_PAGE, usuario=None, libro=None, desde=None, hasta=None):
+    """Keyset page of HISTORIAL filtered in SQL; ``after``/``before`` are cursor tokens.
+
+    With the indexes in scripts/sql/indexes.sql every page reads ``per_page + 1``
+    index entries however many years of history the table holds.  A malformed
+    cursor raises ``ValueError``.
+    """
+
+    m = compiled(TABLE)
+    keys = _keys(m)
+    types = _key_types(m, keys)
+    conditions, binds = [], {}
+    if usuario is not None and m.has("ID_USUARIO"):
+        conditions.append(f"{m.column('ID_USUARIO')} = :usuario")
+        binds["usuario"] = usuario
+    if libro is not None and m.has("ID_LIBRO"):
+        conditions.append(f"{m.column('ID_LIBRO')} = :libro")
+        binds["libro"] = libro
+    if m.has("FECHA"):
+        if desde is not None:
+            conditions.append(f"{m.column('FECHA')} >= :desde")
+            binds["desde"] = datetime.combine(desde, datetime.min.time()) if type(desde) is date else desde
+        if hasta is not None:
+            # inclusive day: everything before the following midnight
+            conditions.append(f"{m.column('FECHA')} < :hasta")
+            binds["hasta"] = datetime.combine(hasta, datetime.min.time()) + timedelta(days=1) if type(hasta) is date else hasta
+    return query_keyset(
+        TABLE,
+        m.list_columns,
+        keys,
+        per_page,
+        " AND ".join(conditions),
+        binds,
+        after=decode_cursor(after, types) if after else None,
+        before=decode_cursor(before, types) if before and not after else None,
     )
-    if pk.upper() != "ROWID":
-        columns.append(pk)
-        if seq:
-            values.append(f"{seq['SEQUENCE_NAME']}.NEXTVAL")
-        else:
-            new_id = (query_one(f"SELECT NVL(MAX({pk}),0)+1 ID FROM {TABLE}") or {"ID": 1})["ID"]
-            values.append(":_pk")
-            binds["_pk"] = new_id
-
-    def add(col, ph, val):
-        if not col:
-            return
-        columns.append(col); values.append(f":{ph}"); binds[ph] = val
-
-    add(fec_col, "fec", data.get("FECHA"))
-    add(acc_col, "acc", data.get("ACCION") or data.get("MOVIMIENTO"))
-    add(usr_col, "usr", data.get("ID_USUARIO") or data.get("USUARIO_ID_USUARIO"))
-    add(lib_col, "lib", data.get("ID_LIBRO") or data.get("LIBRO_ID_LIBRO"))
-
-    sql = f"INSERT INTO {TABLE} ({', '.join(columns)}) VALUES ({', '.join(values)})"
-    execute(sql, binds)
+
+
+def obtener(id_historial):
+    return query_one(compiled(TABLE).get_sql, {"ID": id_historial})
+
+
+def crear(data: dict):
+    return compiled(TABLE).insert(_values(data))
+
+
+def actualizar(id_historial, data: dict):
+    m = compiled(TABLE)
+    sql, names = m.update_sql()
+    execute(sql, m.binds({**_values(data), "ID": id_historial}, names))
+
+
+def eliminar(id_historial):
+    execute(compiled(TABLE).delete_sql, {"ID": id_historial})
@@ -3,14 +3,14 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional
 
-from .db import execute, query_all, query_one
+from src.utils.pagination import PER_PAGE, Page
 
-
-def _next_id() -> int:
-    row = query_one("SELECT NVL(MAX(ID_IDIOMA), 0) + 1 AS ID FROM IDIOMA")
-    return int(row["ID"]) if row else 1
+from .db import execute, query_all, query_one, query_page
+from .ids import next_id
+from .refcache import cached, invalidate
 
 
+@cached("IDIOMA")
 def listar() -> List[Dict[str, object]]:
     sql = """
         SELECT ID_IDIOMA, IDIOMA_LIBRO
@@ -20,6 +20,13 @@ def listar() -> List[Dict[str, object]]:
     return query_all(sql)
 
 
+def listar_pagina(page: int, per_page: int = PER_PAGE, search: Optional[str] = None) -> Page:
+    where = "INSTR(LOWER(IDIOMA_LIBRO), :q) > 0" if search else ""
+    return query_page(
+        "IDIOMA", "ID_IDIOMA, IDIOMA_LIBRO", "ID_IDIOMA DESC", page, per_page, where, {"q": search.lower()} if search else None
+    )
+
+
 def obtener(id_idioma: int) -> Optional[Dict[str, object]]:
     sql = """
         SELECT ID_IDIOMA, IDIOMA_LIBRO
@@ -31,12 +38,14 @@ def obtener(id_idioma: int) -> Optional[Dict[str, object]]:
 
 def crear(data: Dict[str, object]) -> int:
     data = {**data}
-    data.setdefault("ID_IDIOMA", _next_id())
+    if data.get("ID_IDIOMA") is None:
+        data["ID_IDIOMA"] = next_id("IDIOMA", "ID_IDIOMA")
     sql = """
         INSERT INTO IDIOMA (ID_IDIOMA, IDIOMA_LIBRO)
         VALUES (:ID_IDIOMA, :IDIOMA_LIBRO)
     """
     execute(sql, data)
+    invalidate("IDIOMA")
     return int(data["ID_IDIOMA"])
 
 
@@ -48,7 +57,9 @@ def actualizar(id_idioma: int, data: Dict[str, object]) -> None:
     """
     payload = {**data, "ID_IDIOMA": id_idioma}
     execute(sql, payload)
+    invalidate("IDIOMA")
 
 
 def eliminar(id_idioma: int) -> None:
     execute("DELETE FROM IDIOMA WHERE ID_IDIOMA = :id", {"id": id_idioma})
+    invalidate("IDIOMA")
@@ -0,0 +1,251 @@
+"""Primary-key allocation without a ``MAX(pk)+1`` scan per insert.
+
+Identifiers are handed out from per-table blocks kept in process memory, so
+most inserts need no extra round trip.  Blocks come from the first source that
+applies to the table:
+
+* a sequence found by :func:`~src.models.db.find_sequence_for` (a whole block is
+  fetched with one ``CONNECT BY`` query);
+* the ``ID_BLOCK`` hi/lo table (see ``scripts/sql/id_block.sql``), where each
+  reservation atomically bumps the table's ``NEXT_HI`` and owns
+  ``[hi * size, hi * size + size)``;
+* otherwise nothing: the insert fails with an error pointing at
+  ``id_block.sql``.  ``MAX(pk) + 1`` per call is only safe for a single writer,
+  so it has to be enabled explicitly with ``ID_ALLOW_MAX_FALLBACK``.
+
+``ID_BLOCK`` is created by :func:`ensure_hilo_table` at warm-up, or on the
+first insert that needs it, when the schema user may create tables; otherwise
+the failure is logged with a pointer to the script.
+
+Cached blocks and sources are dropped whenever the schema catalog is refreshed
+or invalidated, so a sequence or ``ID_BLOCK`` added later takes over.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Protocol, Tuple
+
+import oracledb
+
+from config import Config
+
+from .db import (
+    add_schema_hook,
+    find_sequence_for,
+    get_conn,
+    query_all,
+    query_one,
+    refresh_schema,
+    table_exists,
+)
+
+
+logger = logging.getLogger(__name__)
+
+HILO_TABLE = "ID_BLOCK"
+# Same table as scripts/sql/id_block.sql
+HILO_DDL = (
+    f"CREATE TABLE {HILO_TABLE} ("
+    "TABLE_NAME VARCHAR2(128) NOT NULL, "
+    "NEXT_HI NUMBER NOT NULL, "
+    f"CONSTRAINT {HILO_TABLE}_PK PRIMARY KEY (TABLE_NAME))"
+)
+# ORA-00955: name is already used by an existing object
+_ALREADY_EXISTS = 955
+
+
+def ensure_hilo_table() -> bool:
+    """Create ``ID_BLOCK`` if it is missing; ``False`` (after logging) if that fails."""
+
+    if table_exists(HILO_TABLE):
+        return True
+    try:
+        # Own connection: DDL commits, and must not commit a caller's transaction.
+        with get_conn(shared=False) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(HILO_DDL)
+    except Exception as exc:  # noqa: BLE001 - logged, the caller decides what to do
+        error = exc.args[0] if isinstance(exc, oracledb.Error) and exc.args else None
+        if getattr(error, "code", None) != _ALREADY_EXISTS:
+            logger.error(
+                "Could not create %s (%s); tables without a sequence get no IDs until "
+                "scripts/sql/id_block.sql is run",
+                HILO_TABLE,
+                exc,
+            )
+            return False
+    logger.info("Created %s for hi/lo key allocation", HILO_TABLE)
+    refresh_schema()
+    return True
+
+
+class IdSource(Protocol):
+    """Reserves a batch of fresh identifiers for ``table.pk``."""
+
+    def reserve(self, table: str, pk: str, size: int) -> List[int]:
+        ...
+
+
+class SequenceSource:
+    def __init__(self, sequence: str) -> None:
+        self.sequence = sequence
+
+    def reserve(self, table: str, pk: str, size: int) -> List[int]:
+        rows = query_all(
+            f"SELECT {self.sequence}.NEXTVAL AS ID FROM dual CONNECT BY LEVEL <= :n",
+            {"n": size},
+        )
+        return [int(row["ID"]) for row in rows]
+
+
+class HiLoSource:
+    def reserve(self, table: str, pk: str, size: int) -> List[int]:
+        # Own connection: the block must stay reserved even if the caller rolls back.
+        with get_conn(shared=False) as conn:
+            with conn.cursor() as cursor:
+                hi = cursor.var(int)
+                for _ in range(2):
+                    cursor.execute(
+                        f"UPDATE {HILO_TABLE} SET NEXT_HI = NEXT_HI + 1 "
+                        "WHERE TABLE_NAME = :t RETURNING NEXT_HI INTO :hi",
+                        {"t": table, "hi": hi},
+                    )
+                    if cursor.rowcount:
+                        break
+                    try:
+                        # First reservation for this table: start above the current MAX.
+                        cursor.execute(
+                            f"INSERT INTO {HILO_TABLE} (TABLE_NAME, NEXT_HI) "
+                            f"SELECT :t, FLOOR(NVL(MAX({pk}), 0) / :size) + 1 FROM {table}",
+                            {"t": table, "size": size},
+                        )
+                    except oracledb.IntegrityError:
+                        pass  # another process seeded it first
+                else:
+                    raise RuntimeError(f"No se pudo reservar un bloque de IDs para {table}")
+            conn.commit()
+        block = (int(hi.getvalue()[0]) - 1) * size
+        return list(range(block, block + size))
+
+
+class MaxSource:
+    """``MAX(pk) + 1``; duplicates are possible with more than one writer process."""
+
+    def __init__(self) -> None:
+        self._warned: set = set()
+
+    def reserve(self, table: str, pk: str, size: int) -> List[int]:
+        if table not in self._warned:
+            self._warned.add(table)
+            logger.warning(
+                "%s.%s has no sequence and %s does not exist; falling back to MAX+1", table, pk, HILO_TABLE
+            )
+        row = query_one(f"SELECT NVL(MAX({pk}), 0) + 1 AS ID FROM {table}")
+        return [int(row["ID"]) if row else 1]
+
+
+class IdAllocator:
+    """Hands out identifiers from per-table blocks reserved by an :class:`IdSource`."""
+
+    def __init__(self, block_size: int = 50, allow_max: bool = False) -> None:
+        self.block_size = max(1, block_size)
+        self.allow_max = allow_max
+        self._lock = threading.Lock()
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._blocks: Dict[Tuple[str, str], Deque[int]] = {}
+        self._sources: Dict[Tuple[str, str], IdSource] = {}
+        self._max_source = MaxSource()
+        self._hilo_failed = False
+
+    def register(self, table: str, pk: str, source: IdSource) -> None:
+        """Force ``source`` for ``table.pk`` instead of auto-detecting one."""
+
+        key = (table.upper(), pk.upper())
+        with self._lock:
+            self._sources[key] = source
+            self._blocks.pop(key, None)
+
+    def source_for(self, table: str, pk: str) -> IdSource:
+        key = (table.upper(), pk.upper())
+        source = self._sources.get(key)
+        if source is None:
+            sequence = find_sequence_for(table, pk)
+            if sequence:
+                source = SequenceSource(sequence)
+            elif self._hilo_ready():
+                source = HiLoSource()
+            elif self.allow_max:
+                source = self._max_source
+            else:
+                raise RuntimeError(
+                    f"{table}.{pk} no tiene secuencia y no existe la tabla {HILO_TABLE}; "
+                    "ejecute scripts/sql/id_block.sql (o defina ID_ALLOW_MAX_FALLBACK=1 "
+                    "si hay un único proceso escribiendo)."
+                )
+            self._sources[key] = source
+        return source
+
+    def _hilo_ready(self) -> bool:
+        # One creation attempt until the next reset(), not one per insert
+        if table_exists(HILO_TABLE):
+            return True
+        if self._hilo_failed:
+            return False
+        self._hilo_failed = not ensure_hilo_table()
+        return not self._hilo_failed
+
+    def next_id(self, table: str, pk: str) -> int:
+        key = (table.upper(), pk.upper())
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            block = self._blocks.get(key)
+            if not block:
+                block = deque(self.source_for(*key).reserve(key[0], key[1], self.block_size))
+                self._blocks[key] = block
+            return block.popleft()
+
+    def reset(self, table: Optional[str] = None) -> None:
+        """Discard cached blocks and sources (all tables, or just ``table``)."""
+
+        with self._lock:
+            self._hilo_failed = False
+            if table is None:
+                self._blocks.clear()
+                self._sources.clear()
+                return
+            for key in [k for k in self._blocks if k[0] == table.upper()]:
+                self._blocks.pop(key, None)
+            for key in [k for k in self._sources if k[0] == table.upper()]:
+                self._sources.pop(key, None)
+
+
+_allocator = IdAllocator(Config().ID_BLOCK_SIZE, Config().ID_ALLOW_MAX_FALLBACK)
+
+
+def allocator() -> IdAllocator:
+    return _allocator
+
+
+def set_allocator(new_allocator: IdAllocator) -> None:
+    """Replace the process-wide allocator (e.g. with a custom source set)."""
+
+    global _allocator
+    _allocator = new_allocator
+
+
+def next_id(table: str, pk: str) -> int:
+    """Return a fresh identifier for ``table.pk``."""
+
+    return _allocator.next_id(table, pk)
+
+
+def reset(table: Optional[str] = None) -> None:
+    """Discard the process-wide allocator's cached blocks and sources."""
+
+    _allocator.reset(table)
+
+
+add_schema_hook(reset)
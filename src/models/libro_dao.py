@@ -2,119 +2,157 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+import logging
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .db import execute, first_existing_column, query_all, query_one
+from src.utils.pagination import PER_PAGE, Page
+from src.utils.text import fold, like_escape, sql_fold
 
+from . import editorial_dao
+from .db import execute, query_all, query_iter, query_one
+from .mapping import CompiledMapping, Field, TableMapping, compiled, register
 
-def _pub_col() -> str:
-    return first_existing_column(
-        "LIBRO",
-        ["FECHA_PUBLICACION", "ANO_PUBL", "ANIO_PUBLICACION", "ANO_PUBLICACION"],
+TABLE = "LIBRO"
+
+logger = logging.getLogger(__name__)
+_listeners: List[Callable[[str, int], None]] = []
+
+register(
+    TableMapping(
+        table=TABLE,
+        pk=("ID_LIBRO",),
+        pk_alias="ID_LIBRO",
+        fields=(
+            Field("TITULO", ("TITULO",), required=True),
+            Field("SUBTITULO", ("SUBTITULO",), required=True, listed=False),
+            Field("ISBN", ("ISBN",), required=True),
+            Field(
+                "FECHA_PUBLICACION",
+                ("FECHA_PUBLICACION", "ANO_PUBL", "ANIO_PUBLICACION", "ANO_PUBLICACION"),
+                required=True,
+                insert="TO_DATE(:{name},'YYYY-MM-DD')",
+                update="TO_DATE(:{name},'YYYY-MM-DD')",
+            ),
+            Field("NUM_COPIAS", ("NUM_COPIAS",), required=True, listed=False),
+            Field("NUM_PAGINAS", ("NUM_PAGINAS",), required=True, listed=False),
+            Field("FECHA_REGISTRO", ("FECHA_REGISTRO",), required=True, insert="SYSDATE", update=None),
+            Field("DESCRIPCION", ("DESCRIPCION",), required=True, listed=False),
+            Field("CLASIFICACION", ("CLASIFICACION",), required=True),
+            Field("PERTENECE_GRUPO", ("PERTENECE_GRUPO",), required=True, listed=False),
+            Field("ESTADO_FISICO", ("ESTADO_FISICO",), required=True),
+            Field("EDITORIAL_ID", ("ID_VAREDIT", "NUM_EDITORIAL", "ID_EDITORIAL"), required=True),
+            Field("ID_GENERO", ("ID_GENERO",), required=True),
+            Field("ID_IDIOMA", ("ID_IDIOMA",), required=True),
+        ),
     )
+)
 
 
-def _editorial_fk() -> str:
-    return first_existing_column("LIBRO", ["ID_VAREDIT", "NUM_EDITORIAL", "ID_EDITORIAL"])
+def listar() -> List[Dict[str, object]]:
+    return query_all(compiled(TABLE).list_sql)
 
 
-def _editorial_pk() -> str:
-    return first_existing_column("EDITORIAL", ["ID_EDITORIAL", "ID_VAREDIT", "NUM_EDITORIAL"])
+SEARCH_PREFIX = "prefix"
+SEARCH_CONTAINS = "contains"
 
 
-def listar() -> List[Dict[str, object]]:
-    pub = _pub_col()
-    edit_fk = _editorial_fk()
-    sql = f"""
-    SELECT ID_LIBRO,
-           TITULO,
-           ISBN,
-           {pub} AS FECHA_PUBLICACION,
-           CLASIFICACION,
-           ESTADO_FISICO,
-           FECHA_REGISTRO,
-           {edit_fk} AS EDITORIAL_ID,
-           ID_GENERO,
-           ID_IDIOMA
-      FROM LIBRO
-     ORDER BY ID_LIBRO DESC
+def _isbn_sql(column: str) -> str:
+    return f"REPLACE(REPLACE({column}, '-', ''), ' ', '')"
+
+
+def search_filter(m: CompiledMapping, search: str, mode: str = SEARCH_CONTAINS) -> Tuple[str, Dict[str, object]]:
+    """Case- and accent-insensitive predicate over TITULO, SUBTITULO and ISBN.
+
+    ``prefix`` mode is a ``LIKE 'term%'`` that can range-scan the
+    function-based indexes in scripts/sql/indexes.sql; ``contains`` matches
+    anywhere and has to read every index entry instead.  ISBN ignores dashes
+    and spaces on both sides.
     """
-    return query_all(sql)
+
+    term = fold(search.strip())
+    isbn = term.replace("-", "").replace(" ", "")
+    prefix = mode == SEARCH_PREFIX
+    exprs = [sql_fold(m.column(name)) for name in ("TITULO", "SUBTITULO") if m.has(name)]
+    terms: List[str] = []
+    binds: Dict[str, object] = {}
+    if prefix:
+        terms += [f"{expr} LIKE :q ESCAPE '\\'" for expr in exprs]
+        binds["q"] = like_escape(term) + "%"
+    else:
+        terms += [f"INSTR({expr}, :q) > 0" for expr in exprs]
+        binds["q"] = term
+    if m.has("ISBN") and isbn:
+        if prefix:
+            terms.append(f"{_isbn_sql(m.column('ISBN'))} LIKE :isbn ESCAPE '\\'")
+            binds["isbn"] = like_escape(isbn) + "%"
+        else:
+            terms.append(f"INSTR({_isbn_sql(m.column('ISBN'))}, :isbn) > 0")
+            binds["isbn"] = isbn
+    return " OR ".join(terms), binds
+
+
+def listar_pagina(
+    page: int,
+    per_page: int = PER_PAGE,
+    search: Optional[str] = None,
+    mode: str = SEARCH_CONTAINS,
+) -> Page:
+    m = compiled(TABLE)
+    if search and search.strip():
+        where, binds = search_filter(m, search, mode)
+        return m.page(page, per_page, where=where, binds=binds)
+    return m.page(page, per_page)
+
+
+def add_listener(listener: Callable[[str, int], None]) -> None:
+    """Call ``listener(event, id_libro)`` after ``crear``/``actualizar``/``eliminar``."""
+
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[str, int], None]) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def _notify(event: str, id_libro: Optional[int]) -> None:
+    if id_libro is None:
+        return
+    for listener in list(_listeners):
+        try:
+            listener(event, id_libro)
+        except Exception as exc:  # noqa: BLE001 - the write already succeeded
+            logger.warning("Listener de libros falló (%s %s): %s", event, id_libro, exc)
 
 
 def obtener(id_libro: int) -> Optional[Dict[str, object]]:
-    pub = _pub_col()
-    edit_fk = _editorial_fk()
-    sql = f"""
-    SELECT ID_LIBRO,
-           TITULO,
-           SUBTITULO,
-           ISBN,
-           {pub} AS FECHA_PUBLICACION,
-           NUM_COPIAS,
-           NUM_PAGINAS,
-           DESCRIPCION,
-           CLASIFICACION,
-           PERTENECE_GRUPO,
-           ESTADO_FISICO,
-           {edit_fk} AS EDITORIAL_ID,
-           ID_GENERO,
-           ID_IDIOMA
-      FROM LIBRO
-     WHERE ID_LIBRO = :ID
-    """
-    return query_one(sql, {"ID": id_libro})
-
-
-def crear(data: Dict[str, object]) -> None:
-    pub = _pub_col()
-    edit_fk = _editorial_fk()
-    sql = f"""
-    INSERT INTO LIBRO
-      (ID_LIBRO, TITULO, SUBTITULO, ISBN, {pub}, NUM_COPIAS, NUM_PAGINAS,
-       FECHA_REGISTRO, DESCRIPCION, CLASIFICACION, PERTENECE_GRUPO, ESTADO_FISICO,
-       {edit_fk}, ID_GENERO, ID_IDIOMA)
-    VALUES
-      ((SELECT NVL(MAX(ID_LIBRO),0)+1 FROM LIBRO),
-       :TITULO, :SUBTITULO, :ISBN, TO_DATE(:FECHA_PUBLICACION,'YYYY-MM-DD'),
-       :NUM_COPIAS, :NUM_PAGINAS, SYSDATE, :DESCRIPCION, :CLASIFICACION,
-       :PERTENECE_GRUPO, :ESTADO_FISICO, :EDITORIAL_ID, :ID_GENERO, :ID_IDIOMA)
-    """
-    execute(sql, data)
+    return query_one(compiled(TABLE).get_sql, {"ID": id_libro})
+
+
+def crear(data: Dict[str, object]) -> int:
+    new_id = compiled(TABLE).insert(data)
+    _notify("crear", new_id)
+    return new_id  # type: ignore[return-value]
 
 
 def actualizar(id_libro: int, data: Dict[str, object]) -> None:
-    pub = _pub_col()
-    edit_fk = _editorial_fk()
-    sql = f"""
-    UPDATE LIBRO
-       SET TITULO = :TITULO,
-           SUBTITULO = :SUBTITULO,
-           ISBN = :ISBN,
-           {pub} = TO_DATE(:FECHA_PUBLICACION,'YYYY-MM-DD'),
-           NUM_COPIAS = :NUM_COPIAS,
-           NUM_PAGINAS = :NUM_PAGINAS,
-           DESCRIPCION = :DESCRIPCION,
-           CLASIFICACION = :CLASIFICACION,
-           PERTENECE_GRUPO = :PERTENECE_GRUPO,
-           ESTADO_FISICO = :ESTADO_FISICO,
-           {edit_fk} = :EDITORIAL_ID,
-           ID_GENERO = :ID_GENERO,
-           ID_IDIOMA = :ID_IDIOMA
-     WHERE ID_LIBRO = :ID
-    """
-    execute(sql, dict(data, ID=id_libro))
+    m = compiled(TABLE)
+    sql, names = m.update_sql()
+    execute(sql, m.binds(dict(data, ID=id_libro), names))
+    _notify("actualizar", id_libro)
 
 
 def eliminar(id_libro: int) -> None:
-    execute("DELETE FROM LIBRO WHERE ID_LIBRO = :ID", {"ID": id_libro})
+    execute(compiled(TABLE).delete_sql, {"ID": id_libro})
+    _notify("eliminar", id_libro)
 
 
-def reporte() -> List[Dict[str, object]]:
-    pub = _pub_col()
-    edit_fk = _editorial_fk()
-    ed_pk = _editorial_pk()
-    sql = f"""
+def _reporte_sql(m: CompiledMapping) -> str:
+    pub = m.column("FECHA_PUBLICACION")
+    edit_fk = m.column("EDITORIAL_ID")
+    ed_pk = compiled(editorial_dao.TABLE).pk
+    return f"""
     SELECT
         l.ID_LIBRO,
         l.TITULO,
@@ -135,4 +173,84 @@ def reporte() -> List[Dict[str, object]]:
       LEFT JOIN IDIOMA i ON i.ID_IDIOMA = l.ID_IDIOMA
      ORDER BY l.ID_LIBRO DESC
     """
-    return query_all(sql)
+
+
+def reporte() -> List[Dict[str, object]]:
+    return query_all(compiled(TABLE).sql("reporte", _reporte_sql))
+
+
+def iter_reporte() -> Iterator[Dict[str, object]]:
+    """Same rows as :func:`reporte`, fetched lazily in batches."""
+
+    return query_iter(compiled(TABLE).sql("reporte", _reporte_sql))
+
+
+def _busqueda_sql(m: CompiledMapping) -> str:
+    # Searchable text per book: the reporte joins plus the long text columns
+    edit_fk = m.column("EDITORIAL_ID")
+    ed_pk = compiled(editorial_dao.TABLE).pk
+    optional = "".join(
+        f"l.{m.column(name)} AS {name}, " if m.has(name) else f"NULL AS {name}, "
+        for name in ("SUBTITULO", "DESCRIPCION")
+    )
+    return f"""
+    SELECT
+        l.ID_LIBRO,
+        l.TITULO,
+        {optional}l.ISBN,
+        e.NOMBRE AS EDITORIAL,
+        g.GENERO AS GENERO
+      FROM LIBRO l
+      LEFT JOIN EDITORIAL e ON e.{ed_pk} = l.{edit_fk}
+      LEFT JOIN GENERO g ON g.ID_GENERO = l.ID_GENERO
+    """
+
+
+def iter_busqueda(id_libro: Optional[int] = None) -> Iterator[Dict[str, object]]:
+    """Stream the searchable fields of every book (or just ``id_libro``)."""
+
+    base = compiled(TABLE).sql("busqueda", _busqueda_sql)
+    if id_libro is None:
+        return query_iter(base)
+    return query_iter(base + " WHERE l.ID_LIBRO = :ID", {"ID": id_libro})
+
+
+def ultimo_cambio() -> int:
+    """Highest ``ORA_ROWSCN`` in LIBRO: the watermark for :func:`cambios_desde`."""
+
+    row = query_one(f"SELECT NVL(MAX(ORA_ROWSCN), 0) AS SCN FROM {TABLE}")
+    return int(row["SCN"]) if row else 0
+
+
+def cambios_desde(scn: int) -> List[Tuple[int, int]]:
+    """``(ID_LIBRO, ORA_ROWSCN)`` of books changed after ``scn``.
+
+    Without ``ROWDEPENDENCIES`` the SCN is tracked per block, so this may
+    also return untouched neighbours of a changed row; deletions are not seen.
+    """
+
+    m = compiled(TABLE)
+    rows = query_all(f"SELECT {m.pk} AS ID_LIBRO, ORA_ROWSCN AS SCN FROM {TABLE} WHERE ORA_ROWSCN > :scn", {"scn": scn})
+    return [(int(row["ID_LIBRO"]), int(row["SCN"])) for row in rows]
+
+
+def iter_sugerencias(id_libro: Optional[int] = None) -> Iterator[Dict[str, object]]:
+    """Stream ID_LIBRO, TITULO and ISBN for the typeahead index (or just ``id_libro``)."""
+
+    m = compiled(TABLE)
+    sql = f"SELECT {m.pk} AS ID_LIBRO, {m.column('TITULO')} AS TITULO, {m.column('ISBN')} AS ISBN FROM {TABLE}"
+    if id_libro is None:
+        return query_iter(sql)
+    return query_iter(sql + f" WHERE {m.pk} = :ID", {"ID": id_libro})
+
+
+def listar_por_ids(ids: Iterable[int]) -> List[Dict[str, object]]:
+    """Books for ``ids`` with their editorial and genero names, in the given order."""
+
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return []
+    binds = {f"id{pos}": value for pos, value in enumerate(ids)}
+    sql = compiled(TABLE).sql("busqueda", _busqueda_sql) + " WHERE l.ID_LIBRO IN (" + ", ".join(f":{name}" for name in binds) + ")"
+    rows = {row["ID_LIBRO"]: row for row in query_all(sql, binds)}
+    return [rows[value] for value in ids if value in rows]
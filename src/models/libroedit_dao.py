@@ -4,49 +4,79 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional
 
-import oracledb
+from src.utils.pagination import PER_PAGE, Page
 
-from .db import first_existing_column, query_all, query_one, execute
+from .db import execute, query_all, query_one, transaction
+from .mapping import CompiledMapping, Field, TableMapping, compiled, register
 
 TABLE_CHILD = "EDIT_LIB"
 TABLE_PARENT = "LIBRO_EDIT"
 
-
-def _find_sequence_like(prefix: str) -> Optional[str]:
-    row = query_one(
-        "SELECT sequence_name FROM user_sequences "
-        "WHERE UPPER(sequence_name) LIKE :p FETCH FIRST 1 ROWS ONLY",
-        {"p": f"{prefix.upper()}%SEQ"},
+register(
+    TableMapping(
+        table=TABLE_CHILD,
+        pk=("ID_EDIT_LIB", "ID_LIBRO_EDIT", "ID_EDIT", "ID"),
+        pk_alias="ID",
+        # fallback seguro cuando no se identifica PK numérica
+        rowid_fallback=True,
+        sequence_like=TABLE_CHILD,
+        fields=(
+            Field("LIBRO_EDIT_ID", ("LIBRO_EDIT_ID", "ID_LIBRO_EDIT", "LIBRO_EDIT")),
+            Field("LIBRO_ID", ("LIBRO_ID_LIBRO", "ID_LIBRO", "LIBRO_ID")),
+            Field("EDITORIAL_ID", ("ID_VAREDIT", "EDITORIAL_ID", "ID_EDITORIAL")),
+            Field(
+                "FECHA",
+                ("FECHA", "FECHA_EDICION", "FEC_EDI"),
+                insert="TO_DATE(:{name}, 'YYYY-MM-DD')",
+                update="TO_DATE(:{name}, 'YYYY-MM-DD')",
+            ),
+        ),
     )
-    return row["SEQUENCE_NAME"] if row else None
-
+)
+
+register(
+    TableMapping(
+        table=TABLE_PARENT,
+        pk=("ID_VAREDIT",),
+        pk_alias="ID",
+        sequence_like=TABLE_PARENT,
+        fields=(
+            Field("LIBRO_ID", ("LIBRO_ID_LIBRO",), required=True),
+            Field("EDITORIAL_ID", ("EDITORIAL_ID",), required=True),
+            Field(
+                "FECHA",
+                ("FECHA_EDICION",),
+                required=True,
+                insert="TO_DATE(:{name},'YYYY-MM-DD')",
+                update="TO_DATE(:{name},'YYYY-MM-DD')",
+            ),
+        ),
+    )
+)
 
-def _pk(table: str = TABLE_CHILD) -> str:
-    try:
-        return first_existing_column(table, ["ID_EDIT_LIB", "ID_LIBRO_EDIT", "ID_EDIT", "ID"])
-    except Exception:
-        # fallback seguro cuando no se identifica PK numérica
-        return "ROWID"
 
+def _find_parent_sql(with_fecha: bool):
+    def build(m: CompiledMapping) -> str:
+        conditions = [f"{m.column('LIBRO_ID')} = :lib", f"{m.column('EDITORIAL_ID')} = :edi"]
+        if with_fecha:
+            conditions.append(f"TRUNC({m.column('FECHA')}) = TRUNC(TO_DATE(:fec,'YYYY-MM-DD'))")
+        return (
+            f"SELECT {m.pk} AS ID FROM {m.table} WHERE "
+            + " AND ".join(conditions)
+            + " FETCH FIRST 1 ROWS ONLY"
+        )
 
-def _child_col(candidates: List[str]) -> Optional[str]:
-    try:
-        return first_existing_column(TABLE_CHILD, candidates)
-    except Exception:
-        return None
+    return build
 
 
 def _find_parent(libro_id: int, editorial_id: int, fecha_iso: Optional[str]) -> Optional[object]:
-    conditions = ["LIBRO_ID_LIBRO = :lib", "EDITORIAL_ID = :edi"]
+    m = compiled(TABLE_PARENT)
     payload: Dict[str, object] = {"lib": libro_id, "edi": editorial_id}
     if fecha_iso:
-        conditions.append("TRUNC(FECHA_EDICION) = TRUNC(TO_DATE(:fec,'YYYY-MM-DD'))")
+        sql = m.sql("find_parent_fecha", _find_parent_sql(True))
         payload["fec"] = fecha_iso
-    sql = (
-        "SELECT ID_VAREDIT AS ID FROM LIBRO_EDIT WHERE "
-        + " AND ".join(conditions)
-        + " FETCH FIRST 1 ROWS ONLY"
-    )
+    else:
+        sql = m.sql("find_parent", _find_parent_sql(False))
     row = query_one(sql, payload)
     return row["ID"] if row else None
 
@@ -56,63 +86,29 @@ def _ensure_parent(libro_id: int, editorial_id: int, fecha_iso: Optional[str]) -
     if existing is not None:
         return existing
 
-    seq = _find_sequence_like("LIBRO_EDIT")
-    columns = ["LIBRO_ID_LIBRO", "EDITORIAL_ID"]
-    values = [":lib", ":edi"]
-    payload: Dict[str, object] = {"lib": libro_id, "edi": editorial_id}
+    names = ("LIBRO_ID", "EDITORIAL_ID", "FECHA") if fecha_iso else ("LIBRO_ID", "EDITORIAL_ID")
+    new_id = compiled(TABLE_PARENT).insert(
+        {"LIBRO_ID": libro_id, "EDITORIAL_ID": editorial_id, "FECHA": fecha_iso}, names
+    )
+    if new_id is None:
+        raise RuntimeError("No se pudo obtener ID de LIBRO_EDIT tras insert.")
+    return new_id
 
-    if fecha_iso:
-        columns.append("FECHA_EDICION")
-        values.append("TO_DATE(:fec,'YYYY-MM-DD')")
-        payload["fec"] = fecha_iso
 
-    if seq:
-        columns.insert(0, "ID_VAREDIT")
-        values.insert(0, f"{seq}.NEXTVAL")
-        sql = f"INSERT INTO {TABLE_PARENT} ({', '.join(columns)}) VALUES ({', '.join(values)})"
-        execute(sql, payload)
-    else:
-        new_id = (query_one(f"SELECT NVL(MAX(ID_VAREDIT),0)+1 ID FROM {TABLE_PARENT}") or {"ID": 1})["ID"]
-        columns.insert(0, "ID_VAREDIT")
-        values.insert(0, ":id")
-        payload["id"] = new_id
-        sql = f"INSERT INTO {TABLE_PARENT} ({', '.join(columns)}) VALUES ({', '.join(values)})"
-        execute(sql, payload)
+def listar() -> List[Dict[str, object]]:
+    return query_all(compiled(TABLE_CHILD).list_sql)
 
-    try:
-        return _find_parent(libro_id, editorial_id, fecha_iso)
-    except Exception as exc:
-        raise RuntimeError("No se pudo obtener ID de LIBRO_EDIT tras insert/select.") from exc
 
+def listar_pagina(page: int, per_page: int = PER_PAGE) -> Page:
+    return compiled(TABLE_CHILD).page(page, per_page)
 
-def listar() -> List[Dict[str, object]]:
-    table = TABLE_CHILD
-    pk = _pk(table)
-    libro_edit_fk = _child_col(["LIBRO_EDIT_ID", "ID_LIBRO_EDIT", "LIBRO_EDIT"])
-    libro_fk = _child_col(["LIBRO_ID_LIBRO", "ID_LIBRO", "LIBRO_ID"])
-    editorial_fk = _child_col(["ID_VAREDIT", "EDITORIAL_ID", "ID_EDITORIAL"])
-    fecha_col = _child_col(["FECHA", "FECHA_EDICION", "FEC_EDI"])
-
-    select_parts = [f"{pk} AS ID"]
-    if libro_edit_fk:
-        select_parts.append(f"{libro_edit_fk} AS LIBRO_EDIT_ID")
-    if libro_fk:
-        select_parts.append(f"{libro_fk} AS LIBRO_ID")
-    if editorial_fk:
-        select_parts.append(f"{editorial_fk} AS EDITORIAL_ID")
-    if fecha_col:
-        select_parts.append(f"{fecha_col} AS FECHA")
-
-    sql = f"SELECT {', '.join(select_parts)} FROM {table} ORDER BY {pk} DESC"
-    return query_all(sql)
-
-
-def crear(data: Dict[str, object]) -> None:
-    table = TABLE_CHILD
-    libro_edit_fk = _child_col(["LIBRO_EDIT_ID", "ID_LIBRO_EDIT", "LIBRO_EDIT"])
-    libro_fk = _child_col(["LIBRO_ID_LIBRO", "ID_LIBRO", "LIBRO_ID"])
-    editorial_fk = _child_col(["ID_VAREDIT", "EDITORIAL_ID", "ID_EDITORIAL"])
-    fecha_col = _child_col(["FECHA", "FECHA_EDICION", "FEC_EDI"])
+
+def obtener(id_edit_lib: int) -> Optional[Dict[str, object]]:
+    return query_one(compiled(TABLE_CHILD).get_sql, {"ID": id_edit_lib})
+
+
+def _values(m: CompiledMapping, data: Dict[str, object]) -> Dict[str, object]:
+    """Normalise the form payload and resolve the LIBRO_EDIT parent if needed."""
 
     libro_raw = data.get("LIBRO_ID") or data.get("ID_LIBRO")
     editorial_raw = (
@@ -134,72 +130,36 @@ def crear(data: Dict[str, object]) -> None:
     else:
         editorial_id = int(editorial_raw)
 
-    if libro_edit_fk:
+    if m.has("LIBRO_EDIT_ID"):
         if editorial_id is None:
             raise ValueError(
                 "EDITORIAL_ID requerido (ID_VAREDIT/ID_EDITORIAL/etc) para LIBRO_EDIT."
             )
-        parent_id = _ensure_parent(libro_id, editorial_id, fecha_iso)
-
-        columns: List[str] = []
-        values: List[str] = []
-        payload: Dict[str, object] = {}
-
-        pk = _pk(table)
-        if pk != "ROWID":
-            sequence = _find_sequence_like(table)
-            if sequence:
-                columns.append(pk)
-                values.append(f"{sequence}.NEXTVAL")
-            else:
-                new_id = (query_one(f"SELECT NVL(MAX({pk}),0)+1 ID FROM {table}") or {"ID": 1})["ID"]
-                columns.append(pk)
-                values.append(":pk")
-                payload["pk"] = new_id
-
-        columns.append(libro_edit_fk)
-        values.append(":parent")
-        payload["parent"] = parent_id
-
-        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(values)})"
-        execute(sql, payload)
-        return
-
-    columns = []
-    values = []
-    payload: Dict[str, object] = {}
-
-    pk = _pk(table)
-    if pk != "ROWID":
-        sequence = _find_sequence_like(table)
-        if sequence:
-            columns.append(pk)
-            values.append(f"{sequence}.NEXTVAL")
-        else:
-            new_id = (query_one(f"SELECT NVL(MAX({pk}),0)+1 ID FROM {table}") or {"ID": 1})["ID"]
-            columns.append(pk)
-            values.append(":pk")
-            payload["pk"] = new_id
-
-    if libro_fk:
-        columns.append(libro_fk)
-        values.append(":libro")
-        payload["libro"] = libro_id
-
-    if editorial_fk:
-        if editorial_id is None:
-            raise ValueError("EDITORIAL_ID requerido para EDIT_LIB.")
-        columns.append(editorial_fk)
-        values.append(":editorial")
-        payload["editorial"] = editorial_id
+        return {"LIBRO_EDIT_ID": _ensure_parent(libro_id, editorial_id, fecha_iso)}
+
+    if m.has("EDITORIAL_ID") and editorial_id is None:
+        raise ValueError("EDITORIAL_ID requerido para EDIT_LIB.")
+    return {"LIBRO_ID": libro_id, "EDITORIAL_ID": editorial_id, "FECHA": fecha_iso}
+
+
+def _written(m: CompiledMapping) -> Optional[tuple]:
+    # Con tabla padre solo se escribe la FK hacia LIBRO_EDIT
+    return ("LIBRO_EDIT_ID",) if m.has("LIBRO_EDIT_ID") else None
+
+
+def crear(data: Dict[str, object]) -> Optional[int]:
+    m = compiled(TABLE_CHILD)
+    with transaction():
+        return m.insert(_values(m, data), _written(m))
+
 
-    if fecha_col and fecha_iso:
-        columns.append(fecha_col)
-        values.append("TO_DATE(:fecha, 'YYYY-MM-DD')")
-        payload["fecha"] = fecha_iso
+def actualizar(id_edit_lib: int, data: Dict[str, object]) -> None:
+    m = compiled(TABLE_CHILD)
+    with transaction():
+        values = {**_values(m, data), "ID": id_edit_lib}
+        sql, names = m.update_sql(_written(m))
+        execute(sql, m.binds(values, names))
 
-    columns = list(dict.fromkeys(columns))
-    values = values[: len(columns)]
 
-    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(values)})"
-    execute(sql, payload)
+def eliminar(id_edit_lib: int) -> None:
+    execute(compiled(TABLE_CHILD).delete_sql, {"ID": id_edit_lib})
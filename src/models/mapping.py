@@ -0,0 +1,302 @@
+"""Declarative table mappings compiled to fixed SQL once per schema version.
+
+Each entity declares its logical fields and the physical columns that may back
+them in a given deployment.  The first time a mapping is used it is resolved
+against the schema catalog and compiled to stable statement texts for
+list/get/insert/update/delete, so DAOs only bind values on the hot path and the
+driver's statement cache keeps hitting.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from src.utils.pagination import PER_PAGE, Page
+
+from .db import execute, execute_returning, find_sequence_like, query_page, schema_catalog
+from .ids import next_id
+
+
+@dataclass(frozen=True)
+class Field:
+    """A logical field and the physical column candidates that may back it.
+
+    ``insert``/``update`` are SQL expression templates where ``{name}`` is the
+    logical field name (``None`` leaves the column out of that statement);
+    ``by_type`` overrides both templates for specific column datatypes.
+    """
+
+    name: str
+    candidates: Tuple[str, ...]
+    required: bool = False
+    listed: bool = True
+    insert: Optional[str] = ":{name}"
+    update: Optional[str] = ":{name}"
+    by_type: Tuple[Tuple[str, str], ...] = ()
+
+
+@dataclass(frozen=True)
+class TableMapping:
+    """Logical description of a table whose physical columns may vary."""
+
+    table: str
+    pk: Tuple[str, ...]
+    pk_alias: str
+    fields: Tuple[Field, ...]
+    order_by: Optional[str] = None
+    rowid_fallback: bool = False
+    sequence_like: Optional[str] = None
+    generate_pk: bool = True
+
+    def compile(self) -> "CompiledMapping":
+        return CompiledMapping(self)
+
+
+@dataclass(frozen=True)
+class ResolvedField:
+    name: str
+    column: str
+    datatype: Optional[str]
+    insert: Optional[str]
+    update: Optional[str]
+    listed: bool
+
+
+def _binds_in(expr: Optional[str], name: str) -> bool:
+    # Whole bind names only: ":FECHA" must not match ":FECHA_EVENTO"
+    return bool(expr) and re.search(rf":{re.escape(name)}\b", expr) is not None
+
+
+class CompiledMapping:
+    """SQL texts for a :class:`TableMapping` resolved against the live schema."""
+
+    def __init__(self, mapping: TableMapping) -> None:
+        catalog = schema_catalog()
+        self.mapping = mapping
+        self.table = mapping.table
+        self.version = catalog.version
+
+        pk = next((c for c in mapping.pk if catalog.has_column(mapping.table, c)), None)
+        if pk is None:
+            if not mapping.rowid_fallback:
+                raise RuntimeError(f"Ninguna columna de {list(mapping.pk)} existe en {mapping.table}")
+            pk = "ROWID"
+        self.pk = pk
+
+        self.fields: Dict[str, ResolvedField] = {}
+        used = {pk}
+        for field in mapping.fields:
+            column = next((c for c in field.candidates if catalog.has_column(mapping.table, c)), None)
+            if column is None:
+                if field.required:
+                    raise RuntimeError(f"Ninguna columna de {list(field.candidates)} existe en {mapping.table}")
+                continue
+            datatype = catalog.datatype(mapping.table, column)
+            insert, update = field.insert, field.update
+            override = dict(field.by_type).get(datatype or "")
+            if override:
+                insert = update = override
+            if column in used:
+                # Two logical fields backed by one column: only write it once.
+                insert = update = None
+            used.add(column)
+            self.fields[field.name] = ResolvedField(
+                name=field.name,
+                column=column,
+                datatype=datatype,
+                insert=insert.format(name=field.name) if insert else None,
+                update=update.format(name=field.name) if update else None,
+                listed=field.listed,
+            )
+
+        self.sequence = find_sequence_like(mapping.sequence_like) if mapping.sequence_like else None
+        if self.pk == "ROWID":
+            self.pk_insert: Optional[str] = None
+        elif mapping.generate_pk and self.sequence:
+            self.pk_insert = f"{self.sequence}.NEXTVAL"
+        else:
+            self.pk_insert = f":{mapping.pk_alias}"
+
+        order = self.fields.get(mapping.order_by or "")
+        order_col = order.column if order else self.pk
+        self.select_sql = self._select(all_fields=True)
+        self.list_columns = self._select(all_fields=False)
+        # The key breaks ties so OFFSET pages never overlap
+        self.list_order = f"{order_col} DESC" if order_col == self.pk else f"{order_col} DESC, {self.pk} DESC"
+        self.list_sql = f"SELECT {self.list_columns} FROM {self.table} ORDER BY {order_col} DESC"
+        self.get_sql = f"SELECT {self.select_sql} FROM {self.table} WHERE {self.pk} = :ID"
+        self.delete_sql = f"DELETE FROM {self.table} WHERE {self.pk} = :ID"
+
+        self._lock = threading.Lock()
+        # Keyed by ``names`` as given: None (every field) and () (none) differ
+        self._insert: Dict[Optional[Tuple[str, ...]], Tuple[str, Tuple[str, ...]]] = {}
+        self._update: Dict[Optional[Tuple[str, ...]], Tuple[str, Tuple[str, ...]]] = {}
+        self._memo: Dict[str, object] = {}
+
+    def _select(self, all_fields: bool) -> str:
+        parts = [f"{self.pk} AS {self.mapping.pk_alias}"]
+        for field in self.fields.values():
+            if all_fields or field.listed:
+                parts.append(f"{field.column} AS {field.name}")
+        return ", ".join(parts)
+
+    def page(
+        self,
+        page: int,
+        per_page: int = PER_PAGE,
+        search: Optional[str] = None,
+        search_fields: Tuple[str, ...] = (),
+        where: str = "",
+        binds: Optional[Dict[str, object]] = None,
+    ) -> Page:
+        """One list page, optionally keeping rows whose ``search_fields`` contain ``search``.
+
+        ``where``/``binds`` take a prebuilt filter instead, for DAOs with their
+        own search predicate.
+        """
+
+        columns = [self.fields[name].column for name in search_fields if name in self.fields]
+        if search and columns:
+            where = " OR ".join(f"INSTR(LOWER({column}), :q) > 0" for column in columns)
+            binds = {"q": search.lower()}
+        return query_page(self.table, self.list_columns, self.list_order, page, per_page, where, binds)
+
+    def has(self, name: str) -> bool:
+        return name in self.fields
+
+    def column(self, name: str) -> Optional[str]:
+        field = self.fields.get(name)
+        return field.column if field else None
+
+    def datatype(self, name: str) -> Optional[str]:
+        field = self.fields.get(name)
+        return field.datatype if field else None
+
+    def _selected(self, names: Optional[Iterable[str]]) -> List[ResolvedField]:
+        if names is None:
+            return list(self.fields.values())
+        return [self.fields[name] for name in names if name in self.fields]
+
+    def insert_sql(self, names: Optional[Tuple[str, ...]] = None) -> Tuple[str, Tuple[str, ...]]:
+        """Return ``(sql, bind_names)`` for an INSERT of ``names`` (default: all)."""
+
+        cached = self._insert.get(names)
+        if cached is not None:
+            return cached
+        columns: List[str] = []
+        values: List[str] = []
+        binds: List[str] = []
+        if self.pk_insert:
+            columns.append(self.pk)
+            values.append(self.pk_insert)
+            if _binds_in(self.pk_insert, self.mapping.pk_alias):
+                binds.append(self.mapping.pk_alias)
+        for field in self._selected(names):
+            if not field.insert:
+                continue
+            columns.append(field.column)
+            values.append(field.insert)
+            if _binds_in(field.insert, field.name):
+                binds.append(field.name)
+        sql = f"INSERT INTO {self.table} ({', '.join(columns)}) VALUES ({', '.join(values)})"
+        if self.pk != "ROWID":
+            sql += f" RETURNING {self.pk} INTO :NEW_ID"
+        with self._lock:
+            return self._insert.setdefault(names, (sql, tuple(binds)))
+
+    def insert(self, values: Mapping[str, object], names: Optional[Tuple[str, ...]] = None) -> Optional[int]:
+        """INSERT ``values`` in one round trip and return the new primary key.
+
+        Returns ``None`` for tables that only have a ROWID.
+        """
+
+        sql, bind_names = self.insert_sql(names)
+        binds = self.insert_binds(values, bind_names)
+        if self.pk == "ROWID":
+            execute(sql, binds)
+            return None
+        new_id = execute_returning(sql, binds)
+        return int(new_id) if new_id is not None else None
+
+    def update_sql(self, names: Optional[Tuple[str, ...]] = None) -> Tuple[str, Tuple[str, ...]]:
+        """Return ``(sql, bind_names)`` for an UPDATE of ``names`` by ``:ID``."""
+
+        cached = self._update.get(names)
+        if cached is not None:
+            return cached
+        sets: List[str] = []
+        binds: List[str] = []
+        for field in self._selected(names):
+            if not field.update:
+                continue
+            sets.append(f"{field.column} = {field.update}")
+            if _binds_in(field.update, field.name):
+                binds.append(field.name)
+        binds.append("ID")
+        sql = f"UPDATE {self.table} SET {', '.join(sets)} WHERE {self.pk} = :ID"
+        with self._lock:
+            return self._update.setdefault(names, (sql, tuple(binds)))
+
+    def sql(self, key: str, builder: Callable[["CompiledMapping"], str]) -> str:
+        """Build an entity-specific statement once and reuse it afterwards."""
+
+        cached = self._memo.get(key)
+        if cached is None:
+            with self._lock:
+                cached = self._memo.setdefault(key, builder(self))
+        return cached  # type: ignore[return-value]
+
+    @staticmethod
+    def binds(values: Mapping[str, object], names: Iterable[str]) -> Dict[str, object]:
+        return {name: values.get(name) for name in names}
+
+    def insert_binds(self, values: Mapping[str, object], names: Iterable[str]) -> Dict[str, object]:
+        """Like :meth:`binds`, allocating the primary key when the caller did not."""
+
+        binds = self.binds(values, names)
+        alias = self.mapping.pk_alias
+        if alias in binds and binds[alias] is None and self.mapping.generate_pk:
+            binds[alias] = next_id(self.table, self.pk)
+        return binds
+
+
+_registry: Dict[str, TableMapping] = {}
+_compiled: Dict[str, CompiledMapping] = {}
+_lock = threading.Lock()
+
+
+def register(mapping: TableMapping) -> TableMapping:
+    """Declare ``mapping``; it is compiled on first use."""
+
+    with _lock:
+        _registry[mapping.table] = mapping
+        _compiled.pop(mapping.table, None)
+    return mapping
+
+
+def compiled(table: str) -> CompiledMapping:
+    """Return the compiled mapping for ``table``, recompiling after schema refreshes."""
+
+    current = _compiled.get(table)
+    if current is not None and current.version == schema_catalog().version:
+        return current
+    with _lock:
+        current = _compiled.get(table)
+        if current is None or current.version != schema_catalog().version:
+            current = _registry[table].compile()
+            _compiled[table] = current
+    return current
+
+
+def compile_all() -> Dict[str, Exception]:
+    """Compile every registered mapping, returning the ones that failed."""
+
+    errors: Dict[str, Exception] = {}
+    for table in list(_registry):
+        try:
+            compiled(table)
+        except Exception as exc:  # noqa: BLE001 - reported to the caller
+            errors[table] = exc
+    return errors
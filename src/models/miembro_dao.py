@@ -4,7 +4,10 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional
 
-from .db import execute, next_id, query_all, query_one
+from src.utils.pagination import PER_PAGE, Page
+
+from .db import execute, query_all, query_one, query_page
+from .ids import next_id
 
 
 def listar() -> List[Dict[str, object]]:
@@ -16,6 +19,10 @@ def listar() -> List[Dict[str, object]]:
     return query_all(sql)
 
 
+def listar_pagina(page: int, per_page: int = PER_PAGE) -> Page:
+    return query_page("MIEMBRO", "ID_MIEMBRO, ID_USUARIO, ID_GRUPO", "ID_MIEMBRO DESC", page, per_page)
+
+
 def obtener(id_miembro: int) -> Optional[Dict[str, object]]:
     sql = """
         SELECT ID_MIEMBRO, ID_USUARIO, ID_GRUPO
@@ -0,0 +1,159 @@
+"""In-process cache for reference tables that almost never change.
+
+GENERO, IDIOMA, EDITORIAL and UBICACION feed the select boxes of several
+forms but change a few times a year.  Their ``listar`` is wrapped with
+:func:`cached`; each table carries a version number that its DAO's
+``crear``/``actualizar``/``eliminar`` bump through :func:`invalidate`.  An
+entry is served while its version is current and it is younger than
+``REF_CACHE_TTL`` seconds (the TTL is what picks up writes made by other
+workers).  Concurrent misses on the same entry share a single query, and a
+load that raced with a write is returned to its callers but not stored.
+
+Inside :func:`db.transaction` invalidation waits for the commit (a rollback
+leaves the cache alone) and reads bypass the cache, so neither other
+threads nor the transaction itself see the wrong version of its writes.
+"""
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+from config import Config
+
+from .db import after_commit, in_transaction
+
+T = TypeVar("T")
+
+_Key = Tuple[str, Hashable]
+
+
+class _Flight:
+    """One in-progress load that concurrent misses wait on."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: object = None
+        self.error: Optional[BaseException] = None
+
+
+class RefCache:
+    """Versioned TTL cache with an LRU bound and single-flight loads."""
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None) -> None:
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[_Key, Tuple[int, float, object]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._flights: Dict[Tuple[_Key, int], _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "waits": 0, "invalidations": 0}
+
+    @property
+    def ttl(self) -> float:
+        return Config().REF_CACHE_TTL if self._ttl is None else self._ttl
+
+    @property
+    def max_entries(self) -> int:
+        return Config().REF_CACHE_MAX if self._max_entries is None else self._max_entries
+
+    def get(self, table: str, key: Hashable, loader: Callable[[], T]) -> T:
+        """Cached ``loader()`` for ``(table, key)``, loading it at most once at a time."""
+
+        table = table.upper()
+        if in_transaction():
+            # Uncommitted writes of this transaction must be visible to it
+            return loader()
+        entry_key = (table, key)
+        with self._lock:
+            version = self._versions.get(table, 0)
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+                self._entries.move_to_end(entry_key)
+                self._stats["hits"] += 1
+                return entry[2]  # type: ignore[return-value]
+            flight = self._flights.get((entry_key, version))
+            leader = flight is None
+            if leader:
+                flight = self._flights[(entry_key, version)] = _Flight()
+                self._stats["misses"] += 1
+            else:
+                self._stats["waits"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value  # type: ignore[return-value]
+
+        try:
+            value = loader()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        else:
+            flight.value = value
+            self._store(entry_key, version, value)
+        finally:
+            with self._lock:
+                self._flights.pop((entry_key, version), None)
+            flight.done.set()
+        return value
+
+    def _store(self, entry_key: _Key, version: int, value: object) -> None:
+        ttl, limit = self.ttl, self.max_entries
+        if ttl <= 0 or limit <= 0:
+            return
+        with self._lock:
+            if self._versions.get(entry_key[0], 0) != version:
+                return  # a write landed while loading
+            self._entries[entry_key] = (version, time.monotonic() + ttl, value)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > limit:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """Drop ``table`` (default: every table) and bump its version."""
+
+        with self._lock:
+            self._stats["invalidations"] += 1
+            tables = {table.upper()} if table else {key[0] for key in self._entries} | set(self._versions)
+            for name in tables:
+                self._versions[name] = self._versions.get(name, 0) + 1
+            for entry_key in [key for key in self._entries if key[0] in tables]:
+                del self._entries[entry_key]
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "versions": dict(self._versions)}
+
+
+cache = RefCache()
+
+
+def invalidate(table: Optional[str] = None) -> None:
+    """Invalidate ``table`` now, or after commit when called inside a transaction."""
+
+    after_commit(lambda: cache.invalidate(table))
+
+
+def cached(table: str) -> Callable[[Callable[..., List[T]]], Callable[..., List[T]]]:
+    """Serve a DAO list function from :data:`cache`, keyed by its name and arguments.
+
+    Callers get their own copy of the list; the rows themselves are shared
+    and must not be modified.
+    """
+
+    def decorator(fn: Callable[..., List[T]]) -> Callable[..., List[T]]:
+        @functools.wraps(fn)
+        def wrapper(*args: Hashable) -> List[T]:
+            return list(cache.get(table, (fn.__name__, args), lambda: fn(*args)))
+
+        wrapper.uncached = fn  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
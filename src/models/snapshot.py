@@ -0,0 +1,67 @@
+"""Persisted schema snapshot so new workers skip dictionary introspection.
+
+``flask schema snapshot`` introspects the schema once and writes the catalog
+plus the schema checksum to ``SCHEMA_SNAPSHOT``.  Every worker loads that file
+when :mod:`src.models.db` is imported and only falls back to querying the
+dictionary views when the checksum no longer matches the live schema.
+"""
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from .db import SNAPSHOT_FORMAT, catalog_digest, refresh_schema, schema_catalog, schema_checksum
+
+
+cli = AppGroup("schema", help="Schema catalog maintenance.")
+
+
+def build_snapshot() -> Dict[str, object]:
+    """Introspect the live schema and return snapshot data."""
+
+    refresh_schema()
+    catalog = schema_catalog().export()
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "schema_checksum": schema_checksum(),
+        "digest": catalog_digest(catalog),
+        "catalog": catalog,
+    }
+
+
+def write_snapshot(path: str) -> Dict[str, object]:
+    """Write a fresh snapshot to ``path`` atomically and return it."""
+
+    snapshot = build_snapshot()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(snapshot, handle, sort_keys=True)
+    # Workers may be reading the old file; never expose a half-written one.
+    os.replace(tmp_path, path)
+    return snapshot
+
+
+@cli.command("snapshot")
+@click.option("--output", "-o", default=None, help="Destination file (defaults to SCHEMA_SNAPSHOT).")
+def snapshot_command(output: Optional[str]) -> None:
+    """Write the resolved schema catalog to a snapshot file."""
+
+    path = output or current_app.config.get("SCHEMA_SNAPSHOT")
+    if not path:
+        raise click.UsageError("SCHEMA_SNAPSHOT no está configurado; usa --output.")
+    snapshot = write_snapshot(path)
+    catalog = snapshot["catalog"]
+    click.echo(
+        f"Snapshot {snapshot['schema_checksum']} escrito en {path} "
+        f"({len(catalog['tables'])} tablas, {len(catalog['sequences'])} secuencias)."  # type: ignore[index]
+    )
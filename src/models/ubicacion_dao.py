@@ -4,9 +4,14 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional
 
-from .db import execute, next_id, query_all, query_one
+from src.utils.pagination import PER_PAGE, Page
 
+from .db import execute, query_all, query_one, query_page
+from .ids import next_id
+from .refcache import cached, invalidate
 
+
+@cached("UBICACION")
 def listar() -> List[Dict[str, object]]:
     sql = """
         SELECT ID_UBICACION, ESTANTERIA, DESCRIPCION
@@ -16,6 +21,10 @@ def listar() -> List[Dict[str, object]]:
     return query_all(sql)
 
 
+def listar_pagina(page: int, per_page: int = PER_PAGE) -> Page:
+    return query_page("UBICACION", "ID_UBICACION, ESTANTERIA, DESCRIPCION", "ID_UBICACION DESC", page, per_page)
+
+
 def obtener(id_ubicacion: int) -> Optional[Dict[str, object]]:
     sql = """
         SELECT ID_UBICACION, ESTANTERIA, DESCRIPCION
@@ -33,6 +42,7 @@ def crear(data: Dict[str, object]) -> int:
         VALUES (:ID_UBICACION, :ESTANTERIA, :DESCRIPCION)
     """
     execute(sql, payload)
+    invalidate("UBICACION")
     return new_id
 
 
@@ -45,7 +55,9 @@ def actualizar(id_ubicacion: int, data: Dict[str, object]) -> None:
          WHERE ID_UBICACION = :ID
     """
     execute(sql, payload)
+    invalidate("UBICACION")
 
 
 def eliminar(id_ubicacion: int) -> None:
     execute("DELETE FROM UBICACION WHERE ID_UBICACION = :ID", {"ID": id_ubicacion})
+    invalidate("UBICACION")
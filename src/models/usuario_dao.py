@@ -1,4 +1,28 @@
-from .db import query_all, query_one, execute
+import logging
+
+from src.utils.pagination import PER_PAGE
+
+from .db import query_all, query_iter, query_one, query_page, execute
+from .ids import next_id
+
+logger = logging.getLogger(__name__)
+_listeners = []
+
+def add_listener(listener):
+    """Call ``listener(event, id_usuario)`` after ``crear``/``actualizar``/``eliminar``."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+def remove_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+def _notify(event, id_usuario):
+    for listener in list(_listeners):
+        try:
+            listener(event, id_usuario)
+        except Exception as exc:  # noqa: BLE001 - the write already succeeded
+            logger.warning("Listener de usuarios falló (%s %s): %s", event, id_usuario, exc)
 
 def obtener(id_usuario: int):
     sql = """
@@ -40,16 +64,31 @@ def listar():
     """
     return query_all(sql)
 
-def crear(data: dict):
+def listar_pagina(page, per_page=PER_PAGE, search=None):
+    columns = "ID_USUARIO, NOMBRE, DIRECCION, TELEFONO, DPI, SEXO, FECHA_CREACION, CONTRASENA"
+    where = "INSTR(LOWER(NOMBRE), :q) > 0" if search else ""
+    return query_page("USUARIO", columns, "ID_USUARIO DESC", page, per_page, where, {"q": search.lower()} if search else None)
+
+def iter_sugerencias(id_usuario=None):
+    """Stream ID_USUARIO, NOMBRE and DPI for the typeahead index (or just ``id_usuario``)."""
+    sql = "SELECT ID_USUARIO, NOMBRE, DPI FROM USUARIO"
+    if id_usuario is None:
+        return query_iter(sql)
+    return query_iter(sql + " WHERE ID_USUARIO = :ID", {"ID": id_usuario})
+
+def crear(data: dict) -> int:
+    new_id = next_id("USUARIO", "ID_USUARIO")
     sql = """
     INSERT INTO USUARIO
       (ID_USUARIO, NOMBRE, DIRECCION, TELEFONO, DPI, SEXO, FECHA_CREACION, CONTRASENA)
     VALUES
-      ((SELECT NVL(MAX(ID_USUARIO),0)+1 FROM USUARIO),
+      (:ID_USUARIO,
        :NOMBRE, :DIRECCION, :TELEFONO, :DPI, :SEXO,
        TO_DATE(:FECHA_CREACION,'YYYY-MM-DD'), :CONTRASENA)
     """
-    execute(sql, data)
+    execute(sql, dict(data, ID_USUARIO=new_id))
+    _notify("crear", new_id)
+    return new_id
 
 def actualizar(id_usuario: int, data: dict):
     sql = """
@@ -64,6 +103,8 @@ def actualizar(id_usuario: int, data: dict):
      WHERE ID_USUARIO = :ID
     """
     execute(sql, dict(data, ID=id_usuario))
+    _notify("actualizar", id_usuario)
 
 def eliminar(id_usuario: int):
     execute("DELETE FROM USUARIO WHERE ID_USUARIO = :ID", {"ID": id_usuario})
+    _notify("eliminar", id_usuario)
@@ -0,0 +1,30 @@
+"""JSON endpoints used by the form widgets."""
+from __future__ import annotations
+
+from flask import Blueprint, jsonify, request
+from flask_login import login_required
+
+from src.services import suggest
+
+bp = Blueprint("api", __name__, url_prefix="/api")
+
+DEFAULT_LIMIT = 10
+
+
+def _suggestions(source: suggest.Source):
+    query = request.args.get("q", "").strip()
+    limit = request.args.get("limit", DEFAULT_LIMIT, type=int)
+    items = source.suggest(query, limit) if query else []
+    return jsonify(items=items)
+
+
+@bp.get("/libros/suggest")
+@login_required
+def libros_suggest():
+    return _suggestions(suggest.libros)
+
+
+@bp.get("/usuarios/suggest")
+@login_required
+def usuarios_suggest():
+    return _suggestions(suggest.usuarios)
@@ -1,7 +1,10 @@
 """Authentication blueprint."""
 from __future__ import annotations
 
-from flask import Blueprint, flash, redirect, render_template, request, url_for
+import hmac
+from functools import wraps
+
+from flask import Blueprint, abort, current_app, flash, redirect, render_template, request, url_for
 from flask_login import LoginManager, current_user, login_required, login_user, logout_user
 
 from src.models import usuario_dao
@@ -14,6 +17,33 @@ login_manager = LoginManager()
 login_manager.login_view = "auth.login"
 
 
+def is_admin() -> bool:
+    """True for users listed in ADMIN_USERS, or callers sending X-Admin-Token."""
+
+    token = current_app.config.get("ADMIN_TOKEN")
+    sent = request.headers.get("X-Admin-Token", "")
+    if token and sent and hmac.compare_digest(sent, token):
+        return True
+    return bool(
+        current_user.is_authenticated
+        and current_user.nombre in (current_app.config.get("ADMIN_USERS") or ())
+    )
+
+
+def admin_required(view):
+    """Restrict ``view`` to :func:`is_admin` callers."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if is_admin():
+            return view(*args, **kwargs)
+        if not current_user.is_authenticated:
+            return login_manager.unauthorized()
+        abort(403)
+
+    return wrapper
+
+
 @login_manager.user_loader
 def load_user(user_id: str) -> User | None:
     try:
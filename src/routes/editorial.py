@@ -2,24 +2,17 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict
 
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import login_required
 
 from src.models import editorial_dao
+from src.utils.pagination import page_number
 
 bp = Blueprint("editorial", __name__, url_prefix="/editorial")
 
 
-def _paginate(items: List[Dict[str, object]], page: int, per_page: int = 10) -> Tuple[List[Dict[str, object]], int, int]:
-    total = len(items)
-    total_pages = max(1, (total + per_page - 1) // per_page)
-    page = max(1, min(page, total_pages))
-    start = (page - 1) * per_page
-    return items[start : start + per_page], page, total_pages
-
-
 def _trim(value: str | None) -> str | None:
     if value is None:
         return None
@@ -65,17 +58,12 @@ def _is_iso_date(value: str) -> bool:
 @bp.get("/")
 @login_required
 def index():
-    page = int(request.args.get("page", 1) or 1)
     search = request.args.get("q", "").strip().lower()
-    editoriales = editorial_dao.listar()
-    if search:
-        editoriales = [e for e in editoriales if search in (e.get("NOMBRE", "").lower())]
-    paginated, page, total_pages = _paginate(editoriales, page)
+    pagination = editorial_dao.listar_pagina(page_number(request.args), search=search or None)
     return render_template(
         "editorial/index.html",
-        editoriales=paginated,
-        page=page,
-        total_pages=total_pages,
+        editoriales=pagination.items,
+        pagination=pagination,
         search=search,
     )
 
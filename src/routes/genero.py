@@ -1,24 +1,17 @@
 """Género blueprint."""
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+from typing import Dict
 
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import login_required
 
 from src.models import genero_dao, libro_dao
+from src.utils.pagination import page_number
 
 bp = Blueprint("genero", __name__, url_prefix="/genero")
 
 
-def _paginate(items: List[Dict[str, object]], page: int, per_page: int = 10) -> Tuple[List[Dict[str, object]], int, int]:
-    total = len(items)
-    total_pages = max(1, (total + per_page - 1) // per_page)
-    page = max(1, min(page, total_pages))
-    start = (page - 1) * per_page
-    return items[start : start + per_page], page, total_pages
-
-
 def _trim(value: str | None) -> str | None:
     if value is None:
         return None
@@ -45,17 +38,12 @@ def _build_data(form) -> Dict[str, object]:
 @bp.get("/")
 @login_required
 def index():
-    page = int(request.args.get("page", 1) or 1)
     search = request.args.get("q", "").strip().lower()
-    generos = genero_dao.listar()
-    if search:
-        generos = [g for g in generos if search in (g.get("GENERO", "").lower())]
-    paginated, page, total_pages = _paginate(generos, page)
+    pagination = genero_dao.listar_pagina(page_number(request.args), search=search or None)
     return render_template(
         "genero/index.html",
-        generos=paginated,
-        page=page,
-        total_pages=total_pages,
+        generos=pagination.items,
+        pagination=pagination,
         search=search,
     )
 
@@ -2,24 +2,17 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, List
 
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import login_required
 
 from src.models import grupo_lectura_dao, libro_dao
+from src.utils.pagination import page_number
 
 bp = Blueprint("grupo_lectura", __name__, url_prefix="/grupo_lectura")
 
 
-def _paginate(items: List[Dict[str, object]], page: int, per_page: int = 10) -> Tuple[List[Dict[str, object]], int, int]:
-    total = len(items)
-    total_pages = max(1, (total + per_page - 1) // per_page)
-    page = max(1, min(page, total_pages))
-    start = (page - 1) * per_page
-    return items[start : start + per_page], page, total_pages
-
-
 def _trim(value: str | None) -> str | None:
     if value is None:
         return None
@@ -85,14 +78,11 @@ def _selected_libros(form) -> List[int]:
 @bp.get("/")
 @login_required
 def index():
-    page = int(request.args.get("page", 1) or 1)
-    grupos = grupo_lectura_dao.listar()
-    paginated, page, total_pages = _paginate(grupos, page)
+    pagination = grupo_lectura_dao.listar_pagina(page_number(request.args))
     return render_template(
         "grupo_lectura/index.html",
-        grupos=paginated,
-        page=page,
-        total_pages=total_pages,
+        grupos=pagination.items,
+        pagination=pagination,
     )
 
 
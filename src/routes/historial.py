@@ -3,25 +3,18 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional
 
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import login_required
 
-from src.models import historial_dao, libro_dao, usuario_dao
+from src.models import historial_dao
+from src.services import suggest
 
 
 bp = Blueprint("historial", __name__, url_prefix="/historial")
 
 
-def _paginate(items: List[Dict[str, object]], page: int, per_page: int = 10) -> Tuple[List[Dict[str, object]], int, int]:
-    total = len(items)
-    total_pages = max(1, (total + per_page - 1) // per_page)
-    page = max(1, min(page, total_pages))
-    start = (page - 1) * per_page
-    return items[start : start + per_page], page, total_pages
-
-
 def _parse_date(value: str | None) -> datetime:
     text = (value or "").strip()
     if not text:
@@ -73,24 +66,50 @@ def _build_data(form) -> Dict[str, object]:
     }
 
 
-def _catalogs() -> Dict[str, List[Dict[str, object]]]:
+def _seleccion(registro) -> Dict[str, Optional[Dict[str, object]]]:
+    registro = registro or {}
     return {
-        "usuarios": usuario_dao.listar(),
-        "libros": libro_dao.listar(),
+        "usuario": suggest.usuarios.selected(registro.get("ID_USUARIO")),
+        "libro": suggest.libros.selected(registro.get("ID_LIBRO")),
     }
 
 
+def _filters(args) -> Dict[str, object]:
+    """usuario/libro/desde/hasta from the query string; invalid values are flashed and dropped."""
+
+    filters: Dict[str, object] = {}
+    for name, label in (("usuario", "usuario"), ("libro", "libro")):
+        text = (args.get(name) or "").strip()
+        if text:
+            try:
+                filters[name] = int(text)
+            except ValueError:
+                flash(f"El filtro de {label} es inválido.", "warning")
+    for name in ("desde", "hasta"):
+        if (args.get(name) or "").strip():
+            try:
+                filters[name] = _parse_date(args.get(name)).date()
+            except ValueError as exc:
+                flash(str(exc), "warning")
+    return filters
+
+
 @bp.get("/")
 @login_required
 def index():
-    page = int(request.args.get("page", 1) or 1)
-    registros = historial_dao.listar()
-    paginated, page, total_pages = _paginate(registros, page)
+    filters = _filters(request.args)
+    try:
+        pagination = historial_dao.listar_pagina(
+            after=request.args.get("after"), before=request.args.get("before"), **filters
+        )
+    except ValueError:
+        # Stale or hand-edited cursor: start again from the newest entries
+        pagination = historial_dao.listar_pagina(**filters)
     return render_template(
         "historial/index.html",
-        registros=paginated,
-        page=page,
-        total_pages=total_pages,
+        registros=pagination.items,
+        pagination=pagination,
+        filtros=filters,
     )
 
 
@@ -101,7 +120,7 @@ def crear():
         "historial/form.html",
         action=url_for("historial.guardar"),
         registro=None,
-        **_catalogs(),
+        seleccion=_seleccion(None),
     )
 
 
@@ -129,7 +148,7 @@ def editar(id_historial: int):
         "historial/form.html",
         action=url_for("historial.actualizar", id_historial=id_historial),
         registro=registro,
-        **_catalogs(),
+        seleccion=_seleccion(registro),
     )
 
 
@@ -3,24 +3,33 @@ from __future__ import annotations
 
 import csv
 import io
+import re
+from contextlib import closing
 from datetime import date, datetime
-from typing import Dict, List, Tuple
-
-from flask import Blueprint, Response, flash, redirect, render_template, request, url_for
+from typing import Dict, Iterable, Iterator, List
+
+from flask import (
+    Blueprint,
+    Response,
+    flash,
+    redirect,
+    render_template,
+    request,
+    stream_template,
+    stream_with_context,
+    url_for,
+)
 from flask_login import login_required
 
 from src.models import editorial_dao, genero_dao, idioma_dao, libro_dao
+from src.services import search_index
+from src.services.catalog_loader import load_parallel
 from src.utils.filters import shortdate
+from src.utils.pagination import PER_PAGE, Page, page_number
 
 bp = Blueprint("libro", __name__, url_prefix="/libro")
 
-
-def _paginate(items: List[Dict[str, object]], page: int, per_page: int = 10) -> Tuple[List[Dict[str, object]], int, int]:
-    total = len(items)
-    total_pages = max(1, (total + per_page - 1) // per_page)
-    page = max(1, min(page, total_pages))
-    start = (page - 1) * per_page
-    return items[start : start + per_page], page, total_pages
+_ISBN = re.compile(r"\d{9}[\dXx]|\d{13}")
 
 
 def _trim(value: str | None, length: int | None = None) -> str | None:
@@ -105,27 +114,25 @@ def _build_data(form) -> Dict[str, object]:
 
 
 def _load_catalogs() -> Dict[str, List[Dict[str, object]]]:
-    return {
-        "editoriales": editorial_dao.listar(),
-        "generos": genero_dao.listar(),
-        "idiomas": idioma_dao.listar(),
-    }
+    return load_parallel(
+        {
+            "editoriales": editorial_dao.listar,
+            "generos": genero_dao.listar,
+            "idiomas": idioma_dao.listar,
+        }
+    )
 
 
 @bp.get("/")
 @login_required
 def index():
-    page = int(request.args.get("page", 1) or 1)
-    search = request.args.get("q", "").strip().lower()
-    libros = libro_dao.listar()
-    if search:
-        libros = [l for l in libros if search in (l.get("TITULO", "").lower())]
-    paginated, page, total_pages = _paginate(libros, page)
+    search = request.args.get("q", "").strip()
+    mode = libro_dao.SEARCH_PREFIX if request.args.get("modo") == "prefijo" else libro_dao.SEARCH_CONTAINS
+    pagination = libro_dao.listar_pagina(page_number(request.args), search=search or None, mode=mode)
     return render_template(
         "libro/index.html",
-        libros=paginated,
-        page=page,
-        total_pages=total_pages,
+        libros=pagination.items,
+        pagination=pagination,
         search=search,
     )
 
@@ -185,43 +192,74 @@ def eliminar(id_libro: int):
     return redirect(url_for("libro.index"))
 
 
+@bp.get("/buscar")
+def buscar():
+    """Public ranked catalog search backed by the in-process index."""
+
+    query = request.args.get("q", "").strip()
+    page = page_number(request.args)
+    if _ISBN.fullmatch(query.replace("-", "").replace(" ", "")):
+        # A whole ISBN is an exact lookup; the index only knows its dash-separated parts
+        pagination = libro_dao.listar_pagina(page, search=query, mode=libro_dao.SEARCH_PREFIX)
+    else:
+        total, hits = search_index.search(query, PER_PAGE, (page - 1) * PER_PAGE) if query else (0, [])
+        pagination = Page(items=libro_dao.listar_por_ids(doc for doc, _ in hits), page=page, per_page=PER_PAGE, total=total)
+    return render_template(
+        "libro/buscar.html",
+        libros=pagination.items,
+        pagination=pagination,
+        search=query,
+        indexados=len(search_index.index()),
+    )
+
+
 @bp.get("/reporte")
 @login_required
 def reporte():
-    data = libro_dao.reporte()
-    return render_template("libro/reporte.html", libros=data)
+    # Las filas se leen por lotes mientras se renderiza la plantilla
+    return Response(stream_template("libro/reporte.html", libros=libro_dao.iter_reporte()))
+
+
+REPORTE_CSV_HEADERS = [
+    "ID_LIBRO",
+    "TITULO",
+    "ISBN",
+    "NUM_COPIAS",
+    "NUM_PAGINAS",
+    "ESTADO_FISICO",
+    "CLASIFICACION",
+    "FECHA_PUBLICACION",
+    "FECHA_REGISTRO",
+    "EDITORIAL",
+    "GENERO",
+    "IDIOMA",
+]
+
+
+def _csv_chunks(rows: Iterator[Dict[str, object]], headers: List[str], flush_every: int = 200) -> Iterable[str]:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(headers)
+    with closing(rows):
+        for count, row in enumerate(rows, start=1):
+            values = []
+            for col in headers:
+                value = row.get(col)
+                if col in {"FECHA_REGISTRO", "FECHA_PUBLICACION"}:
+                    value = shortdate(value)
+                values.append("" if value is None else value)
+            writer.writerow(values)
+            if count % flush_every == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+    yield output.getvalue()
 
 
 @bp.get("/reporte.csv")
 @login_required
 def reporte_csv():
-    data = libro_dao.reporte()
-    output = io.StringIO()
-    writer = csv.writer(output)
-    headers = [
-        "ID_LIBRO",
-        "TITULO",
-        "ISBN",
-        "NUM_COPIAS",
-        "NUM_PAGINAS",
-        "ESTADO_FISICO",
-        "CLASIFICACION",
-        "FECHA_PUBLICACION",
-        "FECHA_REGISTRO",
-        "EDITORIAL",
-        "GENERO",
-        "IDIOMA",
-    ]
-    writer.writerow(headers)
-    for row in data:
-        values = []
-        for col in headers:
-            value = row.get(col)
-            if col in {"FECHA_REGISTRO", "FECHA_PUBLICACION"}:
-                value = shortdate(value)
-            values.append("" if value is None else value)
-        writer.writerow(values)
-    csv_data = output.getvalue()
-    response = Response(csv_data, mimetype="text/csv")
+    chunks = _csv_chunks(libro_dao.iter_reporte(), REPORTE_CSV_HEADERS)
+    response = Response(stream_with_context(chunks), mimetype="text/csv")
     response.headers["Content-Disposition"] = "attachment; filename=libros.csv"
     return response
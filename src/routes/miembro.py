@@ -2,25 +2,19 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional
 
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import login_required
 
-from src.models import grupo_lectura_dao, miembro_dao, usuario_dao
+from src.models import grupo_lectura_dao, miembro_dao
+from src.services import suggest
+from src.utils.pagination import page_number
 
 
 bp = Blueprint("miembro", __name__, url_prefix="/miembro")
 
 
-def _paginate(items: List[Dict[str, object]], page: int, per_page: int = 10) -> Tuple[List[Dict[str, object]], int, int]:
-    total = len(items)
-    total_pages = max(1, (total + per_page - 1) // per_page)
-    page = max(1, min(page, total_pages))
-    start = (page - 1) * per_page
-    return items[start : start + per_page], page, total_pages
-
-
 def _parse_int(value: str | None, label: str) -> int:
     text = (value or "").strip()
     if not text:
@@ -40,24 +34,23 @@ def _build_data(form) -> Dict[str, object]:
     }
 
 
-def _catalogs() -> Dict[str, List[Dict[str, object]]]:
-    return {
-        "usuarios": usuario_dao.listar(),
-        "grupos": grupo_lectura_dao.listar(),
+def _catalogs(registro) -> Dict[str, object]:
+    # Reading groups are few enough for a plain select; usuarios use the typeahead
+    seleccion: Dict[str, Optional[Dict[str, object]]] = {
+        "usuario": suggest.usuarios.selected(registro["ID_USUARIO"]) if registro else None,
     }
+    grupos: List[Dict[str, object]] = grupo_lectura_dao.listar()
+    return {"grupos": grupos, "seleccion": seleccion}
 
 
 @bp.get("/")
 @login_required
 def index():
-    page = int(request.args.get("page", 1) or 1)
-    registros = miembro_dao.listar()
-    paginated, page, total_pages = _paginate(registros, page)
+    pagination = miembro_dao.listar_pagina(page_number(request.args))
     return render_template(
         "miembro/index.html",
-        registros=paginated,
-        page=page,
-        total_pages=total_pages,
+        registros=pagination.items,
+        pagination=pagination,
     )
 
 
@@ -68,7 +61,7 @@ def crear():
         "miembro/form.html",
         action=url_for("miembro.guardar"),
         registro=None,
-        **_catalogs(),
+        **_catalogs(None),
     )
 
 
@@ -96,7 +89,7 @@ def editar(id_miembro: int):
         "miembro/form.html",
         action=url_for("miembro.actualizar", id_miembro=id_miembro),
         registro=registro,
-        **_catalogs(),
+        **_catalogs(registro),
     )
 
 
@@ -0,0 +1,141 @@
+"""Operational endpoints (metrics, health, pool administration)."""
+from __future__ import annotations
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from src.models import db, refcache
+from src.routes.auth import admin_required
+from src.services import memprof, pool_control, profiler, search_index, sql_stats
+from src.utils import metrics
+
+bp = Blueprint("ops", __name__)
+
+
+@bp.get("/metrics")
+def metrics_view():
+    """Prometheus text for this worker only (see :mod:`src.utils.metrics`)."""
+
+    return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+@bp.get("/healthz")
+def healthz():
+    # Not ready yet (lazy pool, failed warm-up or ping): check again rather than stay drained
+    status = db.pool_status(ping=request.args.get("deep") == "1" or not db.pool_ready())
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+def _optional_int(value) -> int | None:
+    if value in (None, ""):
+        return None
+    return int(value)
+
+
+@bp.get("/admin/pool")
+@admin_required
+def pool_view():
+    ctl = pool_control.controller()
+    return jsonify(pool=db.pool_status(), controller=None if ctl is None else ctl.state())
+
+
+@bp.post("/admin/pool")
+@admin_required
+def pool_resize():
+    """Resize the pool and/or steer the autosizer.
+
+    ``min``/``max`` resize now; with ``POOL_AUTOSIZE`` a manual ``max``
+    pauses the controller so the next tick does not undo it.  ``floor`` and
+    ``ceiling`` move the controller's bounds and ``auto=1``/``auto=0``
+    resumes or pauses it explicitly.
+    """
+
+    payload = request.get_json(silent=True) or request.form
+    ctl = pool_control.controller()
+    try:
+        # Parse and check everything first: a 400 must leave pool and controller alone
+        min_size = _optional_int(payload.get("min"))
+        max_size = _optional_int(payload.get("max"))
+        bounds = None
+        if ctl is not None:
+            bounds = ctl.check_bounds(_optional_int(payload.get("floor")), _optional_int(payload.get("ceiling")))
+        sizes = db.resize_pool(min_size=min_size, max_size=max_size)
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    if ctl is not None:
+        ctl.set_bounds(*bounds)
+        auto = payload.get("auto")
+        if auto not in (None, ""):
+            ctl.paused = str(auto).lower() not in {"1", "true", "yes", "on"}
+        elif max_size is not None:
+            ctl.paused = True
+    return jsonify({**sizes, "controller": None if ctl is None else ctl.state()})
+
+
+@bp.get("/admin/sql-stats")
+@admin_required
+def sql_stats_view():
+    limit = request.args.get("limit", default=50, type=int)
+    rows = sql_stats.stats.snapshot(sort=request.args.get("sort", "total"), limit=limit)
+    if request.args.get("reset") == "1":
+        sql_stats.stats.reset()
+    return jsonify(statements=rows)
+
+
+@bp.get("/admin/ref-cache")
+@admin_required
+def ref_cache_view():
+    """Hit/miss counters of the reference-table cache; ``?reset=1`` empties it."""
+
+    stats = refcache.cache.stats()
+    if request.args.get("reset") == "1":
+        refcache.invalidate()
+    return jsonify(stats)
+
+
+@bp.get("/admin/profile")
+@admin_required
+def profile_view():
+    """Merged collapsed stacks of the requests sampled by PROFILE_SAMPLE_EVERY."""
+
+    count, stacks = profiler.buffer.merged(request.args.get("endpoint") or None)
+    if request.args.get("reset") == "1":
+        profiler.buffer.clear()
+    response = Response(profiler.render_folded(stacks), mimetype="text/plain")
+    response.headers["X-Profiled-Requests"] = str(count)
+    return response
+
+
+@bp.get("/admin/memory")
+@admin_required
+def memory_view():
+    """tracemalloc diff of one replayed request to ``?path=``."""
+
+    path = request.args.get("path")
+    if not path or not path.startswith("/"):
+        return jsonify(error="Parámetro path requerido (p. ej. /prestamo/)."), 400
+    # Replay with the caller's credentials
+    headers = {name: request.headers[name] for name in ("Cookie", "X-Admin-Token") if name in request.headers}
+    report = memprof.measure_route(
+        current_app._get_current_object(),
+        path,
+        headers=headers,
+        key=request.args.get("key", "lineno"),
+        limit=request.args.get("limit", default=20, type=int),
+    )
+    return jsonify(report)
+
+
+@bp.get("/admin/search")
+@admin_required
+def search_index_view():
+    return jsonify(search_index.status())
+
+
+@bp.post("/admin/search")
+@admin_required
+def search_index_rebuild():
+    """Start a background rebuild of the catalog search index."""
+
+    if not search_index.start_rebuild():
+        return jsonify(error="Ya hay una reconstrucción del índice en curso."), 409
+    return jsonify(search_index.status()), 202
@@ -2,24 +2,18 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, Optional
 
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import login_required
 
-from src.models import libro_dao, prestamo_dao, usuario_dao
+from src.models import prestamo_dao
+from src.services import suggest
+from src.utils.pagination import page_number
 
 bp = Blueprint("prestamo", __name__, url_prefix="/prestamo")
 
 
-def _paginate(items: List[Dict[str, object]], page: int, per_page: int = 10) -> Tuple[List[Dict[str, object]], int, int]:
-    total = len(items)
-    total_pages = max(1, (total + per_page - 1) // per_page)
-    page = max(1, min(page, total_pages))
-    start = (page - 1) * per_page
-    return items[start : start + per_page], page, total_pages
-
-
 def _trim(value: str | None, length: int | None = None) -> str | None:
     if value is None:
         return None
@@ -86,27 +80,25 @@ def _build_data(form) -> Dict[str, object]:
     }
 
 
-def _load_catalogs() -> Dict[str, List[Dict[str, object]]]:
+def _seleccion(prestamo) -> Dict[str, Optional[Dict[str, object]]]:
+    """Current libro/usuario labels for the typeahead inputs (both empty on create)."""
+
+    prestamo = prestamo or {}
     return {
-        "libros": libro_dao.listar(),
-        "usuarios": usuario_dao.listar(),
+        "libro": suggest.libros.selected(prestamo.get("ID_LIBRO")),
+        "usuario": suggest.usuarios.selected(prestamo.get("ID_USUARIO")),
     }
 
 
 @bp.get("/")
 @login_required
 def index():
-    page = int(request.args.get("page", 1) or 1)
     search = request.args.get("q", "").strip().lower()
-    prestamos = prestamo_dao.listar()
-    if search:
-        prestamos = [p for p in prestamos if search in (p.get("ESTADO", "").lower())]
-    paginated, page, total_pages = _paginate(prestamos, page)
+    pagination = prestamo_dao.listar_pagina(page_number(request.args), search=search or None)
     return render_template(
         "prestamo/index.html",
-        prestamos=paginated,
-        page=page,
-        total_pages=total_pages,
+        prestamos=pagination.items,
+        pagination=pagination,
         search=search,
     )
 
@@ -118,7 +110,7 @@ def crear():
         "prestamo/form.html",
         action=url_for("prestamo.guardar"),
         prestamo=None,
-        **_load_catalogs(),
+        seleccion=_seleccion(None),
     )
 
 
@@ -146,7 +138,7 @@ def editar(id_prestamo: int):
         "prestamo/form.html",
         action=url_for("prestamo.actualizar", id_prestamo=id_prestamo),
         prestamo=prestamo,
-        **_load_catalogs(),
+        seleccion=_seleccion(prestamo),
     )
 
 
@@ -2,25 +2,18 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+from typing import Dict
 
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import login_required
 
 from src.models import ubicacion_dao
+from src.utils.pagination import page_number
 
 
 bp = Blueprint("ubicacion", __name__, url_prefix="/ubicacion")
 
 
-def _paginate(items: List[Dict[str, object]], page: int, per_page: int = 10) -> Tuple[List[Dict[str, object]], int, int]:
-    total = len(items)
-    total_pages = max(1, (total + per_page - 1) // per_page)
-    page = max(1, min(page, total_pages))
-    start = (page - 1) * per_page
-    return items[start : start + per_page], page, total_pages
-
-
 def _trim(value: str | None, field: str, required: bool = True) -> str | None:
     text = (value or "").strip()
     if not text:
@@ -42,14 +35,11 @@ def _build_data(form) -> Dict[str, object]:
 @bp.get("/")
 @login_required
 def index():
-    page = int(request.args.get("page", 1) or 1)
-    registros = ubicacion_dao.listar()
-    paginated, page, total_pages = _paginate(registros, page)
+    pagination = ubicacion_dao.listar_pagina(page_number(request.args))
     return render_template(
         "ubicacion/index.html",
-        registros=paginated,
-        page=page,
-        total_pages=total_pages,
+        registros=pagination.items,
+        pagination=pagination,
     )
 
 
@@ -3,25 +3,18 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict
 
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import login_required
 
 from src.models import usuario_dao
+from src.utils.pagination import page_number
 
 
 bp = Blueprint("usuario", __name__, url_prefix="/usuario")
 
 
-def _paginate(items: List[Dict[str, object]], page: int, per_page: int = 10) -> Tuple[List[Dict[str, object]], int, int]:
-    total = len(items)
-    total_pages = max(1, (total + per_page - 1) // per_page)
-    page = max(1, min(page, total_pages))
-    start = (page - 1) * per_page
-    return items[start : start + per_page], page, total_pages
-
-
 def _trim(value: str | None, field: str, required: bool = True) -> str | None:
     text = (value or "").strip()
     if not text:
@@ -66,19 +59,12 @@ def _build_data(form) -> Dict[str, object]:
 @bp.get("/")
 @login_required
 def index():
-    page = int(request.args.get("page", 1) or 1)
     search = request.args.get("q", "").strip().lower()
-    usuarios = usuario_dao.listar()
-    if search:
-        usuarios = [
-            u for u in usuarios if search in (u.get("NOMBRE") or "").lower()
-        ]
-    paginated, page, total_pages = _paginate(usuarios, page)
+    pagination = usuario_dao.listar_pagina(page_number(request.args), search=search or None)
     return render_template(
         "usuario/index.html",
-        usuarios=paginated,
-        page=page,
-        total_pages=total_pages,
+        usuarios=pagination.items,
+        pagination=pagination,
         search=search,
     )
 
@@ -0,0 +1,106 @@
+"""Fetch independent catalog lists for a form page in parallel."""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, TypeVar
+
+from config import Config
+from src.models import db
+from src.services import timing
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_reserved = 0
+
+
+def _workers(config: Config) -> int:
+    # Each worker holds a pooled connection while it runs; leave room for
+    # the request threads themselves.
+    return config.CATALOG_WORKERS or max(1, config.ORACLE_POOL_MAX // 2)
+
+
+def _get_executor() -> Optional[ThreadPoolExecutor]:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = _workers(Config())
+                if workers > 1 or Config().CATALOG_WORKERS:
+                    _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="catalog")
+    return _executor
+
+
+def _reserve(wanted: int) -> int:
+    """Claim up to ``wanted`` helper threads that the pool can serve right now.
+
+    Every helper needs a pooled session of its own while the calling thread
+    keeps (or will need) one, so helpers are capped at the free sessions
+    minus one, minus helpers other requests have already claimed.  Zero
+    means "run everything on the calling thread", which is what avoids a
+    request waiting on helpers that wait on the pool it is holding.
+    """
+
+    global _reserved
+    status = db.pool_status()
+    with _lock:
+        free = int(status["max"]) - int(status["busy"]) - _reserved - 1
+        granted = max(0, min(wanted, free))
+        _reserved += granted
+    return granted
+
+
+def _release(count: int) -> None:
+    global _reserved
+    with _lock:
+        _reserved -= count
+
+
+def load_parallel(loaders: Dict[str, Callable[[], T]]) -> Dict[str, T]:
+    """Run every loader and return ``{name: result}``.
+
+    The first loader runs on the calling thread and the rest on a shared
+    pool, so page latency tracks the slowest query instead of the sum.
+    Only as many loaders go to the pool as it has free DB sessions for
+    (see :func:`_reserve`); the others run on the calling thread too.
+    Loaders run outside the request context: they get their own pooled
+    connections and must not rely on ``flask.g``; their statements still
+    count towards the request's Server-Timing.  The first exception is
+    re-raised once every loader has finished.
+    """
+
+    items = list(loaders.items())
+    executor = _get_executor() if len(items) > 1 else None
+    helpers = _reserve(len(items) - 1) if executor is not None else 0
+    if not helpers:
+        return {name: loader() for name, loader in items}
+
+    sink = timing.current_sink()
+    results: Dict[str, T] = {}
+    error: Optional[BaseException] = None
+    try:
+        remote = items[1 : 1 + helpers]
+        local = items[:1] + items[1 + helpers :]
+        futures = [(name, executor.submit(_run, sink, loader)) for name, loader in remote]
+        for name, loader in local:
+            try:
+                results[name] = loader()
+            except BaseException as exc:  # noqa: BLE001 - re-raised after the others finish
+                error = error or exc
+        for name, future in futures:
+            try:
+                results[name] = future.result()
+            except BaseException as exc:  # noqa: BLE001
+                error = error or exc
+    finally:
+        _release(helpers)
+    if error is not None:
+        raise error
+    return {name: results[name] for name, _ in items}
+
+
+def _run(sink: Optional[Dict[str, float]], loader: Callable[[], T]) -> T:
+    with timing.bind(sink):
+        return loader()
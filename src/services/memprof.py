@@ -0,0 +1,119 @@
+"""tracemalloc snapshots around a single in-process request.
+
+``/admin/memory?path=/prestamo/`` and ``flask mem profile /prestamo/`` replay the
+route through the test client, diff the snapshots taken before and after it
+and report the top allocation sites.  Other threads keep allocating while the
+request runs, so numbers from a busy worker include some noise.
+"""
+from __future__ import annotations
+
+import gc
+import json
+import linecache
+import tracemalloc
+from typing import Dict, List, Optional
+
+import click
+from flask import Flask, current_app
+from flask.cli import AppGroup, with_appcontext
+
+KEYS = ("lineno", "traceback", "filename")
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, linecache.__file__),
+)
+
+cli = AppGroup("mem", help="Memory profiling helpers.")
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+
+def measure_route(
+    app: Flask,
+    path: str,
+    method: str = "GET",
+    headers: Optional[Dict[str, str]] = None,
+    user_id: Optional[str] = None,
+    key: str = "lineno",
+    limit: int = 20,
+    frames: int = 10,
+) -> Dict[str, object]:
+    """Run ``method path`` once and return the allocation diff it caused.
+
+    ``user_id`` logs the replayed request in as that user; otherwise the
+    caller's ``headers`` (e.g. its session cookie) decide authentication.
+    """
+
+    key = key if key in KEYS else "lineno"
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(frames)
+    try:
+        # A fresh app context gives the replayed request its own ``g``; otherwise,
+        # when called from a live request (``/admin/memory``), Flask reuses the
+        # caller's app context and the replay's teardown releases the caller's
+        # DB connection, timing and login state.
+        with app.app_context():
+            client = app.test_client()
+            if user_id is not None:
+                with client.session_transaction() as session:
+                    session["_user_id"] = str(user_id)
+                    session["_fresh"] = True
+
+            tracemalloc.reset_peak()
+            before = _snapshot()
+            base, _ = tracemalloc.get_traced_memory()
+            response = client.open(path, method=method, headers=headers or {})
+            body = response.get_data()  # consume streamed bodies inside the window
+            _, peak = tracemalloc.get_traced_memory()
+            after = _snapshot()
+            response.close()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+    diff = after.compare_to(before, key)
+    top: List[Dict[str, object]] = []
+    for stat in diff[:limit]:
+        frame = stat.traceback[0]
+        top.append(
+            {
+                "site": f"{frame.filename}:{frame.lineno}",
+                "code": linecache.getline(frame.filename, frame.lineno).strip(),
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "size_kb": round(stat.size / 1024, 1),
+                "count_diff": stat.count_diff,
+                "traceback": [f"{f.filename}:{f.lineno}" for f in stat.traceback] if key == "traceback" else None,
+            }
+        )
+    return {
+        "path": path,
+        "status": response.status_code,
+        "bytes": len(body),
+        "key": key,
+        "net_kb": round(sum(stat.size_diff for stat in diff) / 1024, 1),
+        "peak_kb": round((peak - base) / 1024, 1),
+        "top": top,
+    }
+
+
+@cli.command("profile")
+@click.argument("path")
+@click.option("--method", default="GET", show_default=True)
+@click.option("--user-id", default=None, help="Log the request in as this ID_USUARIO.")
+@click.option("--key", type=click.Choice(KEYS), default="lineno", show_default=True)
+@click.option("--limit", default=20, show_default=True)
+@click.option("--frames", default=10, show_default=True, help="Traceback depth recorded by tracemalloc.")
+@with_appcontext
+def profile_command(path: str, method: str, user_id: Optional[str], key: str, limit: int, frames: int) -> None:
+    """Report the top allocation sites of one request to PATH."""
+
+    report = measure_route(
+        current_app, path, method=method, user_id=user_id, key=key, limit=limit, frames=frames
+    )
+    click.echo(json.dumps(report, indent=2, ensure_ascii=False))
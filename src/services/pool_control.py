@@ -0,0 +1,146 @@
+"""Adaptive pool sizing from observed acquire wait times and utilisation."""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from config import Config
+from src.models import db
+
+logger = logging.getLogger(__name__)
+
+
+class PoolController:
+    """Grow ``max`` while callers wait for connections, shrink it back when idle.
+
+    Each tick compares the acquire histogram and shed counter with the
+    previous tick, so decisions use the last interval only.  ``max`` never
+    leaves ``[floor, ceiling]``.  While :attr:`paused` (after a manual resize
+    through ``POST /admin/pool``) ticks only observe and never resize.
+    """
+
+    def __init__(
+        self,
+        floor: int,
+        ceiling: int,
+        interval: float = 15.0,
+        grow_wait_ms: float = 50.0,
+        grow_utilisation: float = 0.9,
+        shrink_utilisation: float = 0.5,
+        calm_ticks: int = 4,
+        step: int = 1,
+    ) -> None:
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.interval = interval
+        self.grow_wait_ms = grow_wait_ms
+        self.grow_utilisation = grow_utilisation
+        self.shrink_utilisation = shrink_utilisation
+        self.calm_ticks = calm_ticks
+        self.step = step
+        self.paused = False
+        self.last: Dict[str, object] = {}
+        self._seen = db.POOL_ACQUIRE_SECONDS.totals()
+        self._seen_shed = db.POOL_SHED.total()
+        self._calm = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def tick(self) -> Optional[int]:
+        """Evaluate the last interval; return the new ``max`` if it changed."""
+
+        count, total = db.POOL_ACQUIRE_SECONDS.totals()
+        shed = db.POOL_SHED.total()
+        acquires = count - self._seen[0]
+        wait_ms = (total - self._seen[1]) / acquires * 1000 if acquires else 0.0
+        shed_delta = shed - self._seen_shed
+        self._seen, self._seen_shed = (count, total), shed
+
+        status = db.pool_status()
+        current = int(status["max"]) or self.floor
+        utilisation = int(status["busy"]) / current if current else 0.0
+        self.last = {
+            "acquires": acquires,
+            "wait_ms": round(wait_ms, 3),
+            "shed": shed_delta,
+            "utilisation": round(utilisation, 3),
+            "max": current,
+        }
+
+        if self.paused:
+            return None
+        target = current
+        pressured = wait_ms >= self.grow_wait_ms or utilisation >= self.grow_utilisation or shed_delta > 0
+        if pressured:
+            self._calm = 0
+            target = min(self.ceiling, current + self.step)
+        elif wait_ms < self.grow_wait_ms / 10 and utilisation < self.shrink_utilisation:
+            self._calm += 1
+            if self._calm >= self.calm_ticks:
+                self._calm = 0
+                target = max(self.floor, current - self.step)
+        else:
+            self._calm = 0
+
+        if target == current:
+            return None
+        db.resize_pool(max_size=target, source="auto")
+        return target
+
+    def check_bounds(self, floor: Optional[int] = None, ceiling: Optional[int] = None) -> Tuple[int, int]:
+        """The ``(floor, ceiling)`` :meth:`set_bounds` would apply; ``ValueError`` if invalid."""
+
+        floor = self.floor if floor is None else floor
+        ceiling = self.ceiling if ceiling is None else ceiling
+        if floor < 1 or ceiling < floor:
+            raise ValueError("Límites inválidos: se requiere 1 <= floor <= ceiling.")
+        return floor, ceiling
+
+    def set_bounds(self, floor: Optional[int] = None, ceiling: Optional[int] = None) -> None:
+        """Move ``[floor, ceiling]``; the next tick steps ``max`` towards it."""
+
+        self.floor, self.ceiling = self.check_bounds(floor, ceiling)
+        self._calm = 0
+
+    def state(self) -> Dict[str, object]:
+        return {"floor": self.floor, "ceiling": self.ceiling, "paused": self.paused, "last": self.last}
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as exc:  # noqa: BLE001 - keep the controller alive
+                logger.warning("Pool controller tick failed: %s", exc)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pool-controller", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_controller: Optional[PoolController] = None
+
+
+def controller() -> Optional[PoolController]:
+    return _controller
+
+
+def start(config: Optional[Config] = None) -> Optional[PoolController]:
+    """Start the background controller when ``POOL_AUTOSIZE`` is enabled."""
+
+    global _controller
+    config = config or Config()
+    if not config.POOL_AUTOSIZE or _controller is not None:
+        return _controller
+    _controller = PoolController(
+        floor=config.POOL_AUTOSIZE_FLOOR or config.ORACLE_POOL_MAX,
+        ceiling=config.POOL_AUTOSIZE_CEILING,
+        interval=config.POOL_AUTOSIZE_INTERVAL,
+        grow_wait_ms=config.POOL_GROW_WAIT_MS,
+    )
+    _controller.start()
+    return _controller
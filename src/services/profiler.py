@@ -0,0 +1,231 @@
+"""On-demand and 1-in-N request profiling with collapsed-stack output.
+
+``?_profile=sample`` (or the ``X-Profile`` header) samples the request thread's
+stack every ``PROFILE_INTERVAL_MS`` and returns a ``.folded`` file that
+flamegraph.pl / speedscope read directly.  ``?_profile=cprofile`` uses the
+deterministic profiler instead and returns the same format, rebuilt from the
+``pstats`` caller edges with microseconds as counts.  Both are admin-only.  With
+``PROFILE_SAMPLE_EVERY = N`` every Nth request is sampled in the background into
+a rolling buffer served by ``/admin/profile``.
+"""
+from __future__ import annotations
+
+import cProfile
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from flask import Response, current_app, g, request
+
+from src.routes.auth import is_admin
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_labels: Dict[object, str] = {}
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if filename.startswith(_ROOT):
+            filename = os.path.relpath(filename, _ROOT)
+        label = _labels.setdefault(code, f"{code.co_name} ({filename}:{code.co_firstlineno})")
+    return label
+
+
+def collapse(frame) -> str:
+    """Return ``frame``'s stack root-first, ``;``-separated."""
+
+    parts = []
+    while frame is not None:
+        parts.append(_label(frame.f_code))
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+def _func_label(func: Tuple[str, int, str]) -> str:
+    filename, lineno, name = func
+    if filename == "~":  # built-ins
+        return name
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    return f"{name} ({filename}:{lineno})"
+
+
+def folded_from_profile(profile: cProfile.Profile, max_depth: int = 64) -> Counter:
+    """Collapsed stacks, in microseconds of self time, from a ``cProfile`` run.
+
+    cProfile only records caller -> callee edges, so stacks are rebuilt by
+    walking down from the roots (functions whose time is not covered by
+    profiled callers) and splitting each function's time among the paths
+    that reach it in proportion to the edge's cumulative time.
+    Recursion is cut at the first repeat of a function in the path.
+    """
+
+    stats = pstats.Stats(profile).stats  # type: ignore[attr-defined]
+    callees: Dict[Tuple, List[Tuple[Tuple, float]]] = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    stacks: Counter = Counter()
+
+    def walk(func: Tuple, budget: float, path: List[str], seen: set) -> None:
+        _, _, self_time, cumulative, _ = stats[func]
+        share = budget / cumulative if cumulative else 0.0
+        path.append(_func_label(func))
+        micros = int(round(self_time * share * 1_000_000))
+        if micros:
+            stacks[";".join(path)] += micros
+        if len(path) < max_depth:
+            seen.add(func)
+            for callee, edge_time in callees.get(func, ()):
+                child = edge_time * share
+                if callee not in seen and callee in stats and child * 1_000_000 >= 1:
+                    walk(callee, child, path, seen)
+            seen.discard(func)
+        path.pop()
+
+    for func, (_, _, _, cumulative, callers) in stats.items():
+        # Time not explained by a profiled caller (e.g. the view function,
+        # called from a frame entered before profiling started) is a root.
+        called = sum(edge[3] for caller, edge in callers.items() if caller != func)
+        if (cumulative - called) * 1_000_000 >= 1:
+            walk(func, cumulative - called, [], set())
+    return stacks
+
+
+def render_folded(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class StackSampler:
+    """Sample one thread's stack from a helper thread until stopped."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+class ProfileBuffer:
+    """Rolling buffer of sampled requests: ``(timestamp, endpoint, stacks)``."""
+
+    def __init__(self, size: int) -> None:
+        self._items: Deque[Tuple[float, str, Counter]] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, endpoint: str, stacks: Counter) -> None:
+        with self._lock:
+            self._items.append((time.time(), endpoint, stacks))
+
+    def merged(self, endpoint: Optional[str] = None) -> Tuple[int, Counter]:
+        with self._lock:
+            items: Iterable = list(self._items)
+        total: Counter = Counter()
+        requests = 0
+        for _, name, stacks in items:
+            if endpoint and name != endpoint:
+                continue
+            requests += 1
+            total.update(stacks)
+        return requests, total
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+buffer = ProfileBuffer(100)
+_counter = itertools.count(1)
+
+
+def _requested_mode() -> Optional[str]:
+    mode = request.args.get("_profile") or request.headers.get("X-Profile")
+    if not mode:
+        return None
+    mode = "cprofile" if mode.lower() == "cprofile" else "sample"
+    return mode if is_admin() else None
+
+
+def _start() -> None:
+    config = current_app.config
+    interval = (config.get("PROFILE_INTERVAL_MS") or 5) / 1000.0
+    mode = _requested_mode()
+    if mode == "cprofile":
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiler is active in this interpreter
+            mode = "sample"
+        else:
+            g._profile = ("cprofile", profile)
+            return
+    if mode is None:
+        every = config.get("PROFILE_SAMPLE_EVERY") or 0
+        if not every or next(_counter) % every:
+            return
+        mode = "background"
+    g._profile = (mode, StackSampler(threading.get_ident(), interval).start())
+
+
+def _finish(response: Response) -> Response:
+    active = g.pop("_profile", None)
+    if active is None:
+        return response
+    mode, collector = active
+    if mode == "background":
+        buffer.add(request.endpoint or request.path, collector.stop())
+        return response
+
+    if response.is_streamed:
+        # Render the streamed body now so it is part of the profile.
+        response.get_data()
+    name = (request.endpoint or "request").replace(".", "_")
+    if mode == "cprofile":
+        collector.disable()
+        body, filename = render_folded(folded_from_profile(collector)), f"{name}.cprofile.folded"
+    else:
+        body, filename = render_folded(collector.stop()), f"{name}.folded"
+    result = Response(body, mimetype="text/plain")
+    result.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    result.headers["X-Profiled-Status"] = str(response.status_code)
+    return result
+
+
+def _abandon(exc: Optional[BaseException] = None) -> None:
+    # after_request is skipped when the view raises; never leave a sampler running.
+    active = g.pop("_profile", None)
+    if active is not None:
+        mode, collector = active
+        collector.disable() if mode == "cprofile" else collector.stop()
+
+
+def init_app(app) -> None:
+    global buffer
+    buffer = ProfileBuffer(app.config.get("PROFILE_BUFFER") or 100)
+    app.before_request(_start)
+    app.after_request(_finish)
+    app.teardown_request(_abandon)
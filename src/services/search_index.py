@@ -0,0 +1,572 @@
+"""In-process inverted index with BM25 ranking for the public catalog search.
+
+Documents are the rows of :func:`libro_dao.iter_busqueda` (TITULO, SUBTITULO,
+DESCRIPCION, ISBN, editorial and genero).  Text is folded with
+:func:`src.utils.text.fold`, split into words and weighted per field.  Partial
+words are resolved through a trigram map over the *vocabulary* (not over every
+document), so ``"quij"`` or ``"otic"`` find ``quijote`` at a cost proportional
+to the number of distinct words.  ISBNs are indexed by their dash-separated
+parts; whole-ISBN lookups belong to the SQL path (``libro_dao.search_filter``).
+
+The index lives in each worker.  It is built from a streaming scan when the
+app starts (``SEARCH_INDEX``) and kept current through ``libro_dao`` listeners,
+which re-read changed books on a background thread once their transaction
+commits.  Writes made by *other* workers are picked up every
+``SEARCH_POLL_SECONDS`` by asking LIBRO for rows whose ``ORA_ROWSCN`` moved
+past the last one seen and re-reading just those; books deleted elsewhere stay
+in the index (search results are re-read, so they are not shown) until the next
+full rebuild.  ``SEARCH_MAX_AGE`` (off by default) adds a periodic full
+rebuild, and ``POST /admin/search`` rebuilds the worker that receives it.
+``flask search rebuild`` builds an index in the CLI process only, to check
+that the scan works and how long it takes.
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+import queue
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from operator import itemgetter
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import click
+from flask.cli import AppGroup, with_appcontext
+
+from src.models import db, libro_dao
+from src.utils.text import fold
+
+logger = logging.getLogger(__name__)
+cli = AppGroup("search", help="Catalog search index.")
+
+FIELD_WEIGHTS: Dict[str, float] = {
+    "TITULO": 3.0,
+    "SUBTITULO": 2.0,
+    "ISBN": 3.0,
+    "EDITORIAL": 1.0,
+    "GENERO": 1.0,
+    "DESCRIPCION": 1.0,
+}
+STOPWORDS = frozenset(
+    "a al con de del el en la las lo los o para por que se su sus un una uno unos unas y e u the of and".split()
+)
+GRAM = 3
+MAX_EXPANSIONS = 64
+PARTIAL_WEIGHT = 0.7
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: object) -> List[str]:
+    """Folded words of ``text`` without Spanish/English stopwords."""
+
+    if text is None:
+        return []
+    return [word for word in _WORD.findall(fold(str(text))) if word not in STOPWORDS]
+
+
+def _grams(term: str) -> Set[str]:
+    return {term[pos : pos + GRAM] for pos in range(len(term) - GRAM + 1)}
+
+
+class SearchIndex:
+    """Inverted index over dense document slots with BM25 scoring.
+
+    Postings are two parallel ``array`` objects per term, about 8 bytes per
+    entry: the slot and its BM25 impact ``tf / (tf + k1 * (1 - b + b * len / avgdl))``.
+    Slots are always sorted because every (re)indexed document takes the next
+    one; removing a document leaves its slot unused until the next rebuild.
+    Impacts use the average length seen when they were computed and are
+    recomputed by :meth:`reweight` once it drifts by more than ``DRIFT``.
+    """
+
+    DRIFT = 0.1
+    # Renumber slots once this share of them (and at least COMPACT_MIN) is unused
+    COMPACT_RATIO = 0.25
+    COMPACT_MIN = 1024
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._term_ids: Dict[str, int] = {}
+        self._terms: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._docs: List[array] = []
+        self._impacts: List[array] = []
+        self._grams: Dict[str, Set[int]] = {}
+        self._slots: Dict[int, int] = {}
+        self._doc_ids = array("q")
+        self._doc_len = array("f")
+        self._doc_start = array("Q")
+        self._doc_terms = array("I")
+        self._flat = array("I")
+        self._total_len = 0.0
+        self._avgdl = 0.0
+        self.auto_reweight = True
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    # -- maintenance -------------------------------------------------------
+
+    def add(self, doc_id: int, fields: Mapping[str, object]) -> None:
+        """Index ``fields`` (column -> text) as ``doc_id``, replacing any previous version."""
+
+        weights: Dict[str, float] = {}
+        for name, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields.get(name)):
+                weights[token] = weights.get(token, 0.0) + weight
+        with self._lock:
+            self._remove(doc_id)
+            if not weights:
+                return
+            length = sum(weights.values())
+            if not self._avgdl:
+                self._avgdl = length
+            slot = len(self._doc_ids)
+            self._slots[doc_id] = slot
+            self._doc_ids.append(doc_id)
+            self._doc_start.append(len(self._flat))
+            self._doc_terms.append(len(weights))
+            self._doc_len.append(length)
+            self._total_len += length
+            norm = self.k1 * (1 - self.b + self.b * length / self._avgdl)
+            for term, tf in weights.items():
+                term_id = self._term_ids.get(term)
+                if term_id is None:
+                    term_id = self._new_term(term)
+                self._docs[term_id].append(slot)
+                self._impacts[term_id].append(tf / (tf + norm))
+                self._flat.append(term_id)
+            if self.auto_reweight and abs(self._total_len / len(self._slots) - self._avgdl) > self.DRIFT * self._avgdl:
+                self.reweight()
+            self._maybe_compact()
+
+    def reweight(self) -> None:
+        """Recompute every impact for the current average document length."""
+
+        with self._lock:
+            if not self._slots:
+                return
+            old, new = self._avgdl, self._total_len / len(self._slots)
+            k1, b, doc_len = self.k1, self.b, self._doc_len
+            for term_id, docs in enumerate(self._docs):
+                impacts = self._impacts[term_id]
+                for pos, slot in enumerate(docs):
+                    # invert the old impact back to tf, then apply the new norm
+                    length = doc_len[slot]
+                    before = k1 * (1 - b + b * length / old)
+                    impact = impacts[pos]
+                    tf = impact * before / (1 - impact)
+                    impacts[pos] = tf / (tf + k1 * (1 - b + b * length / new))
+            self._avgdl = new
+
+    def _new_term(self, term: str) -> int:
+        if self._free:
+            term_id = self._free.pop()
+            self._terms[term_id] = term
+        else:
+            term_id = len(self._terms)
+            self._terms.append(term)
+            self._docs.append(array("I"))
+            self._impacts.append(array("f"))
+        self._term_ids[term] = term_id
+        for gram in _grams(term):
+            self._grams.setdefault(gram, set()).add(term_id)
+        return term_id
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._remove(doc_id)
+            self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        unused = len(self._doc_ids) - len(self._slots)
+        if unused >= self.COMPACT_MIN and unused > self.COMPACT_RATIO * len(self._doc_ids):
+            self.compact()
+
+    def compact(self) -> None:
+        """Renumber live documents into dense slots, dropping the unused ones.
+
+        Removed and re-indexed documents leave their old slot behind; this
+        rewrites the per-slot arrays and every posting list in one pass,
+        keeping postings sorted because live slots keep their relative order.
+        """
+
+        with self._lock:
+            live = sorted(self._slots.values())
+            remap = [0] * len(self._doc_ids)
+            doc_ids, doc_len, doc_start, doc_terms, flat = array("q"), array("f"), array("Q"), array("I"), array("I")
+            for new, old in enumerate(live):
+                remap[old] = new
+                start, terms = self._doc_start[old], self._doc_terms[old]
+                doc_ids.append(self._doc_ids[old])
+                doc_len.append(self._doc_len[old])
+                doc_start.append(len(flat))
+                doc_terms.append(terms)
+                flat.extend(self._flat[start : start + terms])
+            self._docs = [array("I", map(remap.__getitem__, docs)) for docs in self._docs]
+            self._slots = {doc_id: remap[slot] for doc_id, slot in self._slots.items()}
+            self._doc_ids, self._doc_len, self._doc_start = doc_ids, doc_len, doc_start
+            self._doc_terms, self._flat = doc_terms, flat
+
+    def _remove(self, doc_id: int) -> None:
+        slot = self._slots.pop(doc_id, None)
+        if slot is None:
+            return
+        start = self._doc_start[slot]
+        for term_id in self._flat[start : start + self._doc_terms[slot]]:
+            docs = self._docs[term_id]
+            pos = bisect_left(docs, slot)
+            if pos < len(docs) and docs[pos] == slot:
+                del docs[pos]
+                del self._impacts[term_id][pos]
+            if not docs:
+                term = self._terms[term_id]
+                del self._term_ids[term]
+                self._terms[term_id] = None
+                for gram in _grams(term):
+                    bucket = self._grams.get(gram)
+                    if bucket is not None:
+                        bucket.discard(term_id)
+                        if not bucket:
+                            del self._grams[gram]
+                self._free.append(term_id)
+        self._total_len -= self._doc_len[slot]
+        self._doc_len[slot] = 0.0
+
+    # -- querying ----------------------------------------------------------
+
+    def _expand(self, token: str) -> List[Tuple[int, float]]:
+        """The indexed terms ``token`` stands for, as ``(term_id, weight)``."""
+
+        out: List[Tuple[int, float]] = []
+        exact = self._term_ids.get(token)
+        if exact is not None:
+            out.append((exact, 1.0))
+        if len(token) < GRAM or token.isdigit():
+            # numbers (ISBN parts, years) only match whole
+            return out
+        buckets = [self._grams.get(gram) for gram in _grams(token)]
+        if any(bucket is None for bucket in buckets):
+            return out
+        buckets.sort(key=len)
+        candidates = set(buckets[0]).intersection(*buckets[1:])
+        terms = self._terms
+        partial = [term_id for term_id in candidates if term_id != exact and token in terms[term_id]]
+        # keep the most frequent expansions when a fragment is very common
+        partial = heapq.nlargest(MAX_EXPANSIONS, partial, key=lambda term_id: len(self._docs[term_id]))
+        out.extend((term_id, PARTIAL_WEIGHT) for term_id in partial)
+        return out
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[Tuple[int, float]]]:
+        """Return ``(matches, [(doc_id, score), ...])`` for docs containing every query word.
+
+        Each word matches itself or, with a lower weight, any indexed word
+        that contains it.
+        """
+
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return 0, []
+        with self._lock:
+            count = len(self._slots)
+            if not count:
+                return 0, []
+            groups = []
+            for token in tokens:
+                expansions = self._expand(token)
+                if not expansions:
+                    return 0, []
+                groups.append(expansions)
+            # Rarest word first: its postings bound the candidate set.
+            groups.sort(key=lambda group: sum(len(self._docs[term_id]) for term_id, _ in group))
+            scores: Dict[int, float] = {}
+            for position, group in enumerate(groups):
+                contribution = self._score_group(group, count, scores if position else None)
+                if position == 0:
+                    scores = contribution
+                else:
+                    scores = {slot: score + contribution[slot] for slot, score in scores.items() if slot in contribution}
+                if not scores:
+                    return 0, []
+            top = heapq.nlargest(offset + limit, scores.items(), key=itemgetter(1))
+            doc_ids = self._doc_ids
+            return len(scores), [(doc_ids[slot], score) for slot, score in top[offset:]]
+
+    def _score_group(
+        self,
+        group: List[Tuple[int, float]],
+        count: int,
+        candidates: Optional[Dict[int, float]],
+    ) -> Dict[int, float]:
+        """Score of each doc for one query word: its best-scoring expansion.
+
+        Taking the best rather than the sum keeps "quijote" and "quijotesco"
+        from adding up for the query "quijot".
+        """
+
+        best: Dict[int, float] = {}
+        # Most frequent expansion first so the common case is one C-level dict build
+        for term_id, weight in sorted(group, key=lambda item: -len(self._docs[item[0]])):
+            docs, impacts = self._docs[term_id], self._impacts[term_id]
+            df = len(docs)
+            scale = math.log(1.0 + (count - df + 0.5) / (df + 0.5)) * weight * (self.k1 + 1)
+            if candidates is None:
+                scored = dict(zip(docs, map(scale.__mul__, impacts)))
+            elif len(candidates) * 8 < df:
+                scored = {}
+                for slot in candidates:
+                    pos = bisect_left(docs, slot)
+                    if pos < df and docs[pos] == slot:
+                        scored[slot] = scale * impacts[pos]
+            else:
+                scored = {slot: scale * impact for slot, impact in zip(docs, impacts) if slot in candidates}
+            if not best:
+                best = scored
+                continue
+            for slot, score in scored.items():
+                if score > best.get(slot, 0.0):
+                    best[slot] = score
+        return best
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "docs": len(self._slots),
+                "terms": len(self._term_ids),
+                "postings": sum(len(docs) for docs in self._docs),
+                "grams": len(self._grams),
+                "unused_slots": len(self._doc_ids) - len(self._slots),
+            }
+
+
+_index = SearchIndex()
+_state: Dict[str, object] = {"built_at": None, "build_seconds": None, "building": False}
+_state_lock = threading.Lock()
+_build_lock = threading.Lock()
+_dirty: Set[int] = set()
+_max_age = 0.0
+_poll_seconds = 0.0
+_updates: "queue.Queue[int]" = queue.Queue()
+_updater: Optional[threading.Thread] = None
+# ORA_ROWSCN watermark of the current index; None until the first build
+_scn: Optional[int] = None
+
+
+def index() -> SearchIndex:
+    return _index
+
+
+def build(rows: Iterable[Mapping[str, object]]) -> SearchIndex:
+    fresh = SearchIndex()
+    fresh.auto_reweight = False
+    for row in rows:
+        fresh.add(int(row["ID_LIBRO"]), row)
+    fresh.reweight()
+    fresh.auto_reweight = True
+    return fresh
+
+
+def _refresh(id_libro: int) -> None:
+    rows = list(libro_dao.iter_busqueda(id_libro))
+    if rows:
+        _index.add(id_libro, rows[0])
+    else:
+        _index.remove(id_libro)
+
+
+def rebuild(block: bool = True) -> Dict[str, object]:
+    """Rebuild from a streaming scan of LIBRO and swap it in.
+
+    Books written while the scan runs are re-read afterwards, so the swap
+    never loses an update.  With ``block=False`` a build already in progress
+    raises ``RuntimeError`` instead of being waited for.
+    """
+
+    if not _build_lock.acquire(blocking=block):
+        raise RuntimeError("Ya hay una reconstrucción del índice en curso.")
+    return _rebuild_locked()
+
+
+def _rebuild_locked() -> Dict[str, object]:
+    # Caller holds _build_lock; released here.
+    global _index, _scn
+    try:
+        with _state_lock:
+            _state["building"] = True
+            _dirty.clear()
+        started = time.perf_counter()
+        try:
+            # Taken before the scan: rows changed meanwhile are polled again
+            scn = libro_dao.ultimo_cambio() if _poll_seconds else None
+            fresh = build(libro_dao.iter_busqueda())
+            with _state_lock:
+                _index = fresh
+                _scn = scn
+                pending = set(_dirty)
+                _dirty.clear()
+        finally:
+            with _state_lock:
+                _state["building"] = False
+        for id_libro in pending:
+            _refresh(id_libro)
+        _state["built_at"] = time.time()
+        _state["build_seconds"] = round(time.perf_counter() - started, 3)
+    finally:
+        _build_lock.release()
+    return status()
+
+
+def wait_ready() -> None:
+    """Block until a build in progress (e.g. the startup one) finishes."""
+
+    with _build_lock:
+        pass
+
+
+def status() -> Dict[str, object]:
+    return {**_index.stats(), **_state}
+
+
+def _on_libro(event: str, id_libro: int) -> None:
+    # Inside db.transaction() wait for the commit: a rollback changes nothing
+    # and the re-read must see the committed row.
+    db.after_commit(lambda: _apply(event, id_libro))
+
+
+def _apply(event: str, id_libro: int) -> None:
+    global _updater
+    with _state_lock:
+        if _state["building"]:
+            _dirty.add(id_libro)
+        if event != "eliminar" and _updater is None:
+            _updater = threading.Thread(target=_apply_updates, name="search-index-updates", daemon=True)
+            _updater.start()
+    if event == "eliminar":
+        _index.remove(id_libro)
+    else:
+        # Re-reading the book is a query; keep it off the writer's request
+        _updates.put(id_libro)
+
+
+def _apply_updates() -> None:
+    while True:
+        id_libro = _updates.get()
+        try:
+            _refresh(id_libro)
+        except Exception as exc:  # noqa: BLE001 - the next rebuild catches up
+            logger.warning("No se pudo actualizar el libro %s en el índice de búsqueda: %s", id_libro, exc)
+        finally:
+            _updates.task_done()
+
+
+def poll_changes() -> int:
+    """Queue books changed since the last poll (by any worker) for re-reading."""
+
+    global _scn
+    with _state_lock:
+        scn = _scn
+    if scn is None:
+        return 0
+    changed = libro_dao.cambios_desde(scn)
+    for id_libro, _ in changed:
+        _apply("actualizar", id_libro)
+    with _state_lock:
+        if _scn == scn and changed:  # a rebuild meanwhile set its own watermark
+            _scn = max(row_scn for _, row_scn in changed)
+    return len(changed)
+
+
+def _poll_loop() -> None:
+    while True:
+        time.sleep(_poll_seconds)
+        try:
+            poll_changes()
+        except Exception as exc:  # noqa: BLE001 - try again on the next tick
+            logger.warning("No se pudo consultar los cambios de LIBRO para el índice de búsqueda: %s", exc)
+
+
+def search(query: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[Tuple[int, float]]]:
+    built_at = _state["built_at"]
+    if _max_age and built_at is not None and time.time() - built_at > _max_age:  # type: ignore[operator]
+        start_rebuild()  # no-op while a build is already running
+    return _index.search(query, limit, offset)
+
+
+def _build_in_background() -> None:
+    try:
+        stats = _rebuild_locked()
+        logger.info("Índice de búsqueda listo: %s documentos en %ss", stats["docs"], stats["build_seconds"])
+    except Exception as exc:  # noqa: BLE001 - searches keep using the previous index
+        logger.warning("No se pudo construir el índice de búsqueda: %s", exc)
+
+
+def start_rebuild() -> bool:
+    """Rebuild on a background thread; ``False`` if a build is already running."""
+
+    if not _build_lock.acquire(blocking=False):
+        return False
+    threading.Thread(target=_build_in_background, name="search-index", daemon=True).start()
+    return True
+
+
+def _serving() -> bool:
+    # Every `flask <command>` loads the app; only `flask run` serves requests
+    ctx = click.get_current_context(silent=True)
+    return ctx is None or ctx.info_name == "run"
+
+
+def install(app) -> None:
+    """Keep the index in sync with ``libro_dao`` and other workers' writes, and
+    build it once in the background (not for CLI commands)."""
+
+    global _max_age, _poll_seconds
+    app.cli.add_command(cli)
+    if not app.config.get("SEARCH_INDEX") or not _serving():
+        return
+    _max_age = float(app.config.get("SEARCH_MAX_AGE") or 0)
+    _poll_seconds = float(app.config.get("SEARCH_POLL_SECONDS") or 0)
+    libro_dao.add_listener(_on_libro)
+    start_rebuild()
+    if _poll_seconds:
+        threading.Thread(target=_poll_loop, name="search-index-poll", daemon=True).start()
+
+
+@cli.command("rebuild")
+@with_appcontext
+def rebuild_command() -> None:
+    """Build an index from LIBRO in this process and report its size and build time.
+
+    A check of the scan and its cost; serving workers keep their own index
+    (use ``POST /admin/search`` to rebuild one of them).
+    """
+
+    stats = rebuild()
+    click.echo(
+        f"{stats['docs']} documentos, {stats['terms']} términos, "
+        f"{stats['postings']} entradas en {stats['build_seconds']}s"
+    )
+
+
+@cli.command("query")
+@click.argument("text")
+@click.option("--limit", default=10, show_default=True)
+@with_appcontext
+def query_command(text: str, limit: int) -> None:
+    """Print the ranked IDs for TEXT, building the index first."""
+
+    wait_ready()
+    if not len(_index):
+        rebuild()
+    started = time.perf_counter()
+    total, hits = search(text, limit)
+    elapsed = (time.perf_counter() - started) * 1000
+    click.echo(f"{total} resultados en {elapsed:.2f} ms")
+    for doc_id, score in hits:
+        click.echo(f"{doc_id}\t{score:.3f}")
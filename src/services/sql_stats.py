@@ -0,0 +1,123 @@
+"""Statement statistics, slow-query log and per-request N+1 detection."""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Dict, List
+
+from flask import g, has_request_context, request
+
+from src.models import db
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("src.sql.slow")
+
+REPEATED_STATEMENTS = metrics.counter(
+    "db_repeated_statements_total",
+    "Requests where one statement fingerprint ran more than N_PLUS_ONE_THRESHOLD times.",
+    labels=("endpoint",),
+)
+STATEMENT_SECONDS = metrics.histogram("db_statement_seconds", "Statement execution time.")
+
+
+class StatementStats:
+    """Aggregated timings per SQL fingerprint for this process."""
+
+    SORT_KEYS = ("total", "count", "max", "mean", "rows")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, event: db.StatementEvent) -> None:
+        with self._lock:
+            entry = self._stats.get(event.fingerprint)
+            if entry is None:
+                entry = self._stats[event.fingerprint] = {
+                    "count": 0, "total": 0.0, "max": 0.0, "rows": 0, "errors": 0,
+                }
+            entry["count"] += 1
+            entry["total"] += event.elapsed
+            entry["rows"] += event.rows
+            if event.elapsed > entry["max"]:
+                entry["max"] = event.elapsed
+            if event.error:
+                entry["errors"] += 1
+
+    def snapshot(self, sort: str = "total", limit: int = 50) -> List[Dict[str, object]]:
+        with self._lock:
+            items = [(sql, dict(entry)) for sql, entry in self._stats.items()]
+        rows: List[Dict[str, object]] = []
+        for sql, entry in items:
+            entry["mean"] = entry["total"] / entry["count"] if entry["count"] else 0.0
+            rows.append({"sql": sql, **entry})
+        key = sort if sort in self.SORT_KEYS else "total"
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+stats = StatementStats()
+
+
+class _SlowLog:
+    def __init__(self, threshold_ms: float) -> None:
+        self.threshold = threshold_ms / 1000.0
+
+    def __call__(self, event: db.StatementEvent) -> None:
+        if event.elapsed >= self.threshold:
+            where = request.endpoint if has_request_context() else "-"
+            slow_logger.warning(
+                "%.1f ms rows=%d endpoint=%s%s sql=%s",
+                event.elapsed * 1000,
+                event.rows,
+                where,
+                f" error={event.error}" if event.error else "",
+                event.fingerprint,
+            )
+
+
+class _RepeatDetector:
+    """Warn once per request and fingerprint when it runs more than ``threshold`` times."""
+
+    def __init__(self, threshold: int) -> None:
+        self.threshold = threshold
+
+    def __call__(self, event: db.StatementEvent) -> None:
+        if not has_request_context():
+            return
+        counts = g.setdefault("_sql_counts", {})
+        seen = counts.get(event.fingerprint, 0) + 1
+        counts[event.fingerprint] = seen
+        if seen == self.threshold + 1:
+            endpoint = request.endpoint or "-"
+            REPEATED_STATEMENTS.inc(endpoint=endpoint)
+            logger.warning(
+                "Posible N+1 en %s: la sentencia se ejecutó más de %d veces: %s",
+                endpoint,
+                self.threshold,
+                event.fingerprint,
+            )
+
+
+def _observe(event: db.StatementEvent) -> None:
+    STATEMENT_SECONDS.observe(event.elapsed)
+    stats.record(event)
+
+
+def install(app) -> None:
+    """Register the statement hooks configured for ``app``."""
+
+    if not app.config.get("SQL_STATS"):
+        return
+    db.add_statement_hook(_observe)
+    slow_ms = app.config.get("SLOW_QUERY_MS") or 0
+    if slow_ms > 0:
+        db.add_statement_hook(_SlowLog(slow_ms))
+    threshold = app.config.get("N_PLUS_ONE_THRESHOLD") or 0
+    if threshold > 0:
+        db.add_statement_hook(_RepeatDetector(threshold))
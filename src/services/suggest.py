@@ -0,0 +1,278 @@
+"""Typeahead suggestions for libros and usuarios from in-memory prefix indexes.
+
+Each source keeps one sorted list of words: folded title words plus the
+compact ISBN for libros, name words plus the DPI for usuarios.  A keystroke is
+a bisect to the first word starting with the typed prefix and a short forward
+scan, instead of a ``LIKE`` round trip or a dropdown with every row.
+
+Indexes are built on first use from a streaming scan, at most once at a time
+per source, and kept current through the ``libro_dao``/``usuario_dao``
+listeners.  Once older than ``SUGGEST_MAX_AGE`` seconds they are rebuilt in
+the background while the old one keeps answering, which also picks up rows
+written by other workers.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from src.models import libro_dao, usuario_dao
+from src.utils.text import fold
+
+logger = logging.getLogger(__name__)
+
+MAX_LIMIT = 50
+SCAN_LIMIT = 2000
+
+_WORD = re.compile(r"[a-z0-9]+")
+_CODE = re.compile(r"[\d\s-]*\d[\d\s-]*[xX]?")
+_SEPARATORS = re.compile(r"[\s-]+")
+
+Entry = Tuple[int, str, List[str]]
+
+
+def _words(text: object) -> List[str]:
+    return _WORD.findall(fold(str(text))) if text is not None else []
+
+
+def _compact(code: object) -> str:
+    """ISBN/DPI without dashes or spaces, so ``978-84-376`` matches ``9788437604947``."""
+
+    return _SEPARATORS.sub("", fold(str(code))) if code is not None else ""
+
+
+def _query_words(text: str) -> List[str]:
+    text = text.strip()
+    if _CODE.fullmatch(text):
+        return [_compact(text)]
+    return _words(text)
+
+
+class PrefixIndex:
+    """Sorted ``(word, id)`` entries answering "ids with a word starting with ...".
+
+    Words live in a plain list and ids in a parallel ``array`` so the whole
+    index is two contiguous sequences; ``put``/``remove`` shift them in place.
+    """
+
+    def __init__(self) -> None:
+        self._words: List[str] = []
+        self._ids = array("q")
+        self._labels: Dict[int, str] = {}
+        self._keys: Dict[int, Tuple[str, ...]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    @classmethod
+    def build(cls, entries: Iterable[Entry]) -> "PrefixIndex":
+        index = cls()
+        pairs: List[Tuple[str, int]] = []
+        for doc_id, label, keys in entries:
+            words = tuple(dict.fromkeys(sys.intern(key) for key in keys if key))
+            index._labels[doc_id] = label
+            index._keys[doc_id] = words
+            pairs.extend((word, doc_id) for word in words)
+        pairs.sort()
+        index._words = [word for word, _ in pairs]
+        index._ids = array("q", (doc_id for _, doc_id in pairs))
+        return index
+
+    def label(self, doc_id: int) -> Optional[str]:
+        return self._labels.get(doc_id)
+
+    def put(self, doc_id: int, label: str, keys: Iterable[str]) -> None:
+        with self._lock:
+            self._remove(doc_id)
+            words = tuple(dict.fromkeys(sys.intern(key) for key in keys if key))
+            self._labels[doc_id] = label
+            self._keys[doc_id] = words
+            for word in words:
+                pos = bisect_left(self._words, word)
+                while pos < len(self._words) and self._words[pos] == word and self._ids[pos] < doc_id:
+                    pos += 1
+                self._words.insert(pos, word)
+                self._ids.insert(pos, doc_id)
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: int) -> None:
+        self._labels.pop(doc_id, None)
+        for word in self._keys.pop(doc_id, ()):
+            pos = bisect_left(self._words, word)
+            while pos < len(self._words) and self._words[pos] == word:
+                if self._ids[pos] == doc_id:
+                    del self._words[pos]
+                    del self._ids[pos]
+                    break
+                pos += 1
+
+    def suggest(self, text: str, limit: int = 10) -> List[Tuple[int, str]]:
+        """Up to ``limit`` ``(id, label)`` whose words start with every typed word.
+
+        The longest typed word drives the bisect; the others filter the
+        candidates.  A number also matches the row with that id, first.
+        """
+
+        tokens = _query_words(text)
+        if not tokens or limit <= 0:
+            return []
+        lead = max(tokens, key=len)
+        rest = [token for token in tokens if token != lead]
+        found: List[Tuple[int, str]] = []
+        seen: Set[int] = set()
+        with self._lock:
+            if text.strip().isdecimal() and int(text) in self._labels:
+                found.append((int(text), self._labels[int(text)]))
+                seen.add(int(text))
+            pos = bisect_left(self._words, lead)
+            end = min(len(self._words), pos + SCAN_LIMIT)
+            while pos < end and len(found) < limit and self._words[pos].startswith(lead):
+                doc_id = self._ids[pos]
+                pos += 1
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                keys = self._keys[doc_id]
+                if all(any(key.startswith(token) for key in keys) for token in rest):
+                    found.append((doc_id, self._labels[doc_id]))
+        return found
+
+    def stats(self) -> Dict[str, int]:
+        return {"items": len(self._labels), "words": len(self._words)}
+
+
+class Source:
+    """A lazily built :class:`PrefixIndex` over one table, kept current by DAO listeners."""
+
+    def __init__(
+        self,
+        name: str,
+        rows: Callable[[Optional[int]], Iterable[Mapping[str, object]]],
+        entry: Callable[[Mapping[str, object]], Entry],
+    ) -> None:
+        self.name = name
+        self.max_age = 0.0
+        self._rows = rows
+        self._entry = entry
+        self._index: Optional[PrefixIndex] = None
+        self._built_at = 0.0
+        self._building = False
+        self._dirty: Set[int] = set()
+        self._build_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+    def index(self) -> PrefixIndex:
+        index = self._index
+        if index is None:
+            # Single flight: concurrent first requests wait for one scan
+            with self._build_lock:
+                if self._index is None:
+                    self._build()
+            return self._index  # type: ignore[return-value]
+        stale = self.max_age and time.monotonic() - self._built_at > self.max_age
+        if stale and self._build_lock.acquire(blocking=False):
+            threading.Thread(target=self._build_in_background, name=f"suggest-{self.name}", daemon=True).start()
+        return index
+
+    def _build(self) -> None:
+        # Caller holds _build_lock
+        with self._state_lock:
+            self._building = True
+            self._dirty.clear()
+        try:
+            fresh = PrefixIndex.build(self._entry(row) for row in self._rows(None))
+            with self._state_lock:
+                self._index = fresh
+                self._built_at = time.monotonic()
+                pending = set(self._dirty)
+                self._dirty.clear()
+        finally:
+            with self._state_lock:
+                self._building = False
+        for doc_id in pending:
+            self.refresh(doc_id)
+
+    def _build_in_background(self) -> None:
+        try:
+            self._build()
+        except Exception as exc:  # noqa: BLE001 - suggestions keep using the previous index
+            self._built_at = time.monotonic()
+            logger.warning("No se pudo reconstruir las sugerencias de %s: %s", self.name, exc)
+        finally:
+            self._build_lock.release()
+
+    def refresh(self, doc_id: int) -> None:
+        index = self._index
+        if index is None:
+            return
+        rows = list(self._rows(doc_id))
+        if rows:
+            index.put(*self._entry(rows[0]))
+        else:
+            index.remove(doc_id)
+
+    def on_change(self, event: str, doc_id: int) -> None:
+        with self._state_lock:
+            if self._building:
+                self._dirty.add(doc_id)
+            index = self._index
+        if index is None:
+            return
+        if event == "eliminar":
+            index.remove(doc_id)
+        else:
+            self.refresh(doc_id)
+
+    def suggest(self, text: str, limit: int = 10) -> List[Dict[str, object]]:
+        limit = max(1, min(limit, MAX_LIMIT))
+        return [{"id": doc_id, "label": label} for doc_id, label in self.index().suggest(text, limit)]
+
+    def selected(self, value: object) -> Optional[Dict[str, object]]:
+        """``{"id", "label"}`` for a form's current value, without forcing a build."""
+
+        try:
+            doc_id = int(value)  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            return None
+        label = self._index.label(doc_id) if self._index is not None else None
+        if label is None:
+            rows = list(self._rows(doc_id))
+            label = self._entry(rows[0])[1] if rows else str(doc_id)
+        return {"id": doc_id, "label": label}
+
+    def stats(self) -> Dict[str, object]:
+        index = self._index
+        return {
+            **(index.stats() if index is not None else {"items": 0, "words": 0}),
+            "age_seconds": round(time.monotonic() - self._built_at, 1) if index is not None else None,
+        }
+
+
+def _libro(row: Mapping[str, object]) -> Entry:
+    return int(row["ID_LIBRO"]), f"{row['ID_LIBRO']} - {row['TITULO']}", _words(row["TITULO"]) + [_compact(row["ISBN"])]
+
+
+def _usuario(row: Mapping[str, object]) -> Entry:
+    return int(row["ID_USUARIO"]), f"{row['ID_USUARIO']} - {row['NOMBRE']}", _words(row["NOMBRE"]) + [_compact(row["DPI"])]
+
+
+libros = Source("libros", libro_dao.iter_sugerencias, _libro)
+usuarios = Source("usuarios", usuario_dao.iter_sugerencias, _usuario)
+
+
+def install(app) -> None:
+    """Follow DAO writes and apply ``SUGGEST_MAX_AGE``."""
+
+    for source, dao in ((libros, libro_dao), (usuarios, usuario_dao)):
+        source.max_age = float(app.config.get("SUGGEST_MAX_AGE") or 0)
+        dao.add_listener(source.on_change)
@@ -0,0 +1,147 @@
+"""Per-request latency breakdown exposed as a ``Server-Timing`` header.
+
+Streamed responses (``stream_template``, ``stream_with_context``) produce
+their body after ``after_request``, so they get no header; with
+``SERVER_TIMING_LOG`` their complete breakdown is logged when the stream
+closes.  Statements run on helper threads (``catalog_loader``) are counted
+through :func:`bind`; ``db`` is then the sum over threads and can exceed the
+wall-clock total.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from flask import before_render_template, current_app, g, has_request_context, request, template_rendered
+
+from src.models import db
+
+logger = logging.getLogger("src.timing")
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def _timings() -> Optional[Dict[str, float]]:
+    sink = getattr(_local, "sink", None)
+    if sink is not None:
+        return sink
+    return g.get("_timing") if has_request_context() else None
+
+
+def current_sink() -> Optional[Dict[str, float]]:
+    """The current request's timing record, to hand to a helper thread."""
+
+    return _timings()
+
+
+@contextmanager
+def bind(sink: Optional[Dict[str, float]]) -> Iterator[None]:
+    """Count statements run on this thread into ``sink`` (from :func:`current_sink`)."""
+
+    previous = getattr(_local, "sink", None)
+    _local.sink = sink
+    try:
+        yield
+    finally:
+        _local.sink = previous
+
+
+def _on_statement(event: db.StatementEvent) -> None:
+    timing = _timings()
+    if timing is not None:
+        with _lock:
+            timing["db"] += event.elapsed
+            timing["db_count"] += 1
+
+
+def _before_template(sender, template, context, **extra) -> None:
+    timing = _timings()
+    if timing is not None:
+        timing["tpl_started"] = time.perf_counter()
+
+
+def _after_template(sender, template, context, **extra) -> None:
+    timing = _timings()
+    if timing is not None and timing.get("tpl_started") is not None:
+        timing["tpl"] += time.perf_counter() - timing.pop("tpl_started")
+
+
+def _start() -> None:
+    g._timing = {"start": time.perf_counter(), "db": 0.0, "db_count": 0, "tpl": 0.0}
+
+
+def _breakdown(timing: Dict[str, float]) -> Dict[str, float]:
+    total_ms = (time.perf_counter() - timing["start"]) * 1000
+    db_ms = timing["db"] * 1000
+    tpl_ms = timing["tpl"] * 1000
+    return {
+        "total_ms": total_ms,
+        "db_ms": db_ms,
+        "tpl_ms": tpl_ms,
+        "app_ms": max(0.0, total_ms - db_ms - tpl_ms),
+    }
+
+
+def _log(request_info: Dict[str, object], timing: Dict[str, float], streamed: bool = False) -> None:
+    parts = _breakdown(timing)
+    logger.info(
+        json.dumps(
+            {
+                **request_info,
+                "total_ms": round(parts["total_ms"], 1),
+                "db_ms": round(parts["db_ms"], 1),
+                "db_count": timing["db_count"],
+                "tpl_ms": round(parts["tpl_ms"], 1),
+                "app_ms": round(parts["app_ms"], 1),
+                **({"streamed": True} if streamed else {}),
+            },
+            ensure_ascii=False,
+        )
+    )
+
+
+def _finish(response):
+    timing = g.get("_timing")
+    if timing is None:
+        return response
+    request_info = {
+        "method": request.method,
+        "path": request.path,
+        "endpoint": request.endpoint,
+        "status": response.status_code,
+    }
+    if response.is_streamed:
+        # The body (and its queries and rendering) has not run yet; leave
+        # g._timing in place so the stream keeps accumulating into it.
+        if current_app.config.get("SERVER_TIMING_LOG"):
+            response.call_on_close(lambda: _log(request_info, timing, streamed=True))
+        return response
+    g.pop("_timing", None)
+    parts = _breakdown(timing)
+    metrics = [
+        f'db;dur={parts["db_ms"]:.1f};desc="Oracle ({timing["db_count"]})"',
+        f'tpl;dur={parts["tpl_ms"]:.1f};desc="Jinja"',
+        f'app;dur={parts["app_ms"]:.1f};desc="Python"',
+        f'total;dur={parts["total_ms"]:.1f}',
+    ]
+    existing = response.headers.get("Server-Timing")
+    response.headers["Server-Timing"] = ", ".join(([existing] if existing else []) + metrics)
+    if current_app.config.get("SERVER_TIMING_LOG"):
+        _log(request_info, timing)
+    return response
+
+
+def init_app(app) -> None:
+    """Emit ``Server-Timing`` (and optionally a JSON log line) for every request."""
+
+    if not app.config.get("SERVER_TIMING"):
+        return
+    app.before_request(_start)
+    app.after_request(_finish)
+    db.add_statement_hook(_on_statement)
+    before_render_template.connect(_before_template, app)
+    template_rendered.connect(_after_template, app)
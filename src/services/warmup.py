@@ -0,0 +1,31 @@
+"""Start-up warm-up: pool, schema catalog, compiled mappings and ``ID_BLOCK``."""
+from __future__ import annotations
+
+import logging
+
+from src.models import db, ids, mapping
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up() -> bool:
+    """Open the pool, pay the per-worker metadata cost and make sure the
+    ``ID_BLOCK`` hi/lo table exists before serving.
+
+    Returns ``False`` (after logging) when the database is not reachable; the
+    pool is then created lazily by the first request as before.
+    """
+
+    if not db.init_pool():
+        return False
+    try:
+        db.schema_catalog().version
+        errors = mapping.compile_all()
+    except Exception as exc:  # noqa: BLE001 - warm-up must never stop the app
+        logger.warning("Schema warm-up failed: %s", exc)
+        return False
+    for table, exc in errors.items():
+        logger.warning("Mapping %s could not be compiled: %s", table, exc)
+    # Logs loudly when ID_BLOCK is missing and cannot be created
+    ids.ensure_hilo_table()
+    return True
@@ -7,3 +7,124 @@
         }, 4000);
     });
 })();
+
+// Typeahead pickers (templates/_typeahead.html): the visible input asks the
+// suggest endpoint as the user types and stores the chosen id in the hidden input.
+(function () {
+    const DEBOUNCE_MS = 200;
+
+    function setup(input) {
+        const hidden = document.getElementById(input.dataset.target);
+        const menu = input.parentElement.querySelector('.dropdown-menu');
+        let chosen = input.value;
+        let items = [];
+        let active = -1;
+        let timer = null;
+        let controller = null;
+
+        function close() {
+            menu.classList.remove('show');
+            menu.replaceChildren();
+            items = [];
+            active = -1;
+        }
+
+        function choose(item) {
+            hidden.value = item.id;
+            input.value = chosen = item.label;
+            close();
+        }
+
+        function render(found) {
+            close();
+            items = found;
+            if (!items.length) {
+                const empty = document.createElement('span');
+                empty.className = 'dropdown-item-text text-muted';
+                empty.textContent = 'Sin resultados';
+                menu.appendChild(empty);
+            }
+            items.forEach((item) => {
+                const option = document.createElement('button');
+                option.type = 'button';
+                option.className = 'dropdown-item';
+                option.textContent = item.label;
+                // mousedown fires before the input's blur closes the menu
+                option.addEventListener('mousedown', (event) => {
+                    event.preventDefault();
+                    choose(item);
+                });
+                menu.appendChild(option);
+            });
+            menu.classList.add('show');
+        }
+
+        function load() {
+            const query = input.value.trim();
+            if (controller) {
+                controller.abort();
+            }
+            if (!query) {
+                close();
+                return;
+            }
+            controller = new AbortController();
+            fetch(`${input.dataset.typeahead}?q=${encodeURIComponent(query)}`, {
+                signal: controller.signal,
+                headers: { Accept: 'application/json' },
+            })
+                .then((response) => (response.ok ? response.json() : { items: [] }))
+                .then((data) => render(data.items || []))
+                .catch((error) => {
+                    if (error.name !== 'AbortError') {
+                        close();
+                    }
+                });
+        }
+
+        function highlight(index) {
+            const options = menu.querySelectorAll('.dropdown-item');
+            options.forEach((option, position) => option.classList.toggle('active', position === index));
+            active = index;
+        }
+
+        input.addEventListener('input', () => {
+            input.setCustomValidity('');
+            if (input.value !== chosen) {
+                hidden.value = '';
+            }
+            clearTimeout(timer);
+            timer = setTimeout(load, DEBOUNCE_MS);
+        });
+
+        input.addEventListener('keydown', (event) => {
+            if (!items.length) {
+                return;
+            }
+            if (event.key === 'ArrowDown') {
+                highlight((active + 1) % items.length);
+            } else if (event.key === 'ArrowUp') {
+                highlight((active - 1 + items.length) % items.length);
+            } else if (event.key === 'Enter' && active >= 0) {
+                choose(items[active]);
+            } else if (event.key === 'Escape') {
+                close();
+            } else {
+                return;
+            }
+            event.preventDefault();
+        });
+
+        input.addEventListener('blur', close);
+
+        input.form.addEventListener('submit', (event) => {
+            if (input.required && !hidden.value) {
+                event.preventDefault();
+                input.setCustomValidity('Selecciona una opción de la lista.');
+                input.reportValidity();
+            }
+        });
+    }
+
+    document.querySelectorAll('[data-typeahead]').forEach(setup);
+})();
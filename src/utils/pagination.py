@@ -0,0 +1,133 @@
+"""Shared pagination value object and request helpers."""
+from __future__ import annotations
+
+import base64
+import json
+import math
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import List, Mapping, Optional, Sequence, Tuple, Type, Union
+
+PER_PAGE = 10
+
+KeyType = Union[Type[object], Tuple[Type[object], ...]]
+
+
+@dataclass(frozen=True)
+class Page:
+    """One page of rows plus the numbers the pagination macro needs."""
+
+    items: List[object] = field(default_factory=list)
+    page: int = 1
+    per_page: int = PER_PAGE
+    total: int = 0
+
+    @property
+    def total_pages(self) -> int:
+        return max(1, -(-self.total // self.per_page))
+
+    @property
+    def has_prev(self) -> bool:
+        return self.page > 1
+
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.total_pages
+
+    def window(self, radius: int = 2) -> List[Optional[int]]:
+        """Page numbers to link: first, last and ``radius`` around the current
+        one, with ``None`` where pages are skipped."""
+
+        last = self.total_pages
+        shown = {1, last, *range(max(1, self.page - radius), min(last, self.page + radius) + 1)}
+        out: List[Optional[int]] = []
+        previous = 0
+        for number in sorted(shown):
+            if number - previous > 1:
+                out.append(None)
+            out.append(number)
+            previous = number
+        return out
+
+
+@dataclass(frozen=True)
+class KeysetPage:
+    """A page reached by seeking past a key instead of counting rows.
+
+    ``next_cursor`` / ``prev_cursor`` are opaque tokens for the ``after`` and
+    ``before`` query arguments, or ``None`` at either end.
+    """
+
+    items: List[object] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+def _encode_value(value: object) -> object:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: object) -> object:
+    """Only what :func:`_encode_value` produces: scalars or a tagged date."""
+
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        raise ValueError("Cursor inválido.")
+    if isinstance(value, int) or (isinstance(value, float) and math.isfinite(value)):
+        return value
+    if isinstance(value, dict) and len(value) == 1:
+        (tag, text), = value.items()
+        parse = {"dt": datetime.fromisoformat, "d": date.fromisoformat}.get(tag)
+        if parse is not None and isinstance(text, str):
+            try:
+                return parse(text)
+            except ValueError as exc:
+                raise ValueError("Cursor inválido.") from exc
+    raise ValueError("Cursor inválido.")
+
+
+def encode_cursor(values: Sequence[object]) -> str:
+    """Opaque, URL-safe token for a key tuple (dates survive the round trip)."""
+
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, types: Sequence[KeyType]) -> Tuple[object, ...]:
+    """Inverse of :func:`encode_cursor`; ``ValueError`` for anything malformed.
+
+    ``types`` holds the expected type of each key column (as for
+    ``isinstance``), so a value of the wrong type is rejected here instead of
+    reaching Oracle as a bind it cannot convert.
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Cursor inválido.") from exc
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Cursor inválido.")
+    decoded = tuple(_decode_value(value) for value in values)
+    for value, expected in zip(decoded, types):
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise ValueError("Cursor inválido.")
+    return decoded
+
+
+def clamp_page(page: int, total: int, per_page: int = PER_PAGE) -> int:
+    return max(1, min(page, max(1, -(-total // per_page))))
+
+
+def page_number(args: Mapping[str, str], name: str = "page") -> int:
+    """``?page=`` as a positive int; anything invalid means page 1."""
+
+    try:
+        return max(1, int(args.get(name, 1) or 1))
+    except (TypeError, ValueError):
+        return 1
@@ -0,0 +1,28 @@
+"""Accent- and case-insensitive text folding shared by Python and SQL."""
+from __future__ import annotations
+
+# Lower-case accented letters and what they fold to.  sql_fold() emits the same
+# mapping as TRANSLATE(), so folded search terms compare equal to folded columns
+# and function-based indexes on the SQL expression can be used.
+ACCENTED = "áàäâãéèëêíìïîóòöôõúùüûñçý"
+PLAIN = "aaaaaeeeeiiiiooooouuuuncy"
+
+_TABLE = str.maketrans(ACCENTED, PLAIN)
+
+
+def fold(text: str) -> str:
+    """Lower-case ``text`` and strip the accents in :data:`ACCENTED`."""
+
+    return (text or "").lower().translate(_TABLE)
+
+
+def sql_fold(column: str) -> str:
+    """SQL expression folding ``column`` exactly like :func:`fold`."""
+
+    return f"TRANSLATE(LOWER({column}), '{ACCENTED}', '{PLAIN}')"
+
+
+def like_escape(text: str) -> str:
+    """Escape ``%``, ``_`` and ``\\`` for ``LIKE ... ESCAPE '\\'``."""
+
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
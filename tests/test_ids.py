@@ -0,0 +1,71 @@
+"""ID allocation must not fall back to MAX+1 silently nor outlive a schema change."""
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+
+from src.models import db, ids
+
+
+class _Counter:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def reserve(self, table: str, pk: str, size: int) -> List[int]:
+        self.calls += 1
+        start = self.calls * 100
+        return list(range(start, start + size))
+
+
+@pytest.fixture
+def no_sources(monkeypatch):
+    monkeypatch.setattr(ids, "find_sequence_for", lambda table, pk: None)
+    monkeypatch.setattr(ids, "table_exists", lambda table: False)
+    monkeypatch.setattr(ids, "ensure_hilo_table", lambda: False)
+
+
+def test_without_sequence_or_id_block_fails_loudly(no_sources):
+    with pytest.raises(RuntimeError, match="id_block.sql"):
+        ids.IdAllocator(5).next_id("LIBRO", "ID_LIBRO")
+
+
+def test_missing_id_block_is_created_on_first_use(monkeypatch):
+    created = []
+    monkeypatch.setattr(ids, "find_sequence_for", lambda table, pk: None)
+    monkeypatch.setattr(ids, "table_exists", lambda table: bool(created))
+    monkeypatch.setattr(ids, "ensure_hilo_table", lambda: created.append(1) or True)
+    allocator = ids.IdAllocator(5)
+
+    assert isinstance(allocator.source_for("LIBRO", "ID_LIBRO"), ids.HiLoSource)
+    assert isinstance(allocator.source_for("AUTOR", "ID_AUTOR"), ids.HiLoSource)
+    assert created == [1]
+
+
+def test_db_next_id_delegates_to_the_allocator(monkeypatch):
+    allocator = ids.IdAllocator(5)
+    allocator.register("LIBRO", "ID_LIBRO", _Counter())
+    monkeypatch.setattr(ids, "_allocator", allocator)
+
+    assert db.next_id("LIBRO", "ID_LIBRO") == 100
+    assert db.next_pk_from_max("LIBRO", "ID_LIBRO") == 101
+
+
+def test_max_fallback_needs_opt_in(no_sources, monkeypatch):
+    allocator = ids.IdAllocator(5, allow_max=True)
+    monkeypatch.setattr(ids, "query_one", lambda sql: {"ID": 7})
+    assert allocator.next_id("LIBRO", "ID_LIBRO") == 7
+
+
+def test_schema_change_drops_cached_blocks(monkeypatch):
+    monkeypatch.setattr(ids, "find_sequence_for", lambda table, pk: "LIBRO_SEQ")
+    allocator = ids.IdAllocator(5)
+    monkeypatch.setattr(ids, "_allocator", allocator)
+    monkeypatch.setattr(db._catalog, "invalidate", lambda: None)
+    source = _Counter()
+    allocator.register("LIBRO", "ID_LIBRO", source)
+
+    assert allocator.next_id("LIBRO", "ID_LIBRO") == 100
+    db.invalidate_schema()
+
+    assert allocator.source_for("LIBRO", "ID_LIBRO") is not source
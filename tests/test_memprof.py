@@ -0,0 +1,45 @@
+"""measure_route must not disturb the request it is called from."""
+from __future__ import annotations
+
+import time
+
+from flask import Flask, g, jsonify
+
+from src.models import db
+from src.services import memprof, timing
+
+
+class _Conn:
+    closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_replay_keeps_outer_connection_and_timing():
+    app = Flask(__name__)
+    app.config["SERVER_TIMING"] = True
+    timing.init_app(app)
+    app.teardown_request(db._release_request_conn)
+    conn = _Conn()
+
+    @app.get("/inner")
+    def inner():
+        return "ok"
+
+    @app.get("/outer")
+    def outer():
+        g._db_conn = conn
+        g._db_conn_checkout = (time.perf_counter(), "test")
+        report = memprof.measure_route(app, "/inner", limit=1)
+        return jsonify(
+            status=report["status"],
+            conn=g.get("_db_conn") is conn and not conn.closed,
+            timing="_timing" in g,
+        )
+
+    response = app.test_client().get("/outer")
+
+    assert response.get_json() == {"status": 200, "conn": True, "timing": True}
+    assert "Server-Timing" in response.headers
+    assert conn.closed  # released once, by the outer request's own teardown
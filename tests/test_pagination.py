@@ -0,0 +1,54 @@
+"""Keyset cursors must round-trip and reject anything they did not produce."""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import date, datetime
+
+import pytest
+
+from src.utils.pagination import decode_cursor, encode_cursor
+
+
+KEY = (date, int)  # HISTORIAL: (FECHA, ID_HISTORIAL)
+
+
+def _craft(values) -> str:
+    raw = json.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def test_round_trip():
+    values = (datetime(2024, 5, 1, 13, 30), 42)
+    assert decode_cursor(encode_cursor(values), KEY) == values
+    values = (date(2024, 5, 1), "x", 1.5, None)
+    assert decode_cursor(encode_cursor(values), (date, str, float, type(None))) == values
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        [[1, 2], 3],
+        [{"x": "2024-05-01"}, 3],
+        [{"dt": "2024-05-01", "d": "2024-05-01"}, 3],
+        [{"dt": 5}, 3],
+        [{"dt": "ayer"}, 3],
+        [True, 3],
+        [float("inf"), 3],
+        [1],
+        ["ayer", 3],
+        [5, 3],
+        [None, 3],
+        [{"dt": "2024-05-01T00:00:00"}, "3"],
+        [{"dt": "2024-05-01T00:00:00"}, 3.5],
+        [{"dt": "2024-05-01T00:00:00"}, True],
+    ],
+)
+def test_crafted_cursor_is_rejected(values):
+    with pytest.raises(ValueError):
+        decode_cursor(_craft(values), KEY)
+
+
+def test_garbage_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("%%%not-base64", KEY)
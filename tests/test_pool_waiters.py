@@ -0,0 +1,40 @@
+"""ORACLE_POOL_MAX_WAITERS must count queued acquirers, not every acquirer."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.models import db
+
+
+class _Pool:
+    max = 2
+
+    def __init__(self, busy: int) -> None:
+        self.busy = busy
+
+    def acquire(self):
+        return object()
+
+
+@pytest.fixture
+def one_waiter_allowed(monkeypatch):
+    config = SimpleNamespace(ORACLE_POOL_MAX_WAITERS=1, RETRY_AFTER_SECONDS=2)
+    monkeypatch.setattr(db, "Config", lambda: config)
+    monkeypatch.setattr(db, "_waiters", 1)
+
+
+def test_free_connection_is_not_shed_by_waiter_limit(monkeypatch, one_waiter_allowed):
+    monkeypatch.setattr(db, "_pool", _Pool(busy=0))
+
+    db._acquire()
+
+    assert db._waiters == 1
+
+
+def test_full_pool_sheds_once_waiters_reach_limit(monkeypatch, one_waiter_allowed):
+    monkeypatch.setattr(db, "_pool", _Pool(busy=2))
+
+    with pytest.raises(db.PoolExhausted):
+        db._acquire()